@@ -0,0 +1,111 @@
+"""
+Benchmark product -> category resolution for the category distribution report.
+
+A synthetic tenant is generated in memory: `--products` products and sales
+holding `--items` items in total. Most items reference a live product id; a
+share (`--renamed`) references deleted products and must be resolved by name.
+Every item is resolved with the previous linear name scan and with
+`ProductCategoryIndex`, and both results are checked to match.
+
+Usage:
+    python -m api.benchmarks.category_index [--products 10000] [--items 200000] [--renamed 0.05] [--seed 42]
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from bson import ObjectId
+
+from ..utils.sales_metrics import ProductCategoryIndex
+
+CATEGORIES = ("Eletrônicos", "Roupas", "Alimentos", "Livros", None)
+
+
+def generate_tenant(products_count: int, items_count: int, renamed: float, seed: int):
+    rng = random.Random(seed)
+    products = [
+        {"_id": ObjectId(), "name": f"Product {i}", "category": rng.choice(CATEGORIES)}
+        for i in range(products_count)
+    ]
+
+    items = []
+    for _ in range(items_count):
+        product = rng.choice(products)
+        if rng.random() < renamed:
+            # Deleted product: unknown id, resolved by (differently cased) name
+            items.append({"productId": ObjectId(), "productName": f" {product['name'].upper()} "})
+        elif rng.random() < 0.5:
+            items.append({"productId": product["_id"], "productName": product["name"]})
+        else:
+            items.append({"productId": str(product["_id"]), "productName": product["name"]})
+    return products, items
+
+
+def linear_categories(inventory: List[Dict[str, Any]], items: List[Dict[str, Any]]) -> List[str]:
+    """The per-item resolution used before ProductCategoryIndex (name fallback scans the inventory)."""
+    product_categories: Dict[str, str] = {}
+    raw_id_map: Dict[Any, str] = {}
+    for product in inventory:
+        pid = product.get("_id")
+        if pid is None:
+            continue
+        product_categories[str(pid)] = product.get("category", "Unknown")
+        raw_id_map[pid] = product.get("category", "Unknown")
+
+    result = []
+    for item in items:
+        product_id = item.get("productId")
+        product_id_str = str(product_id) if product_id is not None else None
+
+        category = None
+        if product_id in raw_id_map:
+            category = raw_id_map[product_id]
+        elif product_id_str and product_id_str in product_categories:
+            category = product_categories[product_id_str]
+        else:
+            item_name = item.get("productName") or item.get("name")
+            if item_name:
+                for prod in inventory:
+                    if str(prod.get("name")).strip().lower() == str(item_name).strip().lower():
+                        category = prod.get("category", "Unknown")
+                        break
+
+        result.append(category or "Unknown")
+    return result
+
+
+def indexed_categories(inventory: List[Dict[str, Any]], items: List[Dict[str, Any]]) -> List[str]:
+    index = ProductCategoryIndex(inventory)
+    return [index.item_category(item) for item in items]
+
+
+def main(products_count: int, items_count: int, renamed: float, seed: int) -> int:
+    products, items = generate_tenant(products_count, items_count, renamed, seed)
+    print(f"{products_count} products, {items_count} sale items ({renamed:.0%} resolved by name)\n")
+
+    timings = {}
+    results = {}
+    for name, fn in (("linear", linear_categories), ("index", indexed_categories)):
+        started = time.perf_counter()
+        results[name] = fn(products, items)
+        timings[name] = time.perf_counter() - started
+        print(f"{name:>7}: {timings[name] * 1000:10.1f} ms")
+
+    print(f"\nspeedup: {timings['linear'] / timings['index']:.1f}x")
+
+    if results["linear"] != results["index"]:
+        print("MISMATCH: the index resolves some items differently")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark product -> category resolution.")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--renamed", type=float, default=0.05, help="Share of items resolved by name")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    raise SystemExit(main(args.products, args.items, args.renamed, args.seed))
@@ -0,0 +1,106 @@
+"""
+Benchmark the "flat" and "bucket" sales storage layouts on a real tenant.
+
+The tenant's month buckets are (re)built from its flat sales first, then the
+sales overview figures (daily, weekly, monthly and all-time) are computed
+repeatedly from each layout.
+
+Usage:
+    python -m api.benchmarks.sales_layout <company_id> [--runs 20] [--skip-rebuild]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from bson import ObjectId
+
+from ..infra.database import mongo
+from ..repositories.sale_repository import SaleRepository
+from ..repositories.product_repository import ProductRepository
+from ..utils.sales_metrics import (
+    get_date_ranges,
+    calculate_daily_metrics,
+    calculate_ticket_metrics,
+    calculate_month_revenue_metrics,
+    calculate_monthly_sales_change,
+    calculate_sales_counts,
+    calculate_ticket_metrics_from_summaries,
+    calculate_month_revenue_metrics_from_summaries,
+    calculate_monthly_sales_change_from_summaries,
+)
+
+
+async def overview_from_flat(repository: SaleRepository, company_id: str) -> dict:
+    dates = get_date_ranges()
+    sales = await repository.find_company_sales(company_id)
+    return {
+        "daily": calculate_daily_metrics(sales, dates["today_start"], dates["yesterday_start"]),
+        "ticket": calculate_ticket_metrics(sales, dates["month_start"], dates["last_month_start"], dates["last_month_end"]),
+        "monthRevenue": calculate_month_revenue_metrics(sales, dates["month_start"], dates["last_month_start"], dates["last_month_end"]),
+        "monthChange": calculate_monthly_sales_change(sales, dates["month_start"], dates["last_month_start"]),
+        "counts": calculate_sales_counts(sales, dates["week_start"]),
+    }
+
+
+async def overview_from_buckets(repository: SaleRepository, company_id: str) -> dict:
+    dates = get_date_ranges()
+    overall = await repository.get_overall_summary(company_id)
+    current_month, last_month, last_month_full = await repository.get_report_month_summaries(company_id, dates)
+    recent = await repository.find_company_sales(company_id, start=dates["week_start"])
+    return {
+        "daily": calculate_daily_metrics(recent, dates["today_start"], dates["yesterday_start"]),
+        "ticket": calculate_ticket_metrics_from_summaries(overall, current_month, last_month),
+        "monthRevenue": calculate_month_revenue_metrics_from_summaries(current_month, last_month),
+        "monthChange": calculate_monthly_sales_change_from_summaries(current_month, last_month_full),
+        "counts": {
+            "totalCount": overall["count"],
+            "weekCount": calculate_sales_counts(recent, dates["week_start"])["weekCount"],
+        },
+    }
+
+
+async def time_runs(fn, repository, company_id: str, runs: int):
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await fn(repository, company_id)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, result
+
+
+async def main(company_id: str, runs: int, skip_rebuild: bool) -> None:
+    db = mongo.db
+    flat = SaleRepository(db, layout="flat")
+    bucket = SaleRepository(db, layout="bucket")
+
+    if not skip_rebuild:
+        products = await ProductRepository(db).list_company_products(company_id, "categories")
+        categories = {p["_id"]: p.get("category", "Unknown") for p in products}
+        written = await bucket.rebuild_buckets(company_id, categories)
+        print(f"Rebuilt {written} month buckets")
+
+    sales_count = await flat.sales_collection.count_documents({"companyId": ObjectId(company_id)})
+    print(f"Company {company_id}: {sales_count} sales, {runs} runs per layout\n")
+
+    for name, fn, repository in (
+        ("flat", overview_from_flat, flat),
+        ("bucket", overview_from_buckets, bucket),
+    ):
+        timings, result = await time_runs(fn, repository, company_id, runs)
+        print(
+            f"{name:>6}: median {statistics.median(timings):8.2f} ms | "
+            f"mean {statistics.mean(timings):8.2f} ms | max {max(timings):8.2f} ms"
+        )
+        print(f"        {result}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the flat and bucket sales layouts.")
+    parser.add_argument("company_id", help="Company to benchmark")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per layout")
+    parser.add_argument("--skip-rebuild", action="store_true", help="Reuse the existing month buckets")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.company_id, args.runs, args.skip_rebuild))
@@ -0,0 +1,219 @@
+"""
+Declarative registry of the MongoDB indexes the application relies on.
+
+`ensure_indexes` creates every declared index at startup. The same registry
+can be compared against the live database to report drift:
+
+    python -m api.infra.indexes            # report drift (exit code 1 if any)
+    python -m api.infra.indexes --apply    # create the missing indexes
+"""
+import argparse
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List
+
+from pymongo.errors import ConnectionFailure, OperationFailure, PyMongoError
+
+from ..repositories.idempotency_repository import IDEMPOTENCY_TTL_SECONDS
+from ..repositories.product_repository import PRODUCT_NAME_COLLATION
+
+
+logger = logging.getLogger(__name__)
+
+# Build indexes without blocking other operations on the collection (MongoDB < 4.2;
+# newer servers always use the optimized build and ignore the flag).
+INDEX_BUILD_BACKGROUND = os.getenv("INDEX_BUILD_BACKGROUND", "true").lower() == "true"
+
+
+# Each entry: collection, keys (list of (field, direction)), unique name and
+# optional create_index options (unique, sparse, collation, ...).
+INDEXES: List[Dict[str, Any]] = [
+    # Signup duplicate check, login and password reset
+    {"collection": "user", "keys": [("email", 1)], "name": "email"},
+    {"collection": "user", "keys": [("cpf_cnpj", 1)], "name": "cpf_cnpj"},
+
+    # Company lookup by owner (account deletion, ownership checks)
+    {"collection": "company", "keys": [("ownerId", 1)], "name": "ownerId"},
+
+    # Sales: period scans per company
+    {"collection": "sales", "keys": [("companyId", 1), ("date", 1)], "name": "companyId_date"},
+    {
+        "collection": "sales_buckets",
+        "keys": [("companyId", 1), ("month", 1)],
+        "name": "companyId_month_unique",
+        "options": {"unique": True},
+    },
+    {
+        "collection": "sales_daily",
+        "keys": [("companyId", 1), ("day", 1)],
+        "name": "companyId_day_unique",
+        "options": {"unique": True},
+    },
+    {
+        "collection": "sales_archive",
+        "keys": [("companyId", 1), ("month", 1)],
+        "name": "companyId_month_unique",
+        "options": {"unique": True},
+    },
+
+    # Products: case-insensitive name lookups and duplicate checks
+    {
+        "collection": "products",
+        "keys": [("companyId", 1), ("name", 1)],
+        "name": "companyId_name_unique",
+        "options": {"unique": True, "collation": PRODUCT_NAME_COLLATION.document},
+    },
+
+    # Clients: name/email lookups in the sale path and client routes
+    {
+        "collection": "clients",
+        "keys": [("companyId", 1), ("name", 1)],
+        "name": "companyId_name_unique",
+        "options": {"unique": True},
+    },
+    # Only clients with an email: $gt "" matches non-empty strings (type
+    # bracketing), and an equality lookup on an email implies it
+    {
+        "collection": "clients",
+        "keys": [("companyId", 1), ("email", 1)],
+        "name": "companyId_email_partial",
+        "options": {"partialFilterExpression": {"email": {"$gt": ""}}},
+    },
+
+    # Idempotency keys: one per company and key, expired after their TTL
+    {
+        "collection": "idempotency_keys",
+        "keys": [("companyId", 1), ("key", 1)],
+        "name": "companyId_key_unique",
+        "options": {"unique": True},
+    },
+    {
+        "collection": "idempotency_keys",
+        "keys": [("createdAt", 1)],
+        "name": "createdAt_ttl",
+        "options": {"expireAfterSeconds": IDEMPOTENCY_TTL_SECONDS},
+    },
+]
+
+# Options compared when looking for drift
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+async def ensure_indexes(db, background: bool = INDEX_BUILD_BACKGROUND) -> Dict[str, List[str]]:
+    """
+    Create every declared index (idempotent).
+
+    A failure on one index (e.g. a conflicting definition left by hand) is logged
+    and does not prevent the others from being created. Database errors are
+    logged and counted as failed, never raised; if the server is unreachable
+    the remaining indexes are reported as failed without waiting on each.
+
+    Returns:
+        dict: {"ensured": [...], "failed": [...]} as "collection.name" strings.
+    """
+    ensured, failed = [], []
+
+    for position, spec in enumerate(INDEXES):
+        label = f"{spec['collection']}.{spec['name']}"
+        try:
+            await db.get_collection(spec["collection"]).create_index(
+                spec["keys"],
+                name=spec["name"],
+                background=background,
+                **spec.get("options", {})
+            )
+            ensured.append(label)
+        except OperationFailure as e:
+            logger.error(f"Could not ensure index {label}: {e}")
+            failed.append(label)
+        except ConnectionFailure as e:
+            # Server unreachable: the other indexes would only time out as well
+            logger.error(f"Could not reach MongoDB to ensure the indexes: {e}")
+            failed.extend(f"{other['collection']}.{other['name']}" for other in INDEXES[position:])
+            break
+        except PyMongoError as e:
+            logger.error(f"Could not ensure index {label}: {e}")
+            failed.append(label)
+
+    return {"ensured": ensured, "failed": failed}
+
+
+async def find_index_drift(db) -> Dict[str, List[str]]:
+    """
+    Compare the declared indexes with the ones that exist in the database.
+
+    Returns:
+        dict with:
+            - missing: declared but absent
+            - different: present under the declared name with other keys/options
+            - undeclared: present in a registry collection but not declared
+    """
+    missing, different, undeclared = [], [], []
+
+    collections = sorted({spec["collection"] for spec in INDEXES})
+    for collection_name in collections:
+        existing = {}
+        async for index in db.get_collection(collection_name).list_indexes():
+            existing[index["name"]] = index
+
+        declared = {spec["name"]: spec for spec in INDEXES if spec["collection"] == collection_name}
+
+        for name, spec in declared.items():
+            label = f"{collection_name}.{name}"
+            if name not in existing:
+                missing.append(label)
+            elif not _matches(spec, existing[name]):
+                different.append(label)
+
+        for name in existing:
+            if name != "_id_" and name not in declared:
+                undeclared.append(f"{collection_name}.{name}")
+
+    return {"missing": missing, "different": different, "undeclared": undeclared}
+
+
+def _matches(spec: Dict[str, Any], index: Dict[str, Any]) -> bool:
+    if [(k, int(v)) for k, v in index["key"].items()] != [(k, int(v)) for k, v in spec["keys"]]:
+        return False
+
+    options = spec.get("options", {})
+    for option in _COMPARED_OPTIONS:
+        if options.get(option) != index.get(option) and (options.get(option) or index.get(option)):
+            return False
+
+    # The server expands the collation with its defaults; compare the declared keys only
+    declared_collation = options.get("collation")
+    actual_collation = index.get("collation")
+    if bool(declared_collation) != bool(actual_collation):
+        return False
+    if declared_collation:
+        return all(actual_collation.get(k) == v for k, v in declared_collation.items())
+
+    return True
+
+
+async def _main(apply: bool) -> int:
+    from .database import mongo
+
+    if apply:
+        result = await ensure_indexes(mongo.db)
+        print(f"Ensured: {len(result['ensured'])} | Failed: {result['failed'] or 'none'}")
+
+    drift = await find_index_drift(mongo.db)
+    for kind in ("missing", "different", "undeclared"):
+        for label in drift[kind]:
+            print(f"[{kind}] {label}")
+
+    has_drift = any(drift[kind] for kind in ("missing", "different"))
+    if not has_drift and not drift["undeclared"]:
+        print("No index drift.")
+    return 1 if has_drift else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report or fix drift between declared and actual indexes.")
+    parser.add_argument("--apply", action="store_true", help="Create the missing indexes before reporting")
+    args = parser.parse_args()
+
+    raise SystemExit(asyncio.run(_main(args.apply)))
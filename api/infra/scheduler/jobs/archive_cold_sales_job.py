@@ -0,0 +1,17 @@
+from datetime import datetime
+from ...database import get_database_client
+from ....services.background.sales_archive_services import SalesArchiveService
+
+
+async def archive_cold_sales_job():
+    """
+    Scheduled job that guards company document sizes and archives the
+    cold sales of tenants above the storage threshold.
+    """
+    db_client = await get_database_client()
+
+    service = SalesArchiveService(db_client)
+    result = await service.guard_all_companies()
+
+    print(f"[{datetime.utcnow().isoformat()}] Sales size guard finished -> {result}")
+    return result
@@ -0,0 +1,17 @@
+from datetime import datetime
+from ...database import get_database_client
+from ....services.background.parquet_export_services import ParquetExportService
+
+
+async def export_parquet_job():
+    """
+    Scheduled job that appends each company's new sales to its Parquet export
+    and rewrites its clients and inventory files.
+    """
+    db_client = await get_database_client()
+
+    service = ParquetExportService(db_client)
+    result = await service.export_all_companies()
+
+    print(f"[{datetime.utcnow().isoformat()}] Parquet export finished -> {result}")
+    return result
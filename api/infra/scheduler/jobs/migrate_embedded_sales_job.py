@@ -0,0 +1,17 @@
+from datetime import datetime
+from ...database import get_database_client
+from ....services.background.sales_migration_services import SalesMigrationService
+
+
+async def migrate_embedded_sales_job():
+    """
+    Scheduled job that moves sales still embedded in company documents
+    into the dedicated 'sales' collection.
+    """
+    db_client = await get_database_client()
+
+    service = SalesMigrationService(db_client)
+    result = await service.migrate_all_companies()
+
+    print(f"[{datetime.utcnow().isoformat()}] Embedded sales migration finished -> {result}")
+    return result
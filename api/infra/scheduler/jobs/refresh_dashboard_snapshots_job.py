@@ -0,0 +1,17 @@
+from datetime import datetime
+from ...database import get_database_client
+from ....services.dashboard_services import DashboardSnapshotService
+
+
+async def refresh_dashboard_snapshots_job():
+    """
+    Scheduled job that rebuilds the dashboard snapshots of the companies whose
+    data changed since their last refresh (or whose snapshot is from a previous day).
+    """
+    db_client = await get_database_client()
+
+    service = DashboardSnapshotService(db_client)
+    result = await service.refresh_stale_companies()
+
+    print(f"[{datetime.utcnow().isoformat()}] Dashboard snapshots refreshed -> {result}")
+    return result
@@ -9,7 +9,4 @@ async def update_critical_inventory_job():
     db_client = await get_database_client()
 
     service = InventoryCriticService(db_client)
-    company_collection = db_client.get_collection("company")
-
-    async for company in company_collection.find({}):
-        await service.recalc_all_companies_critic_inventory()
+    await service.recalc_all_companies_critic_inventory()
@@ -5,6 +5,11 @@ from ...infra.scheduler.jobs.update_inventory_total_products_job import update_i
 from ...infra.scheduler.jobs.update_low_inventory_job import update_low_inventory_job
 from ...infra.scheduler.jobs.update_inventory_critic_job import update_critical_inventory_job
 from ...infra.scheduler.jobs.update_total_inventory_value_job import update_total_inventory_value_job
+from ...infra.scheduler.jobs.migrate_embedded_sales_job import migrate_embedded_sales_job
+from ...infra.scheduler.jobs.archive_cold_sales_job import archive_cold_sales_job
+from ...infra.scheduler.jobs.refresh_dashboard_snapshots_job import refresh_dashboard_snapshots_job
+from ...infra.scheduler.jobs.export_parquet_job import export_parquet_job
+from ...services.background.parquet_export_services import PARQUET_EXPORT_ENABLED
 scheduler = AsyncIOScheduler()
 
 def start_scheduler():
@@ -30,4 +35,15 @@ def start_scheduler():
     scheduler.add_job(update_critical_inventory_job, "interval", hours=0, minutes=15, seconds=40)
     scheduler.add_job(update_total_inventory_value_job, "interval", hours=0, minutes=16)
 
+    # Dashboard snapshots of companies whose data changed
+    scheduler.add_job(refresh_dashboard_snapshots_job, "interval", hours=0, minutes=5)
+
+    # Data migrations
+    scheduler.add_job(migrate_embedded_sales_job, "cron", hour=2, minute=30)
+    scheduler.add_job(archive_cold_sales_job, "cron", hour=4, minute=0)
+
+    # Offline analysis exports (opt-in, requires pyarrow)
+    if PARQUET_EXPORT_ENABLED:
+        scheduler.add_job(export_parquet_job, "cron", hour=4, minute=30)
+
     scheduler.start()
@@ -0,0 +1,40 @@
+"""
+Multi-document transaction support.
+
+Transactions need a replica set or a sharded cluster. `transactions_supported`
+asks the server once per process; writers fall back to ordered single-document
+writes (with compensation) on standalone servers or when MONGO_TRANSACTIONS=off.
+"""
+import logging
+import os
+from typing import Optional
+
+from pymongo.errors import PyMongoError
+
+
+logger = logging.getLogger(__name__)
+
+# "auto" uses transactions when the deployment supports them, "off" never does.
+MONGO_TRANSACTIONS = os.getenv("MONGO_TRANSACTIONS", "auto").lower()
+
+_supported: Optional[bool] = None
+
+
+async def transactions_supported(db) -> bool:
+    """
+    Return True if multi-document transactions can be used with `db`
+    (a Motor database), probing the deployment topology on the first call.
+    """
+    global _supported
+    if MONGO_TRANSACTIONS == "off":
+        return False
+    if _supported is None:
+        try:
+            hello = await db.command("hello")
+        except PyMongoError:
+            logger.warning("Could not probe the MongoDB topology; writing without transactions")
+            return False
+        _supported = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+        if not _supported:
+            logger.info("Standalone MongoDB server: writing without transactions")
+    return _supported
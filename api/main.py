@@ -7,8 +7,12 @@ from api.routes.company.sales_routes import router as sale_routes
 from api.routes.company.clients_routes import router as client_routes
 from api.routes.company.inventory_routes import router as inventory_routes
 from api.routes.company.report_routes import router as report_routes
+from api.routes.company.dashboard_routes import router as dashboard_routes
 
 from api.infra.scheduler.scheduler import start_scheduler
+from api.infra.database import mongo
+from api.infra.indexes import ensure_indexes
+import asyncio
 import logging
 
 app = FastAPI()
@@ -28,8 +32,16 @@ app.include_router(sale_routes, prefix="/Company")
 app.include_router(client_routes, prefix="/Company")
 app.include_router(inventory_routes, prefix="/Company")
 app.include_router(report_routes, prefix="/Company")
+app.include_router(dashboard_routes, prefix="/Company")
+
+async def ensure_indexes_in_background():
+    result = await ensure_indexes(mongo.db)
+    print(f"[App] Database indexes ensured ({len(result['ensured'])} ok, {len(result['failed'])} failed).")
 
 @app.on_event("startup")
 async def startup_event():
+    # Do not hold the startup (and the scheduler) on a slow or unreachable database
+    app.state.ensure_indexes_task = asyncio.create_task(ensure_indexes_in_background())
+
     start_scheduler()
     print("[App] Scheduler successfully initialized.")
\ No newline at end of file
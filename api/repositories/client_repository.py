@@ -0,0 +1,294 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from .embedded_migration import ensure_embedded_array_migrated
+from .projections import resolve_shape, wrap_projected
+
+
+# Named read shapes of a client document, mapped to Mongo projections.
+CLIENT_SHAPES: Dict[str, Optional[Dict[str, int]]] = {
+    "default": {"companyId": 0},
+    "ids": {"_id": 1},
+    "names": {"name": 1},
+    "category": {"category": 1},
+    "report": {"createdAt": 1, "created_at": 1, "last_purchase": 1},
+    "export": {
+        "name": 1, "email": 1, "phone": 1, "city": 1, "address": 1, "category": 1,
+        "createdAt": 1, "created_at": 1, "totalSpent": 1, "purchaseCount": 1, "lastPurchaseAt": 1,
+    },
+}
+
+
+def client_spend_from_sales(sales: Iterable[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+    """
+    Compute the spend aggregates of every client in one pass over `sales`.
+
+    Returns:
+        Mapping of clientId to {"totalSpent", "purchaseCount", "lastPurchaseAt"}.
+    """
+    aggregates: Dict[Any, Dict[str, Any]] = {}
+    for sale in sales:
+        client_id = sale.get("clientId")
+        if client_id is None:
+            continue
+
+        entry = aggregates.setdefault(client_id, {"totalSpent": 0.0, "purchaseCount": 0, "lastPurchaseAt": None})
+        entry["totalSpent"] += float(sale.get("total", 0))
+        entry["purchaseCount"] += 1
+
+        date = sale.get("date")
+        if isinstance(date, datetime) and (entry["lastPurchaseAt"] is None or date > entry["lastPurchaseAt"]):
+            entry["lastPurchaseAt"] = date
+    return aggregates
+
+
+class ClientRepository:
+    """
+    Data access layer for company clients.
+
+    Clients are stored in the dedicated 'clients' collection, one document per
+    client, with a unique (companyId, name) index and a partial (companyId, email)
+    index over the clients that have an email, so lookups scale with the index
+    instead of the company's client list.
+
+    Companies created before the split carry an embedded 'clients' array, which is
+    moved into the collection (ids preserved) the first time it is accessed.
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.clients_collection = self.db.get_collection("clients")
+        self.company_collection = self.db.get_collection("company")
+
+    async def list_company_clients(self, company_id, shape: str = "default") -> List[Dict[str, Any]]:
+        """
+        Return all clients of a company, projected to `shape` (see CLIENT_SHAPES).
+        """
+        await self._ensure_migrated(company_id)
+        projection = resolve_shape(CLIENT_SHAPES, shape)
+        cursor = self.clients_collection.find({"companyId": ObjectId(company_id)}, projection)
+        return [wrap_projected(c, shape, projection) for c in await cursor.to_list(length=None)]
+
+    async def iter_company_clients(self, company_id, shape: str = "default", batch_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the company's clients projected to `shape` (see CLIENT_SHAPES), reading
+        `batch_size` documents at a time.
+        """
+        await self._ensure_migrated(company_id)
+        projection = resolve_shape(CLIENT_SHAPES, shape)
+        cursor = self.clients_collection.find({"companyId": ObjectId(company_id)}, projection).batch_size(batch_size)
+        async for c in cursor:
+            yield wrap_projected(c, shape, projection)
+
+    async def find_by_name(self, company_id: str, name: str) -> Optional[Dict[str, Any]]:
+        await self._ensure_migrated(company_id)
+        return await self.clients_collection.find_one(
+            {"companyId": ObjectId(company_id), "name": name},
+            {"companyId": 0}
+        )
+
+    async def find_by_names(self, company_id, names: Iterable[str], shape: str = "default") -> List[Dict[str, Any]]:
+        """Return the clients named any of `names` with a single query."""
+        await self._ensure_migrated(company_id)
+        projection = resolve_shape(CLIENT_SHAPES, shape)
+        cursor = self.clients_collection.find(
+            {"companyId": ObjectId(company_id), "name": {"$in": list(dict.fromkeys(names))}},
+            projection,
+        )
+        return [wrap_projected(c, shape, projection) for c in await cursor.to_list(length=None)]
+
+    async def find_by_email(self, company_id: str, email: str) -> Optional[Dict[str, Any]]:
+        await self._ensure_migrated(company_id)
+        return await self.clients_collection.find_one(
+            {"companyId": ObjectId(company_id), "email": email},
+            {"companyId": 0}
+        )
+
+    async def find_by_id(self, company_id: str, client_id: ObjectId) -> Optional[Dict[str, Any]]:
+        await self._ensure_migrated(company_id)
+        return await self.clients_collection.find_one(
+            {"_id": client_id, "companyId": ObjectId(company_id)},
+            {"companyId": 0}
+        )
+
+    async def count_created_since(self, company_id, since: datetime) -> int:
+        """
+        Count the clients created at or after `since` ('createdAt', or the
+        legacy 'created_at', stored as a date or an ISO string).
+        """
+        await self._ensure_migrated(company_id)
+        pipeline = [
+            {"$match": {"companyId": ObjectId(company_id)}},
+            {"$project": {"created": {"$convert": {
+                "input": {"$ifNull": ["$createdAt", "$created_at"]},
+                "to": "date", "onError": None, "onNull": None
+            }}}},
+            {"$match": {"created": {"$gte": since}}},
+            {"$count": "count"},
+        ]
+        result = await self.clients_collection.aggregate(pipeline).to_list(length=1)
+        return result[0]["count"] if result else 0
+
+    async def count_by_ids(self, company_id, client_ids: Iterable[ObjectId]) -> int:
+        """Count the company's clients among `client_ids`."""
+        await self._ensure_migrated(company_id)
+        return await self.clients_collection.count_documents(
+            {"companyId": ObjectId(company_id), "_id": {"$in": list(client_ids)}}
+        )
+
+    async def insert_client(self, company_id: str, client_doc: dict) -> None:
+        """
+        Insert a new client.
+
+        Raises:
+            DuplicateKeyError: If the company already has a client with this name.
+        """
+        await self._ensure_migrated(company_id)
+        doc = dict(client_doc)
+        doc["companyId"] = ObjectId(company_id)
+        await self.clients_collection.insert_one(doc)
+
+    async def insert_clients(self, company_id, client_docs: List[dict]) -> int:
+        """
+        Insert several clients in one unordered write. Names that already exist
+        (e.g. created concurrently) are skipped.
+
+        Returns:
+            int: Number of clients inserted.
+        """
+        if not client_docs:
+            return 0
+
+        await self._ensure_migrated(company_id)
+        oid = ObjectId(company_id)
+        try:
+            result = await self.clients_collection.insert_many(
+                [{**doc, "companyId": oid} for doc in client_docs], ordered=False
+            )
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            return int(e.details.get("nInserted", 0))
+
+    async def update_client(self, company_id: str, client_id: ObjectId, fields: Dict[str, Any]) -> bool:
+        """
+        Set the given fields on a client (and touch its updatedAt).
+
+        Returns:
+            bool: False if no client matched.
+
+        Raises:
+            DuplicateKeyError: If the new name is already used by another client.
+        """
+        await self._ensure_migrated(company_id)
+        result = await self.clients_collection.update_one(
+            {"_id": client_id, "companyId": ObjectId(company_id)},
+            {"$set": {**fields, "updatedAt": datetime.utcnow()}}
+        )
+        return result.matched_count > 0
+
+    async def delete_client(self, company_id: str, client_id: ObjectId) -> bool:
+        """
+        Delete a client.
+
+        Returns:
+            bool: False if no client matched.
+        """
+        await self._ensure_migrated(company_id)
+        result = await self.clients_collection.delete_one(
+            {"_id": client_id, "companyId": ObjectId(company_id)}
+        )
+        return result.deleted_count > 0
+
+    async def record_purchase(self, company_id, client_id: ObjectId, total: float, date: datetime, session=None) -> None:
+        """
+        Add one sale to the client's spend aggregates (totalSpent, purchaseCount,
+        lastPurchaseAt) with a single atomic update.
+        """
+        await self.clients_collection.update_one(
+            {"_id": client_id, "companyId": ObjectId(company_id)},
+            {
+                "$inc": {"totalSpent": float(total), "purchaseCount": 1},
+                "$max": {"lastPurchaseAt": date},
+            },
+            session=session,
+        )
+
+    async def add_spend_aggregates(self, company_id, aggregates: Dict[Any, Dict[str, Any]]) -> int:
+        """
+        Add the spend aggregates of a batch of sales (see `client_spend_from_sales`)
+        to their clients in one unordered bulk write.
+
+        Returns:
+            int: Number of clients updated.
+        """
+        if not aggregates:
+            return 0
+
+        oid = ObjectId(company_id)
+        ops = []
+        for client_id, entry in aggregates.items():
+            update: Dict[str, Any] = {
+                "$inc": {"totalSpent": float(entry["totalSpent"]), "purchaseCount": int(entry["purchaseCount"])}
+            }
+            if entry["lastPurchaseAt"] is not None:
+                update["$max"] = {"lastPurchaseAt": entry["lastPurchaseAt"]}
+            ops.append(UpdateOne({"_id": client_id, "companyId": oid}, update))
+        result = await self.clients_collection.bulk_write(ops, ordered=False)
+        return result.matched_count
+
+    async def set_spend_aggregates(self, company_id, aggregates: Dict[ObjectId, Dict[str, Any]]) -> int:
+        """
+        Overwrite the spend aggregates of every client of a company in one bulk
+        write. Clients missing from `aggregates` are reset to no purchases.
+
+        Args:
+            aggregates: Mapping of client _id to {"totalSpent", "purchaseCount", "lastPurchaseAt"}.
+
+        Returns:
+            int: Number of clients updated.
+        """
+        await self._ensure_migrated(company_id)
+        oid = ObjectId(company_id)
+        empty = {"totalSpent": 0.0, "purchaseCount": 0, "lastPurchaseAt": None}
+
+        clients = await self.clients_collection.find({"companyId": oid}, {"_id": 1}).to_list(length=None)
+        ops = [
+            UpdateOne(
+                {"_id": client["_id"], "companyId": oid},
+                {"$set": aggregates.get(client["_id"], empty)}
+            )
+            for client in clients
+        ]
+        if ops:
+            await self.clients_collection.bulk_write(ops, ordered=False)
+        return len(ops)
+
+    async def set_categories(self, company_id, categories: Dict[ObjectId, str]) -> None:
+        """
+        Persist new categories for several clients of a company in one bulk write.
+
+        Args:
+            categories: Mapping of client _id to its new category.
+        """
+        if not categories:
+            return
+
+        await self._ensure_migrated(company_id)
+        now = datetime.utcnow()
+        ops = [
+            UpdateOne(
+                {"_id": client_id, "companyId": ObjectId(company_id)},
+                {"$set": {"category": category, "updatedAt": now}}
+            )
+            for client_id, category in categories.items()
+        ]
+        await self.clients_collection.bulk_write(ops, ordered=False)
+
+    async def _ensure_migrated(self, company_id) -> None:
+        await ensure_embedded_array_migrated(
+            self.company_collection, self.clients_collection, company_id, "clients"
+        )
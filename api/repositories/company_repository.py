@@ -0,0 +1,112 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+from bson import ObjectId
+from .projections import resolve_shape, wrap_projected
+
+
+# Named read shapes of the company document, mapped to Mongo projections.
+# Services ask for a shape instead of loading the whole document.
+COMPANY_SHAPES: Dict[str, Optional[Dict[str, int]]] = {
+    "exists": {"_id": 1},
+    "owner": {"ownerId": 1},
+    "public_info": {"name": 1, "taxId": 1, "address": 1, "ownerId": 1},
+    "inventory_stats": {"inventoryStats": 1},
+    "satisfaction": {"average_satisfaction": 1},
+    "clients_overview": {"average_satisfaction": 1, "clientSpendBackfilledAt": 1},
+    "sales_rollups": {"salesDailyBackfilledAt": 1},
+    "data_version": {"dataVersion": 1},
+    "full": None,
+}
+
+
+class CompanyRepository:
+    """
+    Data access layer for the company document.
+
+    Every read goes through a named shape (see COMPANY_SHAPES), so an endpoint
+    only downloads the fields it uses.
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.company_collection = self.db.get_collection("company")
+
+    async def find_by_id(self, company_id, shape: str = "exists") -> Optional[Dict[str, Any]]:
+        """
+        Return the company document projected to `shape`, or None if it does not exist.
+        """
+        projection = resolve_shape(COMPANY_SHAPES, shape)
+        doc = await self.company_collection.find_one({"_id": ObjectId(company_id)}, projection)
+        return wrap_projected(doc, shape, projection)
+
+    async def exists(self, company_id) -> bool:
+        return await self.find_by_id(company_id, "exists") is not None
+
+    async def iter_companies(self, shape: str = "exists", query: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over the companies matching `query`, projected to `shape`.
+        """
+        projection = resolve_shape(COMPANY_SHAPES, shape)
+        async for doc in self.company_collection.find(query or {}, projection):
+            yield wrap_projected(doc, shape, projection)
+
+    async def data_version(self, company_id) -> Optional[int]:
+        """
+        Return the company's data version (bumped by every write, see `set_fields`),
+        or None if the company does not exist.
+        """
+        company = await self.find_by_id(company_id, "data_version")
+        return int(company.get("dataVersion", 0)) if company else None
+
+    async def document_size(self, company_id) -> int:
+        """
+        Return the BSON size of the company document in bytes (0 if it does not exist).
+        """
+        pipeline = [
+            {"$match": {"_id": ObjectId(company_id)}},
+            {"$project": {"size": {"$bsonSize": "$$ROOT"}}},
+        ]
+        result = await self.company_collection.aggregate(pipeline).to_list(length=1)
+        return int(result[0]["size"]) if result else 0
+
+    async def insert_company(self, company_doc: dict) -> ObjectId:
+        result = await self.company_collection.insert_one(company_doc)
+        return result.inserted_id
+
+    async def set_fields(self, company_id, fields: Dict[str, Any], session=None, bump_version: bool = True) -> bool:
+        """
+        Set the given fields on the company, touch its updatedAt and bump its
+        dataVersion (which invalidates the cached overviews, see utils.response_cache).
+
+        Nothing is written when every field already holds its value, so the
+        periodic recomputations (inventory stats, satisfaction) only invalidate
+        the caches of companies whose figures changed. An empty `fields` (see
+        `touch`) always bumps the version.
+
+        Args:
+            bump_version: False for bookkeeping fields no cached response depends
+                on; they are set without touching updatedAt nor dataVersion.
+
+        Returns:
+            bool: False if the company does not exist.
+        """
+        query: Dict[str, Any] = {"_id": ObjectId(company_id)}
+        if fields:
+            query["$or"] = [{field: {"$ne": value}} for field, value in fields.items()]
+
+        update: Dict[str, Any] = {"$set": dict(fields)}
+        if bump_version:
+            update["$set"]["updatedAt"] = datetime.utcnow()
+            update["$inc"] = {"dataVersion": 1}
+        if not update["$set"]:
+            return await self.exists(company_id)
+
+        result = await self.company_collection.update_one(query, update, session=session)
+        if result.matched_count == 0 and fields:
+            # Unchanged values, or no such company
+            return await self.exists(company_id)
+        return result.matched_count > 0
+
+    async def touch(self, company_id, session=None) -> None:
+        """Update the company's updatedAt timestamp (and bump its dataVersion)."""
+        await self.set_fields(company_id, {}, session=session)
@@ -0,0 +1,49 @@
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+
+class DashboardSnapshotRepository:
+    """
+    Data access layer for the 'dashboard_snapshots' collection.
+
+    One document per company, keyed by the company _id, holding the
+    precomputed dashboard figures (see DashboardSnapshotService). Serving a
+    dashboard is a single find_one on the _id index.
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.snapshots_collection = self.db.get_collection("dashboard_snapshots")
+
+    async def find(self, company_id, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the company's snapshot (optionally only `fields`, plus its
+        refreshedAt and dataVersion), or None if none was built yet.
+        """
+        projection = None
+        if fields:
+            projection = {field: 1 for field in [*fields, "refreshedAt", "dataVersion"]}
+        return await self.snapshots_collection.find_one({"_id": ObjectId(company_id)}, projection)
+
+    async def save(self, company_id, snapshot: Dict[str, Any]) -> None:
+        """
+        Replace the company's snapshot, unless a newer one (built from a later
+        data version) was saved concurrently.
+        """
+        oid = ObjectId(company_id)
+        doc = {**snapshot, "_id": oid}
+        try:
+            await self.snapshots_collection.replace_one(
+                {"_id": oid, "dataVersion": {"$not": {"$gt": snapshot.get("dataVersion", 0)}}},
+                doc,
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The stored snapshot is newer: keep it
+            pass
+
+    async def versions(self) -> Dict[ObjectId, Dict[str, Any]]:
+        """Return {company _id: {"dataVersion", "refreshedAt"}} of every snapshot."""
+        cursor = self.snapshots_collection.find({}, {"dataVersion": 1, "refreshedAt": 1})
+        return {doc["_id"]: doc async for doc in cursor}
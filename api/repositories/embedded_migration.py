@@ -0,0 +1,89 @@
+import logging
+from typing import List
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+logger = logging.getLogger(__name__)
+
+# (field, companyId) pairs whose embedded array is known to be gone (per process).
+_migrated = set()
+
+# Copy-then-unset rounds tried while concurrent writers keep changing the array.
+MIGRATION_ATTEMPTS = 5
+
+
+async def ensure_embedded_array_migrated(company_collection, target_collection, company_id, field: str) -> None:
+    """
+    Move a company's embedded array (e.g. 'inventory', 'clients') into its own collection.
+
+    Used for mutable entities, which must have a single source of truth: the array
+    is moved the first time the company's entities are accessed, then unset.
+
+    Upserts are keyed by the element _id with $setOnInsert, so concurrent or repeated
+    migrations never overwrite newer data. Legacy names that collide on the unique
+    (companyId, name) index get a suffix derived from their _id instead of being dropped.
+
+    The array is only unset if it still equals the copy that was moved; when a
+    concurrent writer changed it in between, the copy is repeated (new elements
+    get upserted) up to MIGRATION_ATTEMPTS times, and the next access tries again
+    after that.
+    """
+    key = (field, str(company_id))
+    if key in _migrated:
+        return
+
+    oid = ObjectId(company_id)
+    for _ in range(MIGRATION_ATTEMPTS):
+        company = await company_collection.find_one(
+            {"_id": oid, field: {"$exists": True}},
+            {field: 1}
+        )
+        if not company:
+            break
+
+        items = [i for i in company.get(field, []) or [] if i.get("_id") is not None]
+        if items:
+            await _upsert_items(target_collection, oid, items)
+
+        result = await company_collection.update_one(
+            {"_id": oid, field: company[field]},
+            {"$unset": {field: ""}}
+        )
+        if result.matched_count:
+            logger.info(f"Moved {len(items)} embedded '{field}' items of company {oid} to their collection")
+            break
+        logger.info(f"Embedded '{field}' of company {oid} changed during its migration, copying it again")
+    else:
+        logger.warning(f"Embedded '{field}' of company {oid} kept changing, migration postponed")
+        return
+
+    _migrated.add(key)
+
+
+async def _upsert_items(target_collection, company_oid: ObjectId, items: List[dict]) -> None:
+    def build_ops(batch):
+        ops = []
+        for item in batch:
+            doc = {k: v for k, v in item.items() if k != "_id"}
+            doc["companyId"] = company_oid
+            ops.append(UpdateOne({"_id": item["_id"]}, {"$setOnInsert": doc}, upsert=True))
+        return ops
+
+    try:
+        await target_collection.bulk_write(build_ops(items), ordered=False)
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+        duplicated = [items[err["index"]] for err in write_errors if err.get("code") == 11000]
+        if len(duplicated) != len(write_errors):
+            raise
+
+        renamed = []
+        for item in duplicated:
+            item = dict(item)
+            item["name"] = f"{item.get('name')} #{str(item['_id'])[-6:]}"
+            renamed.append(item)
+            logger.warning(f"Duplicated name renamed during migration: {item['name']}")
+
+        await target_collection.bulk_write(build_ops(renamed), ordered=False)
@@ -0,0 +1,110 @@
+from datetime import datetime
+import os
+from typing import Any, Dict, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+# How long a stored response answers retries of its request (TTL index on createdAt).
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+
+
+class IdempotencyRepository:
+    """
+    Data access layer for the 'idempotency_keys' collection.
+
+    One document per (company, Idempotency-Key): the endpoint and request hash
+    it was first used with, its status ("pending" while the request runs,
+    "done" once its response is stored) and the response. A pending key belongs
+    to the request whose `owner` token claimed it; that request keeps renewing
+    its lease (`leaseUntil`) while it runs, so only a key whose owner stopped
+    renewing can be taken over. A TTL index removes keys IDEMPOTENCY_TTL_SECONDS
+    after their creation.
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.keys_collection = self.db.get_collection("idempotency_keys")
+
+    async def claim(
+        self,
+        company_id,
+        key: str,
+        endpoint: str,
+        request_hash: str,
+        owner: str,
+        lease_until: datetime,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Reserve `key` for a new request, or return the document of the request
+        that already holds it, in one round trip.
+
+        Returns:
+            None if the key was reserved by this call, else the existing document.
+        """
+        query = {"companyId": ObjectId(company_id), "key": key}
+        try:
+            return await self.keys_collection.find_one_and_update(
+                query,
+                {"$setOnInsert": {
+                    "endpoint": endpoint,
+                    "requestHash": request_hash,
+                    "status": "pending",
+                    "owner": owner,
+                    "leaseUntil": lease_until,
+                    "createdAt": datetime.utcnow(),
+                }},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            # A concurrent request inserted the key between our match and upsert
+            return await self.keys_collection.find_one(query)
+
+    async def take_over(self, company_id, key: str, owner: str, lease_until: datetime) -> bool:
+        """
+        Give a pending key whose lease expired (its owner's worker died) to `owner`.
+
+        Returns:
+            bool: False if the key is done, or its owner still holds a live lease.
+        """
+        result = await self.keys_collection.update_one(
+            {
+                "companyId": ObjectId(company_id),
+                "key": key,
+                "status": "pending",
+                "leaseUntil": {"$lt": datetime.utcnow()},
+            },
+            {"$set": {"owner": owner, "leaseUntil": lease_until}},
+        )
+        return result.modified_count > 0
+
+    async def renew(self, company_id, key: str, owner: str, lease_until: datetime) -> bool:
+        """Extend the lease of a pending key held by `owner`."""
+        result = await self.keys_collection.update_one(
+            {"companyId": ObjectId(company_id), "key": key, "status": "pending", "owner": owner},
+            {"$set": {"leaseUntil": lease_until}},
+        )
+        return result.matched_count > 0
+
+    async def complete(self, company_id, key: str, owner: str, response: Any) -> bool:
+        """Store the response of the request holding `key`."""
+        result = await self.keys_collection.update_one(
+            {"companyId": ObjectId(company_id), "key": key, "owner": owner},
+            {
+                "$set": {"status": "done", "response": response, "completedAt": datetime.utcnow()},
+                "$unset": {"leaseUntil": ""},
+            },
+        )
+        return result.matched_count > 0
+
+    async def release(self, company_id, key: str, owner: str) -> bool:
+        """
+        Delete a pending key held by `owner` (its request failed), so the request
+        can be retried.
+        """
+        result = await self.keys_collection.delete_one(
+            {"companyId": ObjectId(company_id), "key": key, "status": "pending", "owner": owner}
+        )
+        return result.deleted_count > 0
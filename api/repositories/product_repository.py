@@ -0,0 +1,389 @@
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.collation import Collation
+from .embedded_migration import ensure_embedded_array_migrated
+from .projections import resolve_shape, wrap_projected
+
+
+# Case-insensitive comparison (strength 2 ignores case but not accents).
+# Every query by product name must pass this collation to use the unique index.
+PRODUCT_NAME_COLLATION = Collation(locale="pt", strength=2)
+
+# Named read shapes of a product document, mapped to Mongo projections.
+PRODUCT_SHAPES: Dict[str, Optional[Dict[str, int]]] = {
+    "default": {"companyId": 0},
+    "names": {"name": 1},
+    "categories": {"category": 1},
+    "names_categories": {"name": 1, "category": 1},
+    "sale": {"name": 1, "category": 1, "quantity": 1},
+    "sales_counters": {"name": 1, "category": 1, "unitsSold": 1, "revenue": 1, "lastSoldAt": 1},
+    "export": {
+        "name": 1, "category": 1, "price": 1, "costPrice": 1, "quantity": 1, "minQuantity": 1,
+        "createdAt": 1, "unitsSold": 1, "revenue": 1, "lastSoldAt": 1,
+    },
+}
+
+
+def product_sales_from_sales(sales: Iterable[Dict[str, Any]]) -> Dict[ObjectId, Dict[str, Any]]:
+    """
+    Compute the sales counters of every sold product in one pass over `sales`.
+
+    Returns:
+        Mapping of product _id to {"unitsSold", "revenue", "lastSoldAt"}.
+    """
+    counters: Dict[ObjectId, Dict[str, Any]] = {}
+    for sale in sales:
+        date = sale.get("date")
+        for item in sale.get("items") or []:
+            product_id = item.get("productId")
+            if isinstance(product_id, str) and ObjectId.is_valid(product_id):
+                product_id = ObjectId(product_id)
+            if not isinstance(product_id, ObjectId):
+                continue
+
+            quantity = int(item.get("quantity", 0) or 0)
+            entry = counters.setdefault(product_id, {"unitsSold": 0, "revenue": 0.0, "lastSoldAt": None})
+            entry["unitsSold"] += quantity
+            entry["revenue"] += float(item.get("price", 0) or 0) * quantity
+            if isinstance(date, datetime) and (entry["lastSoldAt"] is None or date > entry["lastSoldAt"]):
+                entry["lastSoldAt"] = date
+    return counters
+
+
+def _stock_decrement(
+    company_id,
+    product_id: ObjectId,
+    quantity: int,
+    revenue: Optional[float],
+    sold_at: Optional[datetime],
+    guarded: bool,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(filter, update) removing `quantity` units (see ProductRepository.decrement_stock)."""
+    now = datetime.utcnow()
+    query: Dict[str, Any] = {"_id": product_id, "companyId": ObjectId(company_id)}
+    if guarded:
+        query["quantity"] = {"$gte": int(quantity)}
+
+    update: Dict[str, Any] = {"$inc": {"quantity": -int(quantity)}, "$set": {"updatedAt": now}}
+    if revenue is not None:
+        update["$inc"].update({"unitsSold": int(quantity), "revenue": float(revenue)})
+        update["$max"] = {"lastSoldAt": sold_at or now}
+    return query, update
+
+
+class ProductRepository:
+    """
+    Data access layer for company products.
+
+    Products are stored in the dedicated 'products' collection, one document per
+    product, with a unique case-insensitive (companyId, name) index. Name lookups,
+    duplicate checks and stock updates are single index seeks on a small document.
+
+    Companies created before the split carry an embedded 'inventory' array. Since
+    products are mutable, the array is moved into the collection the first time a
+    company's products are accessed, so there is always a single source of truth.
+    Product _ids are preserved, so sale items keep resolving.
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.products_collection = self.db.get_collection("products")
+        self.company_collection = self.db.get_collection("company")
+
+    async def list_company_products(self, company_id: str, shape: str = "default") -> List[Dict[str, Any]]:
+        """
+        Return all products of a company, projected to `shape` (see PRODUCT_SHAPES).
+        """
+        await self._ensure_migrated(company_id)
+        projection = resolve_shape(PRODUCT_SHAPES, shape)
+        cursor = self.products_collection.find({"companyId": ObjectId(company_id)}, projection)
+        return [wrap_projected(p, shape, projection) for p in await cursor.to_list(length=None)]
+
+    async def iter_company_products(self, company_id, shape: str = "default", batch_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the company's products projected to `shape` (see PRODUCT_SHAPES), reading
+        `batch_size` documents at a time.
+        """
+        await self._ensure_migrated(company_id)
+        projection = resolve_shape(PRODUCT_SHAPES, shape)
+        cursor = self.products_collection.find({"companyId": ObjectId(company_id)}, projection).batch_size(batch_size)
+        async for p in cursor:
+            yield wrap_projected(p, shape, projection)
+
+    async def count_company_products(self, company_id, extra_filter: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Count a company's products, optionally restricted by an extra filter
+        (e.g. an $expr comparing quantity and minQuantity).
+        """
+        await self._ensure_migrated(company_id)
+        query: Dict[str, Any] = {"companyId": ObjectId(company_id)}
+        if extra_filter:
+            query.update(extra_filter)
+        return await self.products_collection.count_documents(query)
+
+    async def total_stock_cost(self, company_id) -> float:
+        """
+        Return Σ (quantity * costPrice) over the company's products, computed server-side.
+        """
+        await self._ensure_migrated(company_id)
+        pipeline = [
+            {"$match": {"companyId": ObjectId(company_id)}},
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": {"$multiply": [
+                    {"$ifNull": ["$quantity", 0]},
+                    {"$ifNull": ["$costPrice", 0]},
+                ]}},
+            }},
+        ]
+        result = await self.products_collection.aggregate(pipeline).to_list(length=1)
+        return float(result[0]["total"]) if result else 0.0
+
+    async def find_by_name(self, company_id: str, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the product with the given name (case-insensitive), or None.
+        """
+        await self._ensure_migrated(company_id)
+        return await self.products_collection.find_one(
+            {"companyId": ObjectId(company_id), "name": name},
+            {"companyId": 0},
+            collation=PRODUCT_NAME_COLLATION,
+        )
+
+    async def find_by_names(self, company_id: str, names: Iterable[str], shape: str = "default") -> List[Dict[str, Any]]:
+        """
+        Return the products matching any of `names` (case-insensitive) with a
+        single query, projected to `shape` (see PRODUCT_SHAPES).
+        """
+        await self._ensure_migrated(company_id)
+        projection = resolve_shape(PRODUCT_SHAPES, shape)
+        cursor = self.products_collection.find(
+            {"companyId": ObjectId(company_id), "name": {"$in": list(dict.fromkeys(names))}},
+            projection,
+            collation=PRODUCT_NAME_COLLATION,
+        )
+        return [wrap_projected(p, shape, projection) for p in await cursor.to_list(length=None)]
+
+    async def find_by_ids(self, company_id, product_ids: Iterable[ObjectId], shape: str = "default") -> List[Dict[str, Any]]:
+        """Return the company's products among `product_ids`, projected to `shape`."""
+        await self._ensure_migrated(company_id)
+        projection = resolve_shape(PRODUCT_SHAPES, shape)
+        cursor = self.products_collection.find(
+            {"companyId": ObjectId(company_id), "_id": {"$in": list(product_ids)}},
+            projection,
+        )
+        return [wrap_projected(p, shape, projection) for p in await cursor.to_list(length=None)]
+
+    async def insert_product(self, company_id: str, product_doc: dict) -> None:
+        """
+        Insert a new product.
+
+        Raises:
+            DuplicateKeyError: If the company already has a product with this name.
+        """
+        await self._ensure_migrated(company_id)
+        doc = dict(product_doc)
+        doc["companyId"] = ObjectId(company_id)
+        await self.products_collection.insert_one(doc)
+
+    async def increment_quantity_by_name(self, company_id: str, name: str, amount: int) -> bool:
+        """
+        Atomically add `amount` units to the product with the given name.
+
+        Returns:
+            bool: False if no product matched.
+        """
+        await self._ensure_migrated(company_id)
+        result = await self.products_collection.update_one(
+            {"companyId": ObjectId(company_id), "name": name},
+            {"$inc": {"quantity": int(amount)}, "$set": {"updatedAt": datetime.utcnow()}},
+            collation=PRODUCT_NAME_COLLATION,
+        )
+        return result.matched_count > 0
+
+    async def decrement_stock(
+        self,
+        company_id: str,
+        product_id: ObjectId,
+        quantity: int,
+        revenue: Optional[float] = None,
+        sold_at: Optional[datetime] = None,
+        guarded: bool = False,
+        session=None,
+    ) -> bool:
+        """
+        Atomically remove `quantity` units from a product's stock.
+
+        When `revenue` is given (a sale), the product's sales counters are updated
+        in the same write: unitsSold += quantity, revenue += revenue and
+        lastSoldAt = max(lastSoldAt, sold_at).
+
+        Args:
+            guarded: Only update the product if it has at least `quantity` units.
+
+        Returns:
+            bool: False if no product matched (or, when guarded, not enough stock).
+        """
+        await self._ensure_migrated(company_id)
+        operation = _stock_decrement(company_id, product_id, quantity, revenue, sold_at, guarded)
+        result = await self.products_collection.update_one(*operation, session=session)
+        return result.matched_count > 0
+
+    async def decrement_stocks(
+        self,
+        company_id: str,
+        decrements: List[Tuple[ObjectId, int, float]],
+        sold_at: datetime,
+        session=None,
+    ) -> Optional[int]:
+        """
+        Apply the guarded stock decrements and sales counters of a sale, given as
+        (product_id, quantity, revenue), in order, stopping at the first one whose
+        guard fails.
+
+        Meant to run inside a transaction (`session`): the updates are issued one
+        by one so the failing decrement is known, and the caller aborts the
+        transaction to undo the ones applied before it.
+
+        Returns:
+            Optional[int]: Index of the decrement that lacked stock, or None if all applied.
+        """
+        await self._ensure_migrated(company_id)
+        for index, (product_id, quantity, revenue) in enumerate(decrements):
+            result = await self.products_collection.update_one(
+                *_stock_decrement(company_id, product_id, quantity, revenue, sold_at, guarded=True),
+                session=session,
+            )
+            if result.matched_count == 0:
+                return index
+        return None
+
+    async def add_sales_counters(
+        self,
+        company_id,
+        counters: Dict[ObjectId, Dict[str, Any]],
+        decrement_stock: bool = True,
+    ) -> List[ObjectId]:
+        """
+        Add the sales counters of a batch of sales (see `product_sales_from_sales`)
+        to their products, removing the sold units from stock unless
+        `decrement_stock` is False (historical imports).
+
+        Without stock changes the counters go in one unordered bulk write. Stock
+        decrements are guarded (quantity >= units sold) like `decrement_stock`,
+        one concurrent update per product so each guard's outcome is known; a
+        product whose guard fails is left untouched.
+
+        Returns:
+            list: Products whose stock guard failed (always empty without stock changes).
+        """
+        if not counters:
+            return []
+
+        await self._ensure_migrated(company_id)
+        if decrement_stock:
+            results = await asyncio.gather(*(
+                self.products_collection.update_one(*_stock_decrement(
+                    company_id, product_id, entry["unitsSold"], entry["revenue"], entry["lastSoldAt"], guarded=True
+                ))
+                for product_id, entry in counters.items()
+            ))
+            return [product_id for product_id, result in zip(counters, results) if result.matched_count == 0]
+
+        now = datetime.utcnow()
+        ops = [
+            UpdateOne(
+                {"_id": product_id, "companyId": ObjectId(company_id)},
+                {
+                    "$inc": {"unitsSold": int(entry["unitsSold"]), "revenue": float(entry["revenue"])},
+                    "$set": {"updatedAt": now},
+                    "$max": {"lastSoldAt": entry["lastSoldAt"] or now},
+                },
+            )
+            for product_id, entry in counters.items()
+        ]
+        await self.products_collection.bulk_write(ops, ordered=False)
+        return []
+
+    async def remove_sales_counters(
+        self,
+        company_id,
+        counters: Dict[ObjectId, Dict[str, Any]],
+        restore_stock: bool = True,
+    ) -> None:
+        """
+        Undo `add_sales_counters` (lastSoldAt is kept) in one unordered bulk
+        write, giving the units back to stock unless `restore_stock` is False.
+        """
+        if not counters:
+            return
+
+        now = datetime.utcnow()
+        ops = []
+        for product_id, entry in counters.items():
+            inc = {"unitsSold": -int(entry["unitsSold"]), "revenue": -float(entry["revenue"])}
+            if restore_stock:
+                inc["quantity"] = int(entry["unitsSold"])
+            ops.append(UpdateOne(
+                {"_id": product_id, "companyId": ObjectId(company_id)},
+                {"$inc": inc, "$set": {"updatedAt": now}},
+            ))
+        await self.products_collection.bulk_write(ops, ordered=False)
+
+    async def restore_stock(self, company_id: str, product_id: ObjectId, quantity: int, revenue: float) -> None:
+        """
+        Undo a sale's `decrement_stock` (quantity and sales counters; lastSoldAt is
+        kept) when the sale could not be completed without a transaction.
+        """
+        await self.products_collection.update_one(
+            {"_id": product_id, "companyId": ObjectId(company_id)},
+            {
+                "$inc": {"quantity": int(quantity), "unitsSold": -int(quantity), "revenue": -float(revenue)},
+                "$set": {"updatedAt": datetime.utcnow()},
+            },
+        )
+
+    async def set_sales_counters(self, company_id, counters: Dict[ObjectId, Dict[str, Any]]) -> int:
+        """
+        Overwrite the sales counters of every product of a company in one bulk
+        write. Products missing from `counters` are reset to never sold.
+
+        Args:
+            counters: Mapping of product _id to {"unitsSold", "revenue", "lastSoldAt"}.
+
+        Returns:
+            int: Number of products updated.
+        """
+        await self._ensure_migrated(company_id)
+        oid = ObjectId(company_id)
+        empty = {"unitsSold": 0, "revenue": 0.0, "lastSoldAt": None}
+
+        products = await self.products_collection.find({"companyId": oid}, {"_id": 1}).to_list(length=None)
+        ops = [
+            UpdateOne({"_id": product["_id"], "companyId": oid}, {"$set": counters.get(product["_id"], empty)})
+            for product in products
+        ]
+        if ops:
+            await self.products_collection.bulk_write(ops, ordered=False)
+        return len(ops)
+
+    async def delete_product(self, company_id: str, product_id: ObjectId) -> bool:
+        """
+        Delete a product.
+
+        Returns:
+            bool: False if no product matched.
+        """
+        await self._ensure_migrated(company_id)
+        result = await self.products_collection.delete_one(
+            {"_id": product_id, "companyId": ObjectId(company_id)}
+        )
+        return result.deleted_count > 0
+
+    async def _ensure_migrated(self, company_id) -> None:
+        await ensure_embedded_array_migrated(
+            self.company_collection, self.products_collection, company_id, "inventory"
+        )
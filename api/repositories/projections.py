@@ -0,0 +1,66 @@
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# In development, documents read through a named shape warn when code reads a
+# field the shape did not project (the read would silently return None/KeyError).
+APP_ENV = os.getenv("APP_ENV", "production")
+WARN_UNPROJECTED_READS = APP_ENV == "development"
+
+
+class ProjectedDocument(dict):
+    """
+    Document read with a named inclusion projection.
+
+    Behaves exactly like a dict; in development it logs a warning whenever a field
+    outside the projection is read, pointing at the shape that should be widened.
+    """
+
+    def __init__(self, data: Dict[str, Any], shape: str, fields: Iterable[str]):
+        super().__init__(data)
+        self._shape = shape
+        self._fields = set(fields) | {"_id"}
+
+    def __getitem__(self, key):
+        self._check(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self._check(key)
+        return super().get(key, default)
+
+    def _check(self, key) -> None:
+        if key not in self._fields:
+            logger.warning(
+                f"Field '{key}' read from a document fetched with shape '{self._shape}', "
+                f"which only projects {sorted(self._fields)}"
+            )
+
+
+def resolve_shape(shapes: Dict[str, Optional[Dict[str, int]]], shape: str) -> Optional[Dict[str, int]]:
+    """
+    Return the Mongo projection of a named shape.
+
+    Raises:
+        ValueError: If the shape is not declared.
+    """
+    if shape not in shapes:
+        raise ValueError(f"Unknown read shape '{shape}'. Declared shapes: {sorted(shapes)}")
+    return shapes[shape]
+
+
+def wrap_projected(doc: Optional[Dict[str, Any]], shape: str, projection: Optional[Dict[str, int]]):
+    """
+    Wrap a document read with an inclusion projection so unprojected reads are reported.
+
+    Exclusion projections and full reads are returned untouched, as is everything
+    outside development.
+    """
+    if doc is None or not WARN_UNPROJECTED_READS or not projection:
+        return doc
+    if not any(projection.values()):
+        return doc
+    return ProjectedDocument(doc, shape, [k for k, v in projection.items() if v])
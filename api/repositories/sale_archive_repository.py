@@ -0,0 +1,123 @@
+from datetime import datetime
+import zlib
+from typing import Any, Dict, List, Optional
+import bson
+from bson import Binary, ObjectId
+from .sale_repository import month_floor
+
+
+def compress_sales(sales: List[Dict[str, Any]]) -> Binary:
+    """Serialize a list of sale documents to zlib-compressed BSON."""
+    return Binary(zlib.compress(bson.encode({"sales": sales}), 6))
+
+
+def decompress_sales(data: bytes) -> List[Dict[str, Any]]:
+    return bson.decode(zlib.decompress(data)).get("sales", [])
+
+
+def summarize_sales(sales: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the summary stored next to an archived month.
+
+    Returns:
+        dict: {"count", "revenue", "days": {"YYYY-MM-DD": {"count", "revenue",
+        "products": {str(productId): item revenue}}}}
+    """
+    summary: Dict[str, Any] = {"count": 0, "revenue": 0.0, "days": {}}
+
+    for sale in sales:
+        date = sale.get("date")
+        if not isinstance(date, datetime):
+            continue
+
+        value = float(sale.get("total", 0))
+        day = summary["days"].setdefault(
+            date.strftime("%Y-%m-%d"), {"count": 0, "revenue": 0.0, "products": {}}
+        )
+        day["count"] += 1
+        day["revenue"] += value
+        summary["count"] += 1
+        summary["revenue"] += value
+
+        for item in sale.get("items", []):
+            try:
+                item_value = float(item.get("price", 0) or 0) * int(item.get("quantity", 0) or 0)
+            except (TypeError, ValueError):
+                continue
+            product_id = str(item.get("productId"))
+            day["products"][product_id] = day["products"].get(product_id, 0.0) + item_value
+
+    return summary
+
+
+class SaleArchiveRepository:
+    """
+    Data access layer for archived (cold) sales.
+
+    Each 'sales_archive' document holds one company-month of sales as a
+    zlib-compressed BSON blob, plus a per-day summary (count, revenue and item
+    revenue per product). Analytics read the summaries only; the blob is kept so
+    the original sales can be restored or exported.
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.archive_collection = self.db.get_collection("sales_archive")
+
+    async def archive_month(self, company_id, month: datetime, sales: List[Dict[str, Any]]) -> int:
+        """
+        Store a month of sales in the archive, merged with what is already archived
+        for that month (deduplicated by _id), so re-running after a partial failure
+        is safe.
+
+        Returns:
+            int: Number of sales in the archived month.
+        """
+        oid = ObjectId(company_id)
+        month = month_floor(month)
+
+        existing = await self.archive_collection.find_one(
+            {"companyId": oid, "month": month},
+            {"data": 1}
+        )
+        merged: Dict[Any, Dict[str, Any]] = {}
+        if existing:
+            for sale in decompress_sales(existing["data"]):
+                merged[sale.get("_id")] = sale
+        for sale in sales:
+            doc = {k: v for k, v in sale.items() if k != "companyId"}
+            merged[doc.get("_id")] = doc
+
+        archived = sorted(merged.values(), key=lambda s: s["date"])
+        await self.archive_collection.replace_one(
+            {"companyId": oid, "month": month},
+            {
+                "companyId": oid,
+                "month": month,
+                **summarize_sales(archived),
+                "data": compress_sales(archived),
+                "archivedAt": datetime.utcnow(),
+            },
+            upsert=True,
+        )
+        return len(archived)
+
+    async def find_summaries(self, company_id, start: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Return the archived month summaries (without the compressed sales),
+        optionally only the months overlapping [start, now).
+        """
+        query: Dict[str, Any] = {"companyId": ObjectId(company_id)}
+        if start is not None:
+            query["month"] = {"$gte": month_floor(start)}
+
+        cursor = self.archive_collection.find(query, {"data": 0, "companyId": 0}).sort("month", 1)
+        return await cursor.to_list(length=None)
+
+    async def load_sales(self, company_id, month: datetime) -> List[Dict[str, Any]]:
+        """Return the archived sales of one month."""
+        chunk = await self.archive_collection.find_one(
+            {"companyId": ObjectId(company_id), "month": month_floor(month)},
+            {"data": 1}
+        )
+        return decompress_sales(chunk["data"]) if chunk else []
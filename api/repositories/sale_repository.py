@@ -0,0 +1,726 @@
+from datetime import datetime
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+
+
+# Size of each bulk upsert batch when draining a legacy embedded 'sales' array.
+MIGRATION_BATCH_SIZE = 1000
+
+# Physical layout of the sales storage:
+#   - "flat"  : one document per sale in the 'sales' collection (default)
+#   - "bucket": one document per company-month in 'sales_buckets', holding the
+#               month's sales plus running revenue/count/per-category totals
+SALES_STORAGE_LAYOUT = os.getenv("SALES_STORAGE_LAYOUT", "flat")
+SALES_LAYOUTS = ("flat", "bucket")
+
+
+def month_floor(date: datetime) -> datetime:
+    """Return the first instant of the month containing `date`."""
+    return datetime(date.year, date.month, 1)
+
+
+def category_field(category: str) -> str:
+    """Make a category name safe to use as a field name inside an update path."""
+    return str(category or "Unknown").replace(".", "_").lstrip("$") or "Unknown"
+
+
+def empty_summary() -> Dict[str, Any]:
+    return {"count": 0, "revenue": 0.0, "categories": {}}
+
+
+def add_to_summary(summary: Dict[str, Any], sale: Dict[str, Any], product_categories: Dict[Any, str]) -> None:
+    """Fold one sale into a {"count", "revenue", "categories"} summary, like a bucket's totals."""
+    summary["count"] += 1
+    summary["revenue"] += float(sale.get("total", 0))
+    for item in sale.get("items", []):
+        key = category_field(product_categories.get(item.get("productId"), "Unknown"))
+        value = float(item.get("price", 0)) * int(item.get("quantity", 0))
+        summary["categories"][key] = summary["categories"].get(key, 0.0) + value
+
+
+def subtract_summary(summary: Dict[str, Any], part: Dict[str, Any]) -> Dict[str, Any]:
+    """Return `summary` without `part` (a summary of some of its sales)."""
+    categories = dict(summary["categories"])
+    for key, value in part["categories"].items():
+        categories[key] = categories.get(key, 0.0) - value
+    return {
+        "count": summary["count"] - part["count"],
+        "revenue": summary["revenue"] - part["revenue"],
+        "categories": categories,
+    }
+
+
+class SaleRepository:
+    """
+    Data access layer for company sales.
+
+    In the default "flat" layout sales are stored in the dedicated 'sales'
+    collection, one document per sale, keyed by companyId and backed by a
+    compound (companyId, date) index.
+
+    In the "bucket" layout (SALES_STORAGE_LAYOUT=bucket) each 'sales_buckets'
+    document holds one company-month of sales plus precomputed totals, so
+    monthly comparisons read small summaries instead of every sale. Switching an
+    existing tenant to this layout requires `rebuild_buckets` (see
+    api/benchmarks/sales_layout.py).
+
+    Companies created before the split may still carry an embedded 'sales' array
+    in their company document. During the dual-read period every read merges both
+    sources (deduplicated by _id) until the migration job drains the legacy array.
+    """
+
+    def __init__(self, db_client, layout: Optional[str] = None):
+        self.db = db_client
+        self.layout = layout or SALES_STORAGE_LAYOUT
+        if self.layout not in SALES_LAYOUTS:
+            raise ValueError(f"Invalid sales storage layout: {self.layout!r}")
+
+        self.sales_collection = self.db.get_collection("sales")
+        self.buckets_collection = self.db.get_collection("sales_buckets")
+        self.company_collection = self.db.get_collection("company")
+
+    async def insert_sale(
+        self,
+        company_id: str,
+        sale_doc: dict,
+        category_totals: Optional[Dict[str, float]] = None,
+        session=None,
+    ) -> None:
+        """
+        Persist a sale.
+
+        Args:
+            company_id: Company that made the sale.
+            sale_doc: Sale document (not mutated).
+            category_totals: Revenue of the sale per product category. Only used by
+                the bucket layout to keep the per-category month totals.
+        """
+        if self.layout == "bucket":
+            await self._push_to_bucket(company_id, sale_doc, category_totals or {}, session)
+            return
+
+        doc = dict(sale_doc)
+        doc["companyId"] = ObjectId(company_id)
+        await self.sales_collection.insert_one(doc, session=session)
+
+    async def insert_sales(self, company_id: str, sales: List[Tuple[dict, Dict[str, float]]]) -> int:
+        """
+        Persist a batch of sales, given as (sale_doc, category_totals) like
+        `insert_sale`, with one write per batch (flat layout) or per month
+        (bucket layout).
+
+        Returns:
+            int: Number of sales written.
+        """
+        if not sales:
+            return 0
+
+        oid = ObjectId(company_id)
+        if self.layout == "flat":
+            await self.sales_collection.insert_many([{**sale_doc, "companyId": oid} for sale_doc, _ in sales], ordered=False)
+            return len(sales)
+
+        months: Dict[datetime, Dict[str, Any]] = {}
+        for sale_doc, category_totals in sales:
+            month = months.setdefault(month_floor(sale_doc["date"]), {"sales": [], "inc": {"count": 0, "revenue": 0.0}})
+            month["sales"].append(sale_doc)
+            inc = month["inc"]
+            inc["count"] += 1
+            inc["revenue"] += float(sale_doc.get("total", 0))
+            for category, value in category_totals.items():
+                key = f"categories.{category_field(category)}"
+                inc[key] = inc.get(key, 0.0) + float(value)
+
+        ops = [
+            UpdateOne(
+                {"companyId": oid, "month": month},
+                {"$push": {"sales": {"$each": entry["sales"]}}, "$inc": entry["inc"]},
+                upsert=True,
+            )
+            for month, entry in months.items()
+        ]
+        await self.buckets_collection.bulk_write(ops, ordered=False)
+        return len(sales)
+
+    async def _push_to_bucket(self, company_id: str, sale_doc: dict, category_totals: Dict[str, float], session=None) -> None:
+        inc: Dict[str, Any] = {"count": 1, "revenue": float(sale_doc.get("total", 0))}
+        for category, value in category_totals.items():
+            key = f"categories.{category_field(category)}"
+            inc[key] = inc.get(key, 0.0) + float(value)
+
+        await self.buckets_collection.update_one(
+            {"companyId": ObjectId(company_id), "month": month_floor(sale_doc["date"])},
+            {"$push": {"sales": sale_doc}, "$inc": inc},
+            upsert=True,
+            session=session,
+        )
+
+    async def remove_sale(self, company_id: str, sale_doc: dict, category_totals: Optional[Dict[str, float]] = None) -> None:
+        """
+        Undo `insert_sale` (same arguments), e.g. when a later write of the sale
+        failed on a server without transactions.
+        """
+        if self.layout == "flat":
+            await self.sales_collection.delete_one({"_id": sale_doc["_id"], "companyId": ObjectId(company_id)})
+            return
+
+        inc: Dict[str, Any] = {"count": -1, "revenue": -float(sale_doc.get("total", 0))}
+        for category, value in (category_totals or {}).items():
+            key = f"categories.{category_field(category)}"
+            inc[key] = inc.get(key, 0.0) - float(value)
+
+        await self.buckets_collection.update_one(
+            {"companyId": ObjectId(company_id), "month": month_floor(sale_doc["date"]), "sales._id": sale_doc["_id"]},
+            {"$pull": {"sales": {"_id": sale_doc["_id"]}}, "$inc": inc},
+        )
+
+    async def remove_sales(self, company_id: str, sales: List[Tuple[dict, Dict[str, float]]]) -> None:
+        """
+        Undo `insert_sales` (same argument), including a partial one: sales that
+        were not written are ignored.
+        """
+        if self.layout == "flat":
+            await self.delete_sales(company_id, [sale_doc["_id"] for sale_doc, _ in sales])
+            return
+
+        for sale_doc, category_totals in sales:
+            await self.remove_sale(company_id, sale_doc, category_totals)
+
+    async def find_company_sales(
+        self,
+        company_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the company's sales ordered by date, optionally limited to [start, end).
+
+        Legacy embedded sales come first (they predate the collection), followed by
+        the stored documents. The 'companyId' field is stripped so callers see the
+        same shape they used to get from the embedded array.
+        """
+        legacy = await self._find_legacy_sales(company_id, start, end)
+
+        if self.layout == "bucket":
+            stored = await self._find_bucket_sales(company_id, start, end)
+        else:
+            query: Dict[str, Any] = {"companyId": ObjectId(company_id)}
+            date_filter: Dict[str, Any] = {}
+            if start is not None:
+                date_filter["$gte"] = start
+            if end is not None:
+                date_filter["$lt"] = end
+            if date_filter:
+                query["date"] = date_filter
+
+            cursor = self.sales_collection.find(query, {"companyId": 0}).sort("date", ASCENDING)
+            stored = await cursor.to_list(length=None)
+
+        if not legacy:
+            return stored
+
+        # A sale may be visible in both places while a migration is in flight
+        seen = {s["_id"] for s in stored}
+        merged = [s for s in legacy if s.get("_id") not in seen]
+        merged.extend(stored)
+        return merged
+
+    async def iter_company_sales(
+        self,
+        company_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the same sales as `find_company_sales`, in the same order, without
+        loading them all: the flat layout streams a cursor `batch_size` documents
+        at a time, the bucket layout holds one month bucket at a time.
+        """
+        legacy = await self._find_legacy_sales(company_id, start, end)
+        # A sale visible in both places is yielded from the stored documents
+        stored_ids = set()
+
+        if self.layout == "bucket":
+            stored = self._iter_bucket_sales(company_id, start, end)
+        else:
+            query: Dict[str, Any] = {"companyId": ObjectId(company_id)}
+            date_filter: Dict[str, Any] = {}
+            if start is not None:
+                date_filter["$gte"] = start
+            if end is not None:
+                date_filter["$lt"] = end
+            if date_filter:
+                query["date"] = date_filter
+
+            stored = self.sales_collection.find(query, {"companyId": 0}).sort("date", ASCENDING).batch_size(batch_size)
+
+        if legacy:
+            legacy_ids = {s.get("_id") for s in legacy}
+            # Legacy sales come first, so the stored copies must be known upfront
+            # (ids only, and only while a migration is in flight)
+            if self.layout == "bucket":
+                async for sale in self._iter_bucket_sales(company_id, start, end):
+                    if sale["_id"] in legacy_ids:
+                        stored_ids.add(sale["_id"])
+            else:
+                cursor = self.sales_collection.find({"_id": {"$in": list(legacy_ids)}}, {"_id": 1})
+                stored_ids = {s["_id"] async for s in cursor}
+
+            for sale in legacy:
+                if sale.get("_id") not in stored_ids:
+                    yield sale
+
+        async for sale in stored:
+            yield sale
+
+    async def _iter_bucket_sales(
+        self,
+        company_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        query: Dict[str, Any] = {"companyId": ObjectId(company_id)}
+        month_filter: Dict[str, Any] = {}
+        if start is not None:
+            month_filter["$gte"] = month_floor(start)
+        if end is not None:
+            month_filter["$lt"] = end
+        if month_filter:
+            query["month"] = month_filter
+
+        # Buckets are whole months, so sorting within each keeps the global order
+        async for bucket in self.buckets_collection.find(query, {"sales": 1}).sort("month", ASCENDING):
+            sales = [
+                sale for sale in bucket.get("sales", [])
+                if (start is None or sale.get("date") >= start)
+                and (end is None or sale.get("date") < end)
+            ]
+            sales.sort(key=lambda s: s["date"])
+            for sale in sales:
+                yield sale
+
+    async def _find_bucket_sales(
+        self,
+        company_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"companyId": ObjectId(company_id)}
+        month_filter: Dict[str, Any] = {}
+        if start is not None:
+            month_filter["$gte"] = month_floor(start)
+        if end is not None:
+            month_filter["$lt"] = end
+        if month_filter:
+            query["month"] = month_filter
+
+        cursor = self.buckets_collection.find(query, {"sales": 1}).sort("month", ASCENDING)
+        sales = []
+        async for bucket in cursor:
+            for sale in bucket.get("sales", []):
+                date = sale.get("date")
+                if start is not None and date < start:
+                    continue
+                if end is not None and date >= end:
+                    continue
+                sales.append(sale)
+
+        sales.sort(key=lambda s: s["date"])
+        return sales
+
+    async def get_month_summaries(
+        self,
+        company_id: str,
+        months: List[datetime],
+        product_categories: Optional[Dict[Any, str]] = None,
+    ) -> Dict[datetime, Dict[str, Any]]:
+        """
+        Return {month_start: {"count", "revenue", "categories"}} for the requested
+        whole calendar months.
+
+        Bucket layout only: the totals are read from the bucket documents (without
+        their 'sales' array). Legacy embedded sales are folded in, their items
+        categorized through `product_categories` (product _id -> category;
+        "Unknown" when missing).
+        """
+        self._require_bucket_layout()
+        months = [month_floor(m) for m in months]
+        summaries = {m: empty_summary() for m in months}
+
+        cursor = self.buckets_collection.find(
+            {"companyId": ObjectId(company_id), "month": {"$in": months}},
+            {"sales": 0}
+        )
+        async for bucket in cursor:
+            summaries[bucket["month"]] = {
+                "count": int(bucket.get("count", 0)),
+                "revenue": float(bucket.get("revenue", 0.0)),
+                "categories": dict(bucket.get("categories", {})),
+            }
+
+        for sale in await self._find_legacy_sales(company_id):
+            date = sale.get("date")
+            if isinstance(date, datetime) and month_floor(date) in summaries:
+                add_to_summary(summaries[month_floor(date)], sale, product_categories or {})
+
+        return summaries
+
+    async def get_range_summary(
+        self,
+        company_id: str,
+        start: datetime,
+        end: datetime,
+        product_categories: Optional[Dict[Any, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Return the {"count", "revenue", "categories"} of the sales in [start, end)
+        (bucket layout only), legacy embedded sales included. Only the sales of
+        the range leave the database, so it suits short ranges inside a month.
+        """
+        self._require_bucket_layout()
+        in_range = {"$and": [{"$gte": ["$$sale.date", start]}, {"$lt": ["$$sale.date", end]}]}
+        pipeline = [
+            {"$match": {"companyId": ObjectId(company_id), "month": {"$gte": month_floor(start), "$lt": end}}},
+            {"$project": {"sales": {"$filter": {"input": "$sales", "as": "sale", "cond": in_range}}}},
+        ]
+
+        summary = empty_summary()
+        async for bucket in self.buckets_collection.aggregate(pipeline):
+            for sale in bucket["sales"]:
+                add_to_summary(summary, sale, product_categories or {})
+        for sale in await self._find_legacy_sales(company_id, start, end):
+            add_to_summary(summary, sale, product_categories or {})
+        return summary
+
+    async def get_report_month_summaries(
+        self,
+        company_id: str,
+        dates: Dict[str, datetime],
+        product_categories: Optional[Dict[Any, str]] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        Month summaries in the windows of the live-sales helpers (`dates` from
+        get_date_ranges), bucket layout only.
+
+        Returns:
+            (current_month, last_month, last_month_full): last_month ends at
+            dates["last_month_end"], a day before the month does, like
+            calculate_month_revenue_metrics / calculate_ticket_metrics;
+            last_month_full is the whole month, like calculate_monthly_sales_change.
+        """
+        months = await self.get_month_summaries(
+            company_id, [dates["month_start"], dates["last_month_start"]], product_categories
+        )
+        last_month_full = months[dates["last_month_start"]]
+        last_day = await self.get_range_summary(
+            company_id, dates["last_month_end"], dates["month_start"], product_categories
+        )
+        return months[dates["month_start"]], subtract_summary(last_month_full, last_day), last_month_full
+
+    async def get_overall_summary(self, company_id: str) -> Dict[str, Any]:
+        """
+        Return the all-time {"count", "revenue"} of a company (bucket layout only).
+        """
+        self._require_bucket_layout()
+        pipeline = [
+            {"$match": {"companyId": ObjectId(company_id)}},
+            {"$group": {"_id": None, "count": {"$sum": "$count"}, "revenue": {"$sum": "$revenue"}}},
+        ]
+        result = await self.buckets_collection.aggregate(pipeline).to_list(length=1)
+        summary = {
+            "count": int(result[0]["count"]) if result else 0,
+            "revenue": float(result[0]["revenue"]) if result else 0.0,
+        }
+
+        for sale in await self._find_legacy_sales(company_id):
+            summary["count"] += 1
+            summary["revenue"] += float(sale.get("total", 0))
+
+        return summary
+
+    async def rebuild_buckets(self, company_id: str, product_categories: Dict[Any, str]) -> int:
+        """
+        Rebuild a company's month buckets from its flat 'sales' documents.
+
+        Offline operation: sales written to the buckets while it runs are lost.
+
+        Args:
+            product_categories: Mapping of product _id to category, used for the
+                per-category month totals.
+
+        Returns:
+            int: Number of buckets written.
+        """
+        oid = ObjectId(company_id)
+        flat = SaleRepository(self.db, layout="flat")
+
+        # Drain legacy embedded sales first so they are not counted twice
+        await flat.migrate_company_sales(company_id)
+        sales = await flat.find_company_sales(company_id)
+
+        buckets: Dict[datetime, Dict[str, Any]] = {}
+        for sale in sales:
+            date = sale.get("date")
+            if not isinstance(date, datetime):
+                continue
+
+            month = month_floor(date)
+            bucket = buckets.setdefault(month, {
+                "companyId": oid, "month": month, "sales": [], **empty_summary()
+            })
+            bucket["sales"].append(sale)
+            add_to_summary(bucket, sale, product_categories)
+
+        await self.buckets_collection.delete_many({"companyId": oid})
+        if buckets:
+            await self.buckets_collection.insert_many(list(buckets.values()))
+        return len(buckets)
+
+    async def aggregate_report_figures(
+        self,
+        company_id,
+        dates: Dict[str, datetime],
+        revenue_start: datetime,
+        group_by: str,
+        category_start: datetime,
+        active_since: datetime,
+        counted_client_ids: Optional[List[ObjectId]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Compute the raw figures of the sales report inside MongoDB (flat layout).
+
+        Only the aggregated numbers leave the database: one $facet over the
+        company's sales, with product categories resolved by $lookup and active
+        clients checked against the 'clients' collection. Legacy embedded sales
+        are not seen (see `find_unmigrated_legacy_sales`); clients in
+        `counted_client_ids`, already counted as active by the caller, are left
+        out of `activeClients`.
+
+        Returns:
+            dict with:
+                - totals: counts and sums over the dashboard date windows
+                - period: [(day "YYYY-MM-DD" or month "YYYY-MM", revenue)] in first-seen order
+                - categories: [(category, item revenue)] in first-seen order
+                - activeClients: clients (of the company) with a sale since `active_since`
+        """
+        oid = ObjectId(company_id)
+        total = {"$convert": {"input": "$total", "to": "double", "onError": 0.0, "onNull": 0.0}}
+
+        def when(condition, value):
+            return {"$sum": {"$cond": [condition, value, 0]}}
+
+        def since(start):
+            return {"$gte": ["$date", start]}
+
+        def between(start, end):
+            return {"$and": [{"$gte": ["$date", start]}, {"$lt": ["$date", end]}]}
+
+        # Same labels as sales_metrics.bucket_key
+        period_format = "%Y-%m-%d" if group_by == "day" else "%Y-%m"
+        period_key = {"$dateToString": {"format": period_format, "date": "$date"}}
+
+        category = {"$arrayElemAt": ["$product.category", 0]}
+        item_value = {"$multiply": [
+            {"$convert": {"input": "$items.price", "to": "double", "onError": 0.0, "onNull": 0.0}},
+            {"$convert": {"input": "$items.quantity", "to": "int", "onError": 0, "onNull": 0}},
+        ]}
+
+        pipeline = [
+            {"$match": {"companyId": oid}},
+            # Sales written with string dates are normalized like the Python backend does
+            {"$addFields": {"date": {"$convert": {"input": "$date", "to": "date", "onError": None, "onNull": None}}}},
+            {"$match": {"date": {"$ne": None}}},
+            {"$facet": {
+                "totals": [{"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "revenue": {"$sum": total},
+                    "today_total": when(since(dates["today_start"]), total),
+                    "yesterday_total": when(between(dates["yesterday_start"], dates["today_start"]), total),
+                    "week_total": when(since(dates["week_start"]), total),
+                    "week_count": when(since(dates["week_start"]), 1),
+                    "this_month_count": when(since(dates["month_start"]), 1),
+                    "this_month_revenue": when(since(dates["month_start"]), total),
+                    "last_month_count": when(between(dates["last_month_start"], dates["last_month_end"]), 1),
+                    "last_month_revenue": when(between(dates["last_month_start"], dates["last_month_end"]), total),
+                    "last_month_full_count": when(between(dates["last_month_start"], dates["month_start"]), 1),
+                }}],
+                "period": [
+                    {"$match": {"date": {"$gte": revenue_start}}},
+                    {"$group": {"_id": period_key, "revenue": {"$sum": total}, "first": {"$min": "$date"}}},
+                    {"$sort": {"first": 1}},
+                ],
+                "categories": [
+                    {"$match": {"date": {"$gte": category_start}}},
+                    {"$unwind": {"path": "$items", "includeArrayIndex": "itemIndex"}},
+                    {"$addFields": {"productOid": {"$convert": {
+                        "input": "$items.productId", "to": "objectId", "onError": None, "onNull": None
+                    }}}},
+                    {"$lookup": {
+                        "from": "products",
+                        "let": {"pid": "$productOid"},
+                        "pipeline": [
+                            {"$match": {"$expr": {"$and": [
+                                {"$eq": ["$_id", "$$pid"]},
+                                {"$eq": ["$companyId", oid]},
+                            ]}}},
+                            {"$project": {"category": 1}},
+                        ],
+                        "as": "product",
+                    }},
+                    {"$group": {
+                        "_id": {"$cond": [{"$in": [{"$ifNull": [category, ""]}, ["", None]]}, "Unknown", category]},
+                        "revenue": {"$sum": item_value},
+                        "first": {"$min": {"date": "$date", "index": "$itemIndex"}},
+                    }},
+                    {"$sort": {"first.date": 1, "first.index": 1}},
+                ],
+                "active": [
+                    {"$match": {"date": {"$gte": active_since}, "clientId": {"$nin": [None, ""]}}},
+                    {"$group": {"_id": "$clientId"}},
+                    {"$match": {"_id": {"$nin": counted_client_ids or []}}},
+                    {"$lookup": {"from": "clients", "localField": "_id", "foreignField": "_id", "as": "client"}},
+                    {"$match": {"client.companyId": oid}},
+                    {"$count": "count"},
+                ],
+            }},
+        ]
+
+        result = (await self.sales_collection.aggregate(pipeline).to_list(length=1))[0]
+        totals = result["totals"][0] if result["totals"] else {}
+        totals.pop("_id", None)
+
+        return {
+            "totals": totals,
+            "period": [(row["_id"], float(row["revenue"])) for row in result["period"]],
+            "categories": [(row["_id"], float(row["revenue"])) for row in result["categories"]],
+            "activeClients": result["active"][0]["count"] if result["active"] else 0,
+        }
+
+    async def sales_footprint(self, company_id) -> int:
+        """
+        Return the total BSON size, in bytes, of the company's stored sales.
+        """
+        collection = self.buckets_collection if self.layout == "bucket" else self.sales_collection
+        pipeline = [
+            {"$match": {"companyId": ObjectId(company_id)}},
+            {"$group": {"_id": None, "size": {"$sum": {"$bsonSize": "$$ROOT"}}}},
+        ]
+        result = await collection.aggregate(pipeline).to_list(length=1)
+        return int(result[0]["size"]) if result else 0
+
+    async def oldest_sale_date(self, company_id) -> Optional[datetime]:
+        """Return the date of the company's oldest stored sale (flat layout)."""
+        sale = await self.sales_collection.find_one(
+            {"companyId": ObjectId(company_id)},
+            {"date": 1},
+            sort=[("date", ASCENDING)]
+        )
+        return sale["date"] if sale else None
+
+    async def delete_sales(self, company_id, sale_ids: List[Any]) -> int:
+        """
+        Delete stored sales by _id (flat layout), e.g. once they have been archived.
+
+        Returns:
+            int: Number of sales deleted.
+        """
+        if not sale_ids:
+            return 0
+        result = await self.sales_collection.delete_many(
+            {"companyId": ObjectId(company_id), "_id": {"$in": sale_ids}}
+        )
+        return result.deleted_count
+
+    def _require_bucket_layout(self) -> None:
+        if self.layout != "bucket":
+            raise RuntimeError("Month summaries are only available in the bucket sales layout")
+
+    async def _find_legacy_sales(
+        self,
+        company_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Read sales still embedded in the company document (pre-split data).
+        """
+        company = await self.company_collection.find_one(
+            {"_id": ObjectId(company_id), "sales.0": {"$exists": True}},
+            {"sales": 1}
+        )
+        if not company:
+            return []
+
+        sales = company.get("sales", []) or []
+        if start is None and end is None:
+            return sales
+
+        return [
+            s for s in sales
+            if isinstance(s.get("date"), datetime)
+            and (start is None or s["date"] >= start)
+            and (end is None or s["date"] < end)
+        ]
+
+    async def find_unmigrated_legacy_sales(self, company_id) -> List[Dict[str, Any]]:
+        """
+        Return the legacy embedded sales not yet copied to the 'sales'
+        collection (flat layout), i.e. the sales a query on the collection alone
+        misses until the migration job drains the array. Read-only.
+        """
+        legacy = await self._find_legacy_sales(company_id)
+        if not legacy:
+            return []
+
+        cursor = self.sales_collection.find({"_id": {"$in": [s.get("_id") for s in legacy]}}, {"_id": 1})
+        stored_ids = {s["_id"] async for s in cursor}
+        return [s for s in legacy if s.get("_id") not in stored_ids]
+
+    async def migrate_company_sales(self, company_id) -> int:
+        """
+        Move a company's embedded sales into the 'sales' collection.
+
+        Upserts are keyed by the sale _id, so the operation is idempotent and safe
+        to re-run after a partial failure. Each batch is pulled from the embedded
+        array only after it has been written to the collection.
+
+        In the bucket layout this is a no-op: legacy sales stay dual-read until
+        `rebuild_buckets` drains them.
+
+        Returns:
+            int: Number of sales moved out of the company document.
+        """
+        if self.layout == "bucket":
+            return 0
+
+        oid = ObjectId(company_id)
+        company = await self.company_collection.find_one(
+            {"_id": oid, "sales.0": {"$exists": True}},
+            {"sales": 1}
+        )
+        if not company:
+            return 0
+
+        sales = [s for s in company.get("sales", []) if s.get("_id") is not None]
+        moved = 0
+
+        for i in range(0, len(sales), MIGRATION_BATCH_SIZE):
+            batch = sales[i:i + MIGRATION_BATCH_SIZE]
+            ops = []
+            for sale in batch:
+                doc = {k: v for k, v in sale.items() if k != "_id"}
+                doc["companyId"] = oid
+                ops.append(UpdateOne({"_id": sale["_id"]}, {"$setOnInsert": doc}, upsert=True))
+
+            await self.sales_collection.bulk_write(ops, ordered=False)
+            await self.company_collection.update_one(
+                {"_id": oid},
+                {"$pull": {"sales": {"_id": {"$in": [s["_id"] for s in batch]}}}}
+            )
+            moved += len(batch)
+
+        return moved
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, BackgroundTasks, Depends, status
 from ...infra.database import get_database_client
 from bson import ObjectId
 from ...schemas.client_schemas import ClientCreateRequest, ClientUpdateRequest, ClientDeleteRequest
 from ...services.client_services import ClientService
+from ...services.dashboard_services import DashboardSnapshotService
 from fastapi import HTTPException
 from ...utils.helper_functions import serialize_mongo
 from ...utils.security import get_current_user
@@ -105,6 +106,7 @@ async def get_clients_overview_full(
 @router.post("/create", status_code=status.HTTP_201_CREATED)
 async def create_client_route(
     body: ClientCreateRequest,
+    background_tasks: BackgroundTasks,
     db_client=Depends(get_database_client),
     current_user=Depends(get_current_user)
 ):
@@ -118,8 +120,8 @@ async def create_client_route(
     ```
 
     ## Description
-    Adds a new client to the company's `clients` array.
-    Prevents duplicates based on the combination of **name** and **email**.
+    Adds a new client to the company's clients.
+    Client names are unique within a company.
 
     ## Request Body
     ```json
@@ -171,6 +173,8 @@ async def create_client_route(
         )
 
     await service.create_client(company_id, body)
+    # Refresh the dashboard snapshot once the response is sent
+    background_tasks.add_task(DashboardSnapshotService(db_client).refresh_company_coalesced, company_id)
 
     return {
         "status": "success",
@@ -231,6 +235,7 @@ async def get_client_names(
 @router.put("/update_client", status_code=status.HTTP_200_OK)
 async def update_client_route(
     body: ClientUpdateRequest,
+    background_tasks: BackgroundTasks,
     db_client=Depends(get_database_client),
     current_user=Depends(get_current_user)
 ):
@@ -323,6 +328,8 @@ async def update_client_route(
                 )
 
         await service.update_client(company_id, client_id, body)
+        # Refresh the dashboard snapshot once the response is sent
+        background_tasks.add_task(DashboardSnapshotService(db_client).refresh_company_coalesced, company_id)
 
         return {
             "status": "success",
@@ -339,6 +346,7 @@ async def update_client_route(
 @router.delete("/delete", status_code=status.HTTP_200_OK)
 async def delete_client_route(
     body: ClientDeleteRequest,
+    background_tasks: BackgroundTasks,
     db_client=Depends(get_database_client),
     current_user=Depends(get_current_user)
 ):
@@ -352,7 +360,7 @@ async def delete_client_route(
     ```
 
     ## Description
-    Removes a client from the company's `clients` array permanently.
+    Removes a client from the company permanently.
     The client is identified by its unique ID provided in the request body.
 
     ## Request Body
@@ -408,6 +416,8 @@ async def delete_client_route(
 
         # Delete client
         await service.delete_client(company_id, client_id)
+        # Refresh the dashboard snapshot once the response is sent
+        background_tasks.add_task(DashboardSnapshotService(db_client).refresh_company_coalesced, company_id)
 
         return {"status": "success", "message": "Client deleted successfully."}
     except HTTPException:
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, Query, status
+from ...infra.database import get_database_client
+from ...utils.security import get_current_user
+from ...services.dashboard_services import DashboardSnapshotService
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+@router.get("", status_code=status.HTTP_200_OK, summary="Get Dashboard Snapshot")
+async def get_dashboard_route(
+    fresh: bool = Query(False, description="Recompute the snapshot before returning it"),
+    db_client=Depends(get_database_client),
+    current_user=Depends(get_current_user)
+):
+    """
+    Retrieve every dashboard figure of the authenticated company in one call.
+
+    ## Authentication
+    Requires a valid **JWT token** in the `Authorization` header:
+    ```
+    Authorization: Bearer <access_token>
+    ```
+
+    ## Description
+    Serves the company's precomputed dashboard snapshot (a single indexed read):
+    - `salesOverview`: same content as `GET /Company/sales/overview`
+    - `report`: `POST /Company/report/sales/overview` for each period (7d, 30d, 6m, 1y)
+    - `inventoryStats`: header figures of `GET /Company/inventory/overview`
+
+    The snapshot is refreshed after each sale and periodically in the
+    background; `refreshedAt` tells when it was computed. Pass `?fresh=true`
+    to recompute it now.
+
+    ## Response Example
+    ```json
+    {
+      "status": "success",
+      "refreshedAt": "2025-11-01T14:32:00",
+      "salesOverview": {"today": {"total": 1200.0, "comparison": 15.6}, "...": "..."},
+      "report": {"7d": {"period": "7d", "overview": {"...": "..."}}, "...": "..."},
+      "inventoryStats": {"totalProducts": 15, "lowInventory": 3, "criticalInventory": 1, "totalValue": 12800.5}
+    }
+    ```
+
+    ### 401 Unauthorized
+    ```json
+    {"detail": "Invalid or missing token"}
+    ```
+
+    ### 404 Not Found
+    ```json
+    {"detail": "Company not found"}
+    ```
+    """
+    service = DashboardSnapshotService(db_client)
+    company_id = current_user["companyId"]
+
+    snapshot = await service.get_snapshot(company_id, fresh=fresh)
+
+    return {
+        "status": "success",
+        "refreshedAt": snapshot["refreshedAt"].isoformat(),
+        "salesOverview": snapshot["salesOverview"],
+        "report": snapshot["report"],
+        "inventoryStats": snapshot["inventoryStats"],
+    }
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Query, status
 from ...infra.database import get_database_client
 from ...utils.security import get_current_user
 from ...schemas.inventory_schemas import (
@@ -7,6 +8,8 @@ from ...schemas.inventory_schemas import (
     InventoryAddProduct,
     DeleteProductRequest
 )
+from ...services.dashboard_services import DashboardSnapshotService
+from ...services.idempotency_services import IdempotencyService
 from ...services.inventory_services import InventoryService
 
 router = APIRouter(prefix="/inventory", tags=["Inventory"])
@@ -136,10 +139,70 @@ async def inventory_overview_route(
     return await service.get_inventory_overview(company_id)
 
 
+@router.get("/top", status_code=status.HTTP_200_OK, summary="Get Best-Selling Products")
+async def top_products_route(
+    by: str = Query("units", description="Ranking field: 'units' or 'revenue'"),
+    limit: int = Query(10, ge=1, le=100, description="Number of products to return"),
+    db_client=Depends(get_database_client),
+    current_user=Depends(get_current_user)
+):
+    """
+    Retrieve the best-selling products of the authenticated company.
+
+    ## Authentication
+    Requires a valid **JWT token** in the `Authorization` header:
+    ```
+    Authorization: Bearer <access_token>
+    ```
+
+    ## Description
+    Ranks the products by units sold (`by=units`, default) or by revenue
+    (`by=revenue`) and returns the top `limit` (1-100, default 10).
+    Products never sold are not listed.
+
+    ## Response Example
+    ```json
+    {
+      "status": "success",
+      "by": "units",
+      "products": [
+        {
+          "productId": "69019f25b407b09e0d09d001",
+          "name": "Mouse Logitech",
+          "category": "Informática",
+          "unitsSold": 320,
+          "revenue": 48000.0,
+          "lastSoldAt": "2025-11-01T14:32:00"
+        }
+      ]
+    }
+    ```
+
+    ### 400 Bad Request
+    ```json
+    {"detail": "Invalid ranking. Use one of: units, revenue."}
+    ```
+
+    ### 401 Unauthorized
+    ```json
+    {"detail": "Invalid or missing token"}
+    ```
+
+    ### 404 Not Found
+    ```json
+    {"detail": "Company not found"}
+    ```
+    """
+    service = InventoryService(db_client)
+    company_id = current_user["companyId"]
+
+    return await service.get_top_products(company_id, by, limit)
+
 
 @router.post("/create", status_code=status.HTTP_201_CREATED)
 async def create_inventory_product(
     body: InventoryCreateRequest,
+    background_tasks: BackgroundTasks,
     db_client=Depends(get_database_client),
     current_user=Depends(get_current_user)
 ):
@@ -197,6 +260,8 @@ async def create_inventory_product(
     company_id = current_user["companyId"]
 
     await service.create_product(company_id, body.product)
+    # Refresh the dashboard snapshot once the response is sent
+    background_tasks.add_task(DashboardSnapshotService(db_client).refresh_company_coalesced, company_id)
 
     return {
         "status": "success",
@@ -206,6 +271,8 @@ async def create_inventory_product(
 @router.post("/increase_inventory", status_code=status.HTTP_200_OK)
 async def increase_inventory_product(
     body: InventoryAddProduct,
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db_client = Depends(get_database_client),
     current_user = Depends(get_current_user)
 ):
@@ -236,25 +303,38 @@ async def increase_inventory_product(
     }
     ```
 
+    ## Retries
+    Send the same `Idempotency-Key` header on every retry: retries get the first
+    response back and the quantity is only increased once.
+
     ## Possible Errors
     - **401 Unauthorized:** Missing or invalid JWT token  
     - **404 Not Found:** Company or product not found  
+    - **409 Conflict:** A request with the same `Idempotency-Key` is still running  
+    - **422 Unprocessable Entity:** The `Idempotency-Key` was used for another request  
     - **500 Internal Server Error:** Unexpected database issues  
     """
     
     service = InventoryService(db_client)
     company_id = current_user["companyId"]
 
-    await service.increase_product_inventory(company_id, body.name, body.amount)
+    async def increase():
+        await service.increase_product_inventory(company_id, body.name, body.amount)
+        # Refresh the dashboard snapshot once the response is sent
+        background_tasks.add_task(DashboardSnapshotService(db_client).refresh_company_coalesced, company_id)
+        return {
+            "status": "success",
+            "message": "Product quantity increased successfully"
+        }
 
-    return {
-        "status": "success",
-        "message": "Product quantity increased successfully"
-    }
+    return await IdempotencyService(db_client).run(
+        company_id, idempotency_key, "increase_inventory", body.model_dump(), increase
+    )
 
 @router.delete("/delete_product", status_code=status.HTTP_200_OK)
 async def delete_inventory_product(
     body: DeleteProductRequest,
+    background_tasks: BackgroundTasks,
     db_client=Depends(get_database_client),
     current_user=Depends(get_current_user)
 ):
@@ -306,6 +386,8 @@ async def delete_inventory_product(
     company_id = current_user["companyId"]
 
     await service.delete_product(company_id, body.productId)
+    # Refresh the dashboard snapshot once the response is sent
+    background_tasks.add_task(DashboardSnapshotService(db_client).refresh_company_coalesced, company_id)
 
     return {
         "status": "success",
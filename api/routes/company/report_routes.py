@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from ...utils.security import get_current_user
-from ...schemas.report_schemas import SalesPeriodRequest
+from ...schemas.report_schemas import SalesPeriodRequest, SalesPeriodsRequest
 from ...services.report_services import SalesAnalyticsService
+from ...services.dashboard_services import DashboardSnapshotService, SNAPSHOT_PERIODS
 from ...infra.database import get_database_client
 router = APIRouter(prefix="/report", tags=["Reports"])
 
 @router.post("/sales/overview")
 async def get_sales_overview(
     body: SalesPeriodRequest,
+    fresh: bool = Query(False, description="Recompute the report instead of serving the dashboard snapshot"),
     current_user=Depends(get_current_user),
     db_client = Depends(get_database_client)
 ):
@@ -18,18 +22,132 @@ async def get_sales_overview(
     - Active customers from the last 3 months (fixed).
     - New customers from the last month (fixed).
 
+    - Average ticket, and the median / p90 / p99 ticket of the period.
+
     The period provided in the request body affects ONLY:
     - Category distribution.
     - Total sales for the period.
+    - Ticket median / p90 / p99 (whole UTC days, within 1%; null until the
+      rollup backfill has run for the company).
 
     Accepted periods:
     - 7d
     - 30d
     - 6m
     - 1y
+
+    Monthly totals are keyed "YYYY-MM" (daily ones "YYYY-MM-DD").
+
+    Period reports come from the company's dashboard snapshot (see
+    `GET /Company/dashboard`); `refreshedAt` tells when they were computed.
+    Pass `?fresh=true` to recompute them.
+
+    ## Custom range
+    Send `start` (and optionally `end`, default now, and `granularity`:
+    hour, day, week or month) instead of `period` to get the sales count and
+    revenue, the category distribution and the sales totals of that range only:
+    ```json
+    {"start": "2025-01-01T00:00:00Z", "end": "2025-02-01T00:00:00Z", "granularity": "week"}
+    ```
+    ```json
+    {
+      "range": {"start": "2025-01-01T00:00:00", "end": "2025-02-01T00:00:00", "granularity": "week"},
+      "overview": {
+        "sales": {"count": 42, "revenue": 12840.5},
+        "categoryDistribution": {"Eletrônicos": 71.2, "Roupas": 28.8},
+        "salesTotals": {"2024-12-30": 1520.0, "2025-01-06": 3310.5}
+      }
+    }
+    ```
+    Weekly buckets are keyed by their Monday, hourly ones "YYYY-MM-DDTHH:00".
+    """
+    service = SalesAnalyticsService(db_client)
+
+    companyId = current_user["companyId"]
+
+    if body.start is not None:
+        return await service.get_sales_range_overview(companyId, body.start, body.end, body.granularity)
+
+    if not body.period:
+        raise HTTPException(status_code=400, detail="Provide either 'period' or 'start'.")
+
+    if body.period not in SNAPSHOT_PERIODS:
+        return await service.get_advanced_sales_overview(companyId, body.period)
+
+    snapshot = await DashboardSnapshotService(db_client).get_snapshot(
+        companyId, fresh=fresh, fields=[f"report.{body.period}"]
+    )
+    return {**snapshot["report"][body.period], "refreshedAt": snapshot["refreshedAt"].isoformat()}
+
+
+@router.post("/sales/overview/periods")
+async def get_sales_overview_periods(
+    body: SalesPeriodsRequest,
+    fresh: bool = Query(False, description="Recompute the reports instead of serving the dashboard snapshot"),
+    current_user=Depends(get_current_user),
+    db_client = Depends(get_database_client)
+):
+    """
+    Retrieve the report of `POST /report/sales/overview` for several periods in
+    one call (e.g. every tab of the dashboard).
+
+    The period-independent figures are computed once and shared by every
+    period. Like the single-period endpoint, the reports come from the
+    company's dashboard snapshot unless `?fresh=true` is passed.
+
+    ```json
+    {"periods": ["7d", "30d"]}
+    ```
+    ```json
+    {
+      "reports": {
+        "7d": {"period": "7d", "overview": {"...": "..."}},
+        "30d": {"period": "30d", "overview": {"...": "..."}}
+      },
+      "refreshedAt": "2025-11-01T14:32:00"
+    }
+    ```
+    """
+    companyId = current_user["companyId"]
+    periods = tuple(dict.fromkeys(body.periods))
+
+    if not periods or any(period not in SNAPSHOT_PERIODS for period in periods):
+        # Validated (and computed) by the service
+        reports = await SalesAnalyticsService(db_client).get_advanced_sales_overviews(companyId, periods)
+        return {"reports": reports}
+
+    snapshot = await DashboardSnapshotService(db_client).get_snapshot(
+        companyId, fresh=fresh, fields=[f"report.{period}" for period in periods]
+    )
+    return {
+        "reports": {period: snapshot["report"][period] for period in periods},
+        "refreshedAt": snapshot["refreshedAt"].isoformat(),
+    }
+
+
+@router.get("/customers/active")
+async def get_active_customers(
+    start: Optional[datetime] = Query(None, description="Start of the window (inclusive, UTC). Default: 90 days before `end`"),
+    end: Optional[datetime] = Query(None, description="End of the window (exclusive, UTC). Default: now"),
+    mode: str = Query("auto", description="'exact', 'approx' or 'auto'"),
+    current_user=Depends(get_current_user),
+    db_client = Depends(get_database_client)
+):
+    """
+    Count the distinct customers who bought in a window of at most 366 days.
+
+    - **exact**: reads the sales of the window.
+    - **approx**: merges the per-day HyperLogLog sketches of the daily rollups
+      (whole UTC days, ~0.8% error). Companies whose rollups are not backfilled
+      are always counted exactly.
+    - **auto** (default): exact for small tenants, approximate for large ones.
+
+    ```json
+    {"start": "2025-08-03T12:00:00", "end": "2025-11-01T12:00:00", "activeCustomers": 1843, "approximate": true}
+    ```
     """
     service = SalesAnalyticsService(db_client)
 
     companyId = current_user["companyId"]
 
-    return await service.get_advanced_sales_overview(companyId, body.period)
+    return await service.get_active_customers(companyId, start, end, mode)
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Query, Request, status, HTTPException
+from fastapi.responses import StreamingResponse
 from ...schemas.sale_schemas import SaleCreate
-from ...services.sale_services import SaleService
+from ...services.sale_services import SALES_IMPORT_BATCH_SIZE, SaleService
+from ...services.dashboard_services import DashboardSnapshotService
+from ...services.idempotency_services import IdempotencyService
 from ...infra.database import get_database_client
 from ...utils.security import get_current_user
 
@@ -14,6 +19,8 @@ router = APIRouter(prefix="/sales", tags=["Sales"])
 )
 async def create_sale_route(
     sale_data: SaleCreate,
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db_client=Depends(get_database_client),
     current_user=Depends(get_current_user)
 ):
@@ -28,6 +35,8 @@ async def create_sale_route(
     - **Products**: Products are referenced by name and validated internally.
     - **Inventory**: Quantities are updated according to the sold items.
     - **Security**: Requires a valid JWT token in the `Authorization` header.
+    - **Retries**: Send the same `Idempotency-Key` header on every retry of a sale;
+      retries get the first response back and the sale is only registered once.
 
     ## Request Body Example
     ```json
@@ -43,12 +52,77 @@ async def create_sale_route(
     - **201 Created**: Sale successfully registered.
     - **401 Unauthorized**: Missing or invalid JWT token.
     - **404 Not Found**: Company not found.
+    - **409 Conflict**: A request with the same `Idempotency-Key` is still running.
+    - **422 Unprocessable Entity**: The `Idempotency-Key` was used for another request.
     - **500 Internal Server Error**: Unexpected server or database error.
     """
     companyId = current_user["companyId"]
     service = SaleService(db_client)
-    await service.create_sale(sale_data, companyId)
-    return {"status": "success", "message": "Sale created successfully."}
+
+    async def create():
+        await service.create_sale(sale_data, companyId)
+        # Refresh the dashboard snapshot once the response is sent
+        background_tasks.add_task(DashboardSnapshotService(db_client).refresh_company_coalesced, companyId)
+        return {"status": "success", "message": "Sale created successfully."}
+
+    return await IdempotencyService(db_client).run(
+        companyId, idempotency_key, "create_sale", sale_data.model_dump(), create
+    )
+
+
+@router.post("/import", status_code=status.HTTP_200_OK)
+async def import_sales_route(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    decrement_stock: bool = Query(True, description="Remove the sold units from stock (false for historical imports)"),
+    batch_size: int = Query(SALES_IMPORT_BATCH_SIZE, ge=1, le=10000, description="Sales validated and written per batch"),
+    db_client=Depends(get_database_client),
+    current_user=Depends(get_current_user)
+):
+    """
+    Import many sales at once for the authenticated user's company.
+
+    ## Description
+    The request body is NDJSON (`application/x-ndjson`): one sale per line, with
+    the same fields as `POST /sales/create_sale` plus an optional `date` (ISO
+    8601, defaults to the import time). The body is read as a stream and written
+    in batches, so imports of POS history do not need one request per sale.
+
+    - **Clients** missing from the company are created, like in `create_sale`.
+    - **Stock**: pass `?decrement_stock=false` for historical sales whose units
+      already left the inventory. Product sales counters are updated either way.
+    - **Errors**: invalid rows are skipped and reported with their line number
+      (at most 100); the other rows are imported.
+
+    ## Request Body Example
+    ```
+    {"clientName": "John Doe", "items": [{"productName": "Notebook Gamer", "quantity": 1, "price": 4500}], "date": "2024-03-02T10:15:00Z"}
+    {"clientName": "Maria", "items": [{"productName": "Mouse Logitech", "quantity": 2, "price": 150}]}
+    ```
+
+    ## Responses
+    ### 200 OK
+    ```json
+    {
+      "status": "success",
+      "received": 2,
+      "imported": 1,
+      "failed": 1,
+      "errors": [{"line": 2, "error": "Product 'Mouse Logitech' not found in company inventory."}],
+      "elapsedSeconds": 0.042,
+      "salesPerSecond": 23.8
+    }
+    ```
+    - **404 Not Found**: Company not found.
+    - **500 Internal Server Error**: Database error; the detail tells how many sales were imported before it.
+    """
+    companyId = current_user["companyId"]
+    service = SaleService(db_client)
+    result = await service.import_sales(companyId, request.stream(), decrement_stock, batch_size)
+
+    if result["imported"]:
+        background_tasks.add_task(DashboardSnapshotService(db_client).refresh_company_coalesced, companyId)
+    return result
 
 
 @router.get("/get_all", status_code=status.HTTP_200_OK)
@@ -149,8 +223,55 @@ async def get_all_sales_route(
     }
 
 
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_sales_route(
+    format: str = Query("ndjson", description="'ndjson' or 'csv'"),
+    start: Optional[datetime] = Query(None, description="Only sales from this date (inclusive, UTC)"),
+    end: Optional[datetime] = Query(None, description="Only sales before this date (exclusive, UTC)"),
+    archived: bool = Query(False, description="Include the sales of archived months"),
+    db_client=Depends(get_database_client),
+    current_user=Depends(get_current_user)
+):
+    """
+    Export the sales of the authenticated user's company as a file download.
+
+    Unlike `GET /sales/get_all`, the sales are streamed as they are read from
+    the database, so large tenants can be exported without loading everything
+    in memory. Names are resolved like in `get_all`.
+
+    ## Formats
+    - **ndjson** (`application/x-ndjson`): one sale per line
+      ```
+      {"_id": "672aaf29cf845a764b3f118a", "clientName": "João Silva", "items": [{"productName": "Notebook Gamer", "quantity": 1, "price": 4500.0}], "total": 4500.0, "date": "2025-01-12T14:32:00"}
+      ```
+    - **csv** (`text/csv`): one row per sale item, the sale total repeated on each row
+      ```
+      saleId,date,clientName,productName,quantity,price,total
+      672aaf29cf845a764b3f118a,2025-01-12T14:32:00,João Silva,Notebook Gamer,1,4500.0,4500.0
+      ```
+
+    ### 400 Bad Request
+    ```json
+    {
+      "detail": "Invalid format. Use one of: ndjson, csv."
+    }
+    ```
+    """
+    company_id = current_user["companyId"]
+    service = SaleService(db_client)
+    chunks = await service.export_sales(company_id, format, start, end, archived)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="sales.{format}"'},
+    )
+
+
 @router.get("/overview", status_code=status.HTTP_200_OK)
 async def get_sales_overview_route(
+    fresh: bool = Query(False, description="Recompute the figures instead of serving the dashboard snapshot"),
     db_client=Depends(get_database_client),
     current_user=Depends(get_current_user)
 ):
@@ -170,6 +291,9 @@ async def get_sales_overview_route(
     - Total sales **this week**
     - **Average ticket** value and comparison to **last month (%)**
 
+    The figures come from the company's dashboard snapshot (see `GET /Company/dashboard`);
+    `refreshedAt` tells when they were computed. Pass `?fresh=true` to recompute them.
+
     ## Request
     **No body required.**
     The authenticated user's `companyId` is automatically extracted from the JWT token.
@@ -180,6 +304,7 @@ async def get_sales_overview_route(
     ```json
     {
       "status": "success",
+      "refreshedAt": "2025-11-01T14:32:00",
       "overview": {
         "today": {
           "total": 1200.0,
@@ -219,10 +344,11 @@ async def get_sales_overview_route(
     ```
     """
     company_id = current_user["companyId"]
-    service = SaleService(db_client)
-    overview = await service.get_sales_overview(company_id)
+    service = DashboardSnapshotService(db_client)
+    snapshot = await service.get_snapshot(company_id, fresh=fresh, fields=["salesOverview"])
 
     return {
         "status": "success",
-        "overview": overview
+        "refreshedAt": snapshot["refreshedAt"].isoformat(),
+        "overview": snapshot["salesOverview"]
     }
@@ -1,11 +1,37 @@
+from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 class SalesPeriodRequest(BaseModel):
     """
-    Request body model for retrieving sales metrics based on a time period.
+    Request body model for retrieving sales metrics based on a time period,
+    or on a custom date range (`start`, optional `end` and `granularity`).
     """
-    period: str = Field(
-        ...,
+    period: Optional[str] = Field(
+        None,
         description="Time period to calculate category distribution and sales totals. "
-                    "Accepted values: '7d', '30d', '6m', '1y'."
+                    "Accepted values: '7d', '30d', '6m', '1y'. Ignored when 'start' is given."
+    )
+    start: Optional[datetime] = Field(
+        None,
+        description="Start of a custom range (inclusive, UTC)."
+    )
+    end: Optional[datetime] = Field(
+        None,
+        description="End of a custom range (exclusive, UTC). Defaults to now."
+    )
+    granularity: Optional[str] = Field(
+        None,
+        description="Bucket size of a custom range: 'hour', 'day', 'week' or 'month'. "
+                    "Defaults to a size suited to the range length."
+    )
+
+
+class SalesPeriodsRequest(BaseModel):
+    """
+    Request body model for retrieving the sales report of several periods at once.
+    """
+    periods: List[str] = Field(
+        ["7d", "30d", "6m", "1y"],
+        description="Periods to compute. Accepted values: '7d', '30d', '6m', '1y'."
     )
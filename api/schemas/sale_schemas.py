@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from bson import ObjectId
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from .base_objectid import PyObjectId
 
 
@@ -18,6 +18,11 @@ class SaleCreate(BaseModel):
     items: List[SaleItem] = Field(..., description="List of products and quantities")
 
 
+# 🔹 One line of a bulk sale import (NDJSON); historical sales carry their date
+class SaleImportRow(SaleCreate):
+    date: Optional[datetime] = Field(None, description="When the sale happened (defaults to the import time)")
+
+
 # 🔹 Representation of sale items stored in DB
 class SaleItemInDB(BaseModel):
     productId: PyObjectId = Field(..., description="Reference to the sold product")
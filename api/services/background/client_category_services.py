@@ -1,6 +1,9 @@
 from datetime import datetime, timedelta
 from bson import ObjectId
 from ...infra.database import mongo
+from ...repositories.sale_repository import SaleRepository
+from ...repositories.client_repository import ClientRepository
+from ...repositories.company_repository import CompanyRepository
 
 
 class ClientCategoryService:
@@ -10,16 +13,17 @@ class ClientCategoryService:
     """
 
     def __init__(self):
-        # Access the 'company' collection from the MongoDB database
-        self.company_collection = mongo.get_collection("company")
+        # Access the company documents through the repository
+        self.company_repository = CompanyRepository(mongo)
+        self.sale_repository = SaleRepository(mongo)
+        self.client_repository = ClientRepository(mongo)
 
     async def update_all_clients(self):
         """
         Iterate through all companies in the database and update
         the category of every client according to their purchase behavior.
         """
-        companies = self.company_collection.find({})
-        async for company in companies:
+        async for company in self.company_repository.iter_companies():
             await self._update_company_clients(company)
 
     async def _update_company_clients(self, company: dict):
@@ -28,13 +32,15 @@ class ClientCategoryService:
         and update their categories accordingly.
 
         Args:
-            company (dict): A company document containing clients and sales arrays.
+            company (dict): A company document (only its _id is used).
         """
-        sales = company.get("sales", [])
-        clients = company.get("clients", [])
+        clients = await self.client_repository.list_company_clients(company["_id"], "category")
         now = datetime.utcnow()
         cutoff = now - timedelta(days=90)  # Analyze purchases made in the last 90 days
 
+        # Only the window is loaded, through the (companyId, date) index
+        sales = await self.sale_repository.find_company_sales(company["_id"], start=cutoff)
+
         # Dictionary to accumulate sales stats for each client
         stats = {}
 
@@ -55,7 +61,8 @@ class ClientCategoryService:
             stats[client_id]["total_spent"] += total
             stats[client_id]["purchases"] += 1
 
-        # Update the category of each client in the company document
+        # Collect the clients whose category changed
+        changed = {}
         for client in clients:
             client_id = str(client.get("_id"))
             data = stats.get(client_id, {"total_spent": 0, "purchases": 0})
@@ -71,15 +78,13 @@ class ClientCategoryService:
             else:
                 category = "regular"
 
-            # Update client's category and timestamp
-            client["category"] = category
-            client["updatedAt"] = now
+            if client.get("category") != category:
+                changed[client["_id"]] = category
 
-        # Save updated client data back to the company document
-        await self.company_collection.update_one(
-            {"_id": company["_id"]},
-            {"$set": {"clients": clients}}
-        )
+        # Save only the changed clients, through one bulk write on the clients collection
+        await self.client_repository.set_categories(company["_id"], changed)
+        if changed:
+            await self.company_repository.touch(company["_id"])
 
         # Uncomment for debugging/logging
         # print(f"[Service] Updated categories for company: {company.get('name')}")
@@ -0,0 +1,96 @@
+"""
+Backfill of the per-client spend aggregates (totalSpent, purchaseCount,
+lastPurchaseAt).
+
+New sales update their client as they are created; existing tenants need a
+one-off rebuild before the clients overview reads the aggregates:
+
+    python -m api.services.background.client_spend_services            # every company
+    python -m api.services.background.client_spend_services <id> ...   # some companies
+
+Run it off-peak: a sale created while its company is being rebuilt may be
+counted twice or missed for its client (re-running the rebuild fixes it).
+"""
+import argparse
+import asyncio
+from datetime import datetime
+import logging
+from ...repositories.sale_repository import SaleRepository
+from ...repositories.sale_archive_repository import SaleArchiveRepository
+from ...repositories.client_repository import ClientRepository, client_spend_from_sales
+from ...repositories.company_repository import CompanyRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+class ClientSpendService:
+    """
+    Rebuilds the spend aggregates of every client of a company from its sales
+    (live and archived), then marks the company with 'clientSpendBackfilledAt'
+    so the clients overview starts reading them.
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.company_repository = CompanyRepository(db_client)
+        self.sale_repository = SaleRepository(db_client)
+        self.archive_repository = SaleArchiveRepository(db_client)
+        self.client_repository = ClientRepository(db_client)
+
+    async def rebuild_company(self, company_id) -> int:
+        """
+        Returns:
+            int: Number of clients updated.
+        """
+        sales = await self.sale_repository.find_company_sales(company_id)
+        for month in await self.archive_repository.find_summaries(company_id):
+            sales.extend(await self.archive_repository.load_sales(company_id, month["month"]))
+
+        company = await self.company_repository.find_by_id(company_id, "clients_overview")
+        updated = await self.client_repository.set_spend_aggregates(company_id, client_spend_from_sales(sales))
+        await self.company_repository.set_fields(
+            company_id, {"clientSpendBackfilledAt": datetime.utcnow()}, bump_version=False
+        )
+        # The first backfill switches the clients overview to the aggregates;
+        # later rebuilds rewrite what the live writes already kept up to date
+        if company and not company.get("clientSpendBackfilledAt"):
+            await self.company_repository.touch(company_id)
+        return updated
+
+    async def rebuild_all_companies(self) -> dict:
+        companies = 0
+        clients = 0
+        errors = 0
+
+        async for company in self.company_repository.iter_companies():
+            try:
+                clients += await self.rebuild_company(company["_id"])
+                companies += 1
+            except Exception as e:
+                # Do not fail the whole batch; log and continue
+                logger.error(f"Client spend rebuild failed for company {company['_id']}: {e}")
+                errors += 1
+
+        return {"companies": companies, "clients": clients, "errors": errors}
+
+
+async def _main(company_ids) -> None:
+    from ...infra.database import mongo
+
+    service = ClientSpendService(mongo.db)
+    if not company_ids:
+        print(await service.rebuild_all_companies())
+        return
+
+    for company_id in company_ids:
+        updated = await service.rebuild_company(company_id)
+        print(f"Company {company_id}: {updated} clients updated")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the per-client spend aggregates.")
+    parser.add_argument("company_ids", nargs="*", help="Companies to rebuild (default: all)")
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.company_ids))
@@ -1,6 +1,6 @@
-from datetime import datetime
-from bson import ObjectId
 from fastapi import HTTPException
+from ...repositories.product_repository import ProductRepository
+from ...repositories.company_repository import CompanyRepository
 
 class InventoryCountService:
     """
@@ -13,32 +13,27 @@ class InventoryCountService:
     def __init__(self, db_client):
         # db_client: AsyncIOMotorClient (already connected)
         self.db = db_client
-        self.company_collection = self.db.get_collection("company")
+        self.company_repository = CompanyRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
 
     async def recalc_total_products(self, company_id: str) -> dict:
         """
         Recalculate the number of products for a single company and persist it in inventoryStats.totalProducts.
 
         - Finds the company by _id
-        - Counts `len(inventory)` safely
+        - Counts the company's products through the (companyId, name) index
         - Sets inventoryStats.totalProducts
         - Updates updatedAt for traceability
         """
-        company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+        company = await self.company_repository.find_by_id(company_id)
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
 
-        inventory = company.get("inventory", [])
-        total_products = int(len(inventory))
+        total_products = await self.product_repository.count_company_products(company_id)
 
-        await self.company_collection.update_one(
-            {"_id": ObjectId(company_id)},
-            {
-                "$set": {
-                    "inventoryStats.totalProducts": total_products,
-                    "updatedAt": datetime.utcnow()
-                }
-            }
+        await self.company_repository.set_fields(
+            company_id,
+            {"inventoryStats.totalProducts": total_products}
         )
 
         return {
@@ -59,21 +54,14 @@ class InventoryCountService:
         errors = 0
 
         # Using an async cursor to iterate over all companies
-        cursor = self.company_collection.find({}, {"_id": 1, "inventory": 1})
-        async for company in cursor:
+        async for company in self.company_repository.iter_companies():
             try:
                 company_id = str(company["_id"])
-                inventory = company.get("inventory", [])
-                total_products = int(len(inventory))
+                total_products = await self.product_repository.count_company_products(company_id)
 
-                await self.company_collection.update_one(
-                    {"_id": company["_id"]},
-                    {
-                        "$set": {
-                            "inventoryStats.totalProducts": total_products,
-                            "updatedAt": datetime.utcnow()
-                        }
-                    }
+                await self.company_repository.set_fields(
+                    company_id,
+                    {"inventoryStats.totalProducts": total_products}
                 )
                 updated += 1
             except Exception:
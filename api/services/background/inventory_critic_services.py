@@ -1,6 +1,5 @@
-from datetime import datetime
-from bson import ObjectId
-from fastapi import HTTPException
+from ...repositories.product_repository import ProductRepository
+from ...repositories.company_repository import CompanyRepository
 
 class InventoryCriticService:
     """
@@ -9,30 +8,21 @@ class InventoryCriticService:
 
     def __init__(self, db_client):
         self.db = db_client
-        self.company_collection = self.db.get_collection("company")
+        self.company_repository = CompanyRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
 
     async def recalc_all_companies_critic_inventory(self):
 
-        companies = self.company_collection.find({})
-
-        async for company in companies:
-            inventory = company.get("inventory", [])
-
-            critical_inventory = len([
-                p for p in inventory
-                # if p.get("quantity", 0) <= p.get("minQuantity", 0) * 0.3
-                if p.get("quantity", 0) <= p.get("minQuantity", 0)
-            ])
+        async for company in self.company_repository.iter_companies():
+            critical_inventory = await self.product_repository.count_company_products(
+                company["_id"],
+                # {"$expr": {"$lte": ["$quantity", {"$multiply": ["$minQuantity", 0.3]}]}}
+                {"$expr": {"$lte": [{"$ifNull": ["$quantity", 0]}, {"$ifNull": ["$minQuantity", 0]}]}}
+            )
             
-            await self.company_collection.update_one(
-                {"_id": company["_id"]},
-                {
-                    "$set": {
-                        "inventoryStats.criticalInventory": critical_inventory,
-                        "updatedAt": datetime.utcnow()
-                    }
-                }
-                    
+            await self.company_repository.set_fields(
+                company["_id"],
+                {"inventoryStats.criticalInventory": critical_inventory}
             )
 
             
@@ -1,6 +1,5 @@
-from bson import ObjectId
-from datetime import datetime
-from fastapi import HTTPException
+from ...repositories.product_repository import ProductRepository
+from ...repositories.company_repository import CompanyRepository
 
 class InventoryLowService:
     """
@@ -10,36 +9,33 @@ class InventoryLowService:
 
     def __init__(self, db_client):
         self.db = db_client
-        self.company_collection = self.db.get_collection("company")
+        self.company_repository = CompanyRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
 
     async def recalc_all_companies_low_inventory(self):
         """
         Recalculates low-inventory product counts for all companies.
         """
-        companies = self.company_collection.find({})
         updated = 0
         errors = 0
 
-        async for company in companies:
+        async for company in self.company_repository.iter_companies():
             try:
-                inventory = company.get("inventory", [])
-                
-                low_count = 0
-                for product in inventory:
-                    qty = product.get("quantity", 0)
-                    min_qty = product.get("minQuantity", 0)
-
-                    if qty > min_qty and qty <= (min_qty + 10):
-                        low_count += 1
-
-                await self.company_collection.update_one(
-                    {"_id": company["_id"]},
-                    {
-                        "$set": {
-                            "inventoryStats.lowInventory": low_count,
-                            "updatedAt": datetime.utcnow()
-                        }
-                    }
+                qty = {"$ifNull": ["$quantity", 0]}
+                min_qty = {"$ifNull": ["$minQuantity", 0]}
+
+                # min_qty < qty <= min_qty + 10
+                low_count = await self.product_repository.count_company_products(
+                    company["_id"],
+                    {"$expr": {"$and": [
+                        {"$gt": [qty, min_qty]},
+                        {"$lte": [qty, {"$add": [min_qty, 10]}]},
+                    ]}}
+                )
+
+                await self.company_repository.set_fields(
+                    company["_id"],
+                    {"inventoryStats.lowInventory": low_count}
                 )
                 updated += 1
 
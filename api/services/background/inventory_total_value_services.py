@@ -1,6 +1,5 @@
-from datetime import datetime
-from fastapi import HTTPException
-from bson import ObjectId
+from ...repositories.product_repository import ProductRepository
+from ...repositories.company_repository import CompanyRepository
 
 class InventoryTotalValueService:
     """
@@ -10,33 +9,20 @@ class InventoryTotalValueService:
 
     def __init__(self, db_client):
         self.db = db_client
-        self.company_collection = self.db.get_collection("company")
+        self.company_repository = CompanyRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
 
     async def update_total_inventory_value_for_all_companies(self):
         """
         Iterates through all companies and updates inventoryStats.totalValue.
         totalValue = Σ (quantity * costPrice)
         """
-        companies = self.company_collection.find({}, {"inventory": 1})
-
-        async for company in companies:
+        async for company in self.company_repository.iter_companies():
             company_id = company["_id"]
-            inventory = company.get("inventory", [])
 
-            # Calculate total cost value of stock
-            total_value = sum(
-                float(p.get("quantity", 0)) * float(p.get("costPrice", 0))
-                for p in inventory
-            )
+            # Calculate total cost value of stock (summed by MongoDB)
+            total_value = await self.product_repository.total_stock_cost(company_id)
 
             value = float(round(total_value, 2))
 
-            await self.company_collection.update_one(
-                {"_id": ObjectId(company_id)},
-                {
-                    "$set": {
-                        "inventoryStats.totalValue": value,
-                        "updatedAt": datetime.utcnow()
-                    }
-                }
-            )
+            await self.company_repository.set_fields(company_id, {"inventoryStats.totalValue": value})
@@ -0,0 +1,391 @@
+"""
+Columnar export of each company's data for offline analysis.
+
+Writes zstd-compressed Parquet files under PARQUET_EXPORT_DIR/<companyId>/:
+
+    sales/part-00000.parquet         one row per sale
+    sale_items/part-00000.parquet    one row per sale item (flattened)
+    clients.parquet                  current clients (rewritten on every export)
+    inventory.parquet                current products (rewritten on every export)
+    _export.json                     watermark of the last export
+
+Exports are incremental: each run appends one part holding the sales dated in
+[watermark, now - PARQUET_EXPORT_LAG_SECONDS) and then moves the watermark. The
+lag leaves room for sales being written while the export runs. The first
+export of a company also includes its archived months. Each part directory
+reads as one table (e.g. `pandas.read_parquet(".../sales")`).
+
+    python -m api.services.background.parquet_export_services                 # every company
+    python -m api.services.background.parquet_export_services <id> ...        # some companies
+    python -m api.services.background.parquet_export_services --full <id>     # start over
+
+Requires pyarrow (optional dependency).
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+import shutil
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pq = None
+
+from ...repositories.sale_repository import SaleRepository
+from ...repositories.sale_archive_repository import SaleArchiveRepository
+from ...repositories.product_repository import ProductRepository
+from ...repositories.client_repository import ClientRepository
+from ...repositories.company_repository import CompanyRepository
+from ...utils.sales_metrics import _parse_date_safe
+
+
+logger = logging.getLogger(__name__)
+
+PARQUET_EXPORT_ENABLED = os.getenv("PARQUET_EXPORT_ENABLED", "false").lower() in ("1", "true", "yes")
+PARQUET_EXPORT_DIR = os.getenv("PARQUET_EXPORT_DIR", "exports")
+# Sales per cursor batch and per Parquet row group
+PARQUET_EXPORT_BATCH_SIZE = int(os.getenv("PARQUET_EXPORT_BATCH_SIZE", 5000))
+PARQUET_EXPORT_LAG_SECONDS = int(os.getenv("PARQUET_EXPORT_LAG_SECONDS", 60))
+PARQUET_COMPRESSION = "zstd"
+
+PYARROW_AVAILABLE = pa is not None
+
+_MANIFEST = "_export.json"
+
+# Columns of each file: (name, type)
+SALES_COLUMNS = (
+    ("saleId", "string"), ("date", "timestamp"), ("clientId", "string"), ("clientName", "string"),
+    ("total", "float"), ("items", "int"), ("units", "int"),
+)
+SALE_ITEMS_COLUMNS = (
+    ("saleId", "string"), ("date", "timestamp"), ("clientId", "string"), ("productId", "string"),
+    ("productName", "string"), ("category", "string"), ("quantity", "int"), ("price", "float"),
+    ("revenue", "float"),
+)
+CLIENTS_COLUMNS = (
+    ("clientId", "string"), ("name", "string"), ("email", "string"), ("phone", "string"),
+    ("city", "string"), ("category", "string"), ("createdAt", "timestamp"), ("totalSpent", "float"),
+    ("purchaseCount", "int"), ("lastPurchaseAt", "timestamp"),
+)
+INVENTORY_COLUMNS = (
+    ("productId", "string"), ("name", "string"), ("category", "string"), ("price", "float"),
+    ("costPrice", "float"), ("quantity", "int"), ("minQuantity", "int"), ("createdAt", "timestamp"),
+    ("unitsSold", "int"), ("revenue", "float"), ("lastSoldAt", "timestamp"),
+)
+
+
+def _as_string(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _as_float(value) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return None if value is None else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_timestamp(value) -> Optional[datetime]:
+    if value is None:
+        return None
+    try:
+        return _parse_date_safe(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_CONVERTERS = {"string": _as_string, "float": _as_float, "int": _as_int, "timestamp": _as_timestamp}
+
+
+def _arrow_schema(columns: Tuple[Tuple[str, str], ...]):
+    types = {"string": pa.string(), "float": pa.float64(), "int": pa.int64(), "timestamp": pa.timestamp("us")}
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+class _ParquetPart:
+    """
+    One Parquet file written row group by row group: rows are buffered as
+    columns and flushed every PARQUET_EXPORT_BATCH_SIZE rows. The file is
+    written under a temporary name and only moved into place by `commit`.
+    """
+
+    def __init__(self, path: str, columns: Tuple[Tuple[str, str], ...]):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.columns = columns
+        self.schema = _arrow_schema(columns)
+        self.buffer: Dict[str, list] = {name: [] for name, _ in columns}
+        self.rows = 0
+        self._writer = None
+
+    def add(self, row: Dict[str, Any]) -> None:
+        for name, kind in self.columns:
+            self.buffer[name].append(_CONVERTERS[kind](row.get(name)))
+        self.rows += 1
+        if len(self.buffer[self.columns[0][0]]) >= PARQUET_EXPORT_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buffer[self.columns[0][0]]:
+            return
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._writer = pq.ParquetWriter(self.tmp_path, self.schema, compression=PARQUET_COMPRESSION)
+        self._writer.write_table(pa.Table.from_pydict(self.buffer, schema=self.schema))
+        self.buffer = {name: [] for name, _ in self.columns}
+
+    def commit(self) -> None:
+        """Finish the file and move it into place (no file when no rows were added)."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self.tmp_path, self.path)
+
+    def discard(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            os.remove(self.tmp_path)
+
+
+class ParquetExportService:
+    """
+    Exports a company's sales, sale items, clients and inventory to Parquet
+    (see the module docstring for the file layout).
+    """
+
+    def __init__(self, db_client, export_dir: str = PARQUET_EXPORT_DIR):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("The Parquet export requires pyarrow (pip install pyarrow)")
+
+        self.db = db_client
+        self.export_dir = export_dir
+        self.company_repository = CompanyRepository(db_client)
+        self.sale_repository = SaleRepository(db_client)
+        self.archive_repository = SaleArchiveRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
+        self.client_repository = ClientRepository(db_client)
+
+    async def export_company(self, company_id, full: bool = False) -> dict:
+        """
+        Append the company's sales since its last export and rewrite its
+        clients and inventory.
+
+        Args:
+            full: Discard the previous parts and export every sale again.
+
+        Returns:
+            dict: {"sales", "items", "watermark"} of this run.
+        """
+        company_dir = os.path.join(self.export_dir, str(company_id))
+        if full:
+            for name in ("sales", "sale_items", _MANIFEST):
+                path = os.path.join(company_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+
+        manifest = self._read_manifest(company_dir)
+        watermark = datetime.fromisoformat(manifest["watermark"]) if manifest.get("watermark") else None
+        cutoff = datetime.utcnow() - timedelta(seconds=PARQUET_EXPORT_LAG_SECONDS)
+
+        products = await self.product_repository.list_company_products(company_id, "names_categories")
+        clients = await self.client_repository.list_company_clients(company_id, "names")
+        product_names = {str(p["_id"]): (p.get("name"), p.get("category") or "Unknown") for p in products}
+        client_names = {str(c["_id"]): c.get("name") for c in clients}
+
+        # Re-running after a failure rewrites the same part number
+        part_name = f"part-{manifest.get('parts', 0):05d}.parquet"
+        sales_part = _ParquetPart(os.path.join(company_dir, "sales", part_name), SALES_COLUMNS)
+        items_part = _ParquetPart(os.path.join(company_dir, "sale_items", part_name), SALE_ITEMS_COLUMNS)
+        try:
+            async for sale in self._iter_sales(company_id, watermark, cutoff):
+                self._add_sale(sale, sales_part, items_part, client_names, product_names)
+            sales_part.commit()
+            items_part.commit()
+        except Exception:
+            sales_part.discard()
+            items_part.discard()
+            raise
+
+        await self._write_table(
+            os.path.join(company_dir, "clients.parquet"),
+            CLIENTS_COLUMNS,
+            self._client_rows(company_id),
+        )
+        await self._write_table(
+            os.path.join(company_dir, "inventory.parquet"),
+            INVENTORY_COLUMNS,
+            self._product_rows(company_id),
+        )
+
+        # Last: the watermark only moves once the part is in place
+        self._write_manifest(company_dir, {
+            "watermark": cutoff.isoformat(),
+            "parts": manifest.get("parts", 0) + (1 if sales_part.rows else 0),
+            "sales": manifest.get("sales", 0) + sales_part.rows,
+            "exportedAt": datetime.utcnow().isoformat(),
+        })
+        return {"sales": sales_part.rows, "items": items_part.rows, "watermark": cutoff.isoformat()}
+
+    async def export_all_companies(self, full: bool = False) -> dict:
+        companies = 0
+        sales = 0
+        errors = 0
+
+        async for company in self.company_repository.iter_companies():
+            try:
+                sales += (await self.export_company(company["_id"], full))["sales"]
+                companies += 1
+            except Exception as e:
+                # Do not fail the whole batch; log and continue
+                logger.error(f"Parquet export failed for company {company['_id']}: {e}")
+                errors += 1
+
+        return {"companies": companies, "sales": sales, "errors": errors}
+
+    async def _iter_sales(self, company_id, watermark: Optional[datetime], cutoff: datetime) -> AsyncIterator[Dict[str, Any]]:
+        """Sales dated in [watermark, cutoff); the first export starts with the archived months."""
+        if watermark is None:
+            for month in await self.archive_repository.find_summaries(company_id):
+                if month["month"] >= cutoff:
+                    break
+                for sale in await self.archive_repository.load_sales(company_id, month["month"]):
+                    if sale.get("date") < cutoff:
+                        yield sale
+
+        async for sale in self.sale_repository.iter_company_sales(
+            company_id, watermark, cutoff, batch_size=PARQUET_EXPORT_BATCH_SIZE
+        ):
+            yield sale
+
+    @staticmethod
+    def _add_sale(
+        sale: Dict[str, Any],
+        sales_part: _ParquetPart,
+        items_part: _ParquetPart,
+        client_names: Dict[str, Optional[str]],
+        product_names: Dict[str, Tuple[Optional[str], str]],
+    ) -> None:
+        sale_id = sale.get("_id")
+        client_id = sale.get("clientId")
+        items = sale.get("items") or []
+
+        sales_part.add({
+            "saleId": sale_id,
+            "date": sale.get("date"),
+            "clientId": client_id,
+            "clientName": client_names.get(str(client_id)),
+            "total": sale.get("total"),
+            "items": len(items),
+            "units": sum(_as_int(item.get("quantity")) or 0 for item in items),
+        })
+
+        for item in items:
+            product_id = item.get("productId")
+            name, category = product_names.get(str(product_id), (None, "Unknown"))
+            quantity = _as_int(item.get("quantity")) or 0
+            price = _as_float(item.get("price")) or 0.0
+            items_part.add({
+                "saleId": sale_id,
+                "date": sale.get("date"),
+                "clientId": client_id,
+                "productId": product_id,
+                "productName": name or item.get("productName"),
+                "category": category,
+                "quantity": quantity,
+                "price": price,
+                "revenue": price * quantity,
+            })
+
+    async def _client_rows(self, company_id) -> AsyncIterator[Dict[str, Any]]:
+        async for client in self.client_repository.iter_company_clients(
+            company_id, "export", batch_size=PARQUET_EXPORT_BATCH_SIZE
+        ):
+            yield {
+                "clientId": client["_id"],
+                "name": client.get("name"),
+                "email": client.get("email"),
+                "phone": client.get("phone"),
+                "city": client.get("city") or client.get("address"),
+                "category": client.get("category"),
+                "createdAt": client.get("createdAt") or client.get("created_at"),
+                "totalSpent": client.get("totalSpent"),
+                "purchaseCount": client.get("purchaseCount"),
+                "lastPurchaseAt": client.get("lastPurchaseAt"),
+            }
+
+    async def _product_rows(self, company_id) -> AsyncIterator[Dict[str, Any]]:
+        async for product in self.product_repository.iter_company_products(
+            company_id, "export", batch_size=PARQUET_EXPORT_BATCH_SIZE
+        ):
+            yield {"productId": product["_id"], **{name: product.get(name) for name, _ in INVENTORY_COLUMNS[1:]}}
+
+    @staticmethod
+    async def _write_table(path: str, columns: Tuple[Tuple[str, str], ...], rows: AsyncIterator[Dict[str, Any]]) -> None:
+        """Replace the file at `path` with `rows` (an empty table when there are none)."""
+        part = _ParquetPart(path, columns)
+        try:
+            async for row in rows:
+                part.add(row)
+            if not part.rows:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                pq.write_table(part.schema.empty_table(), part.tmp_path, compression=PARQUET_COMPRESSION)
+                os.replace(part.tmp_path, path)
+                return
+            part.commit()
+        except Exception:
+            part.discard()
+            raise
+
+    @staticmethod
+    def _read_manifest(company_dir: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(company_dir, _MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def _write_manifest(company_dir: str, manifest: Dict[str, Any]) -> None:
+        os.makedirs(company_dir, exist_ok=True)
+        path = os.path.join(company_dir, _MANIFEST)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+
+async def _main(company_ids: Iterable[str], export_dir: str, full: bool) -> None:
+    from ...infra.database import mongo
+
+    service = ParquetExportService(mongo.db, export_dir)
+    if not company_ids:
+        print(await service.export_all_companies(full))
+        return
+
+    for company_id in company_ids:
+        result = await service.export_company(company_id, full)
+        print(f"Company {company_id}: {result}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export company sales, clients and inventory to Parquet.")
+    parser.add_argument("company_ids", nargs="*", help="Companies to export (default: all)")
+    parser.add_argument("--dir", default=PARQUET_EXPORT_DIR, help="Export directory")
+    parser.add_argument("--full", action="store_true", help="Discard previous exports and start over")
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.company_ids, args.dir, args.full))
@@ -0,0 +1,86 @@
+"""
+Backfill of the per-product sales counters (unitsSold, revenue, lastSoldAt).
+
+New sales update their products as they are created; existing tenants need a
+one-off rebuild so the best-sellers ranking also covers older sales:
+
+    python -m api.services.background.product_sales_services            # every company
+    python -m api.services.background.product_sales_services <id> ...   # some companies
+
+Run it off-peak: a sale created while its company is being rebuilt may be
+counted twice or missed for its products (re-running the rebuild fixes it).
+"""
+import argparse
+import asyncio
+import logging
+from ...repositories.sale_repository import SaleRepository
+from ...repositories.sale_archive_repository import SaleArchiveRepository
+from ...repositories.product_repository import ProductRepository, product_sales_from_sales
+from ...repositories.company_repository import CompanyRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProductSalesService:
+    """
+    Rebuilds the sales counters of every product of a company from its sales
+    (live and archived).
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.company_repository = CompanyRepository(db_client)
+        self.sale_repository = SaleRepository(db_client)
+        self.archive_repository = SaleArchiveRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
+
+    async def rebuild_company(self, company_id) -> int:
+        """
+        Returns:
+            int: Number of products updated.
+        """
+        sales = await self.sale_repository.find_company_sales(company_id)
+        for month in await self.archive_repository.find_summaries(company_id):
+            sales.extend(await self.archive_repository.load_sales(company_id, month["month"]))
+
+        updated = await self.product_repository.set_sales_counters(company_id, product_sales_from_sales(sales))
+        await self.company_repository.touch(company_id)
+        return updated
+
+    async def rebuild_all_companies(self) -> dict:
+        companies = 0
+        products = 0
+        errors = 0
+
+        async for company in self.company_repository.iter_companies():
+            try:
+                products += await self.rebuild_company(company["_id"])
+                companies += 1
+            except Exception as e:
+                # Do not fail the whole batch; log and continue
+                logger.error(f"Product sales rebuild failed for company {company['_id']}: {e}")
+                errors += 1
+
+        return {"companies": companies, "products": products, "errors": errors}
+
+
+async def _main(company_ids) -> None:
+    from ...infra.database import mongo
+
+    service = ProductSalesService(mongo.db)
+    if not company_ids:
+        print(await service.rebuild_all_companies())
+        return
+
+    for company_id in company_ids:
+        updated = await service.rebuild_company(company_id)
+        print(f"Company {company_id}: {updated} products updated")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the per-product sales counters.")
+    parser.add_argument("company_ids", nargs="*", help="Companies to rebuild (default: all)")
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.company_ids))
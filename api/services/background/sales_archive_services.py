@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+import logging
+import os
+from ...repositories.sale_repository import SaleRepository, month_floor
+from ...repositories.sale_archive_repository import SaleArchiveRepository
+from ...repositories.company_repository import CompanyRepository
+
+
+logger = logging.getLogger(__name__)
+
+# MongoDB rejects documents above 16 MB; act well before that.
+COMPANY_DOC_SIZE_LIMIT_BYTES = int(os.getenv("COMPANY_DOC_SIZE_LIMIT_BYTES", 12 * 1024 * 1024))
+
+# Tenants whose stored sales exceed this size get their cold months archived.
+SALES_ARCHIVE_THRESHOLD_BYTES = int(os.getenv("SALES_ARCHIVE_THRESHOLD_BYTES", 64 * 1024 * 1024))
+
+# Only months entirely older than this are archived. Never less than two months,
+# so the current/last month comparisons always read live sales.
+SALES_ARCHIVE_MIN_AGE_DAYS = max(int(os.getenv("SALES_ARCHIVE_MIN_AGE_DAYS", 400)), 62)
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + 1, 1, 1) if month.month == 12 else datetime(month.year, month.month + 1, 1)
+
+
+class SalesArchiveService:
+    """
+    Keeps each tenant's storage bounded.
+
+    - Company document guard: when a company document approaches the 16 MB limit,
+      the sales still embedded in it are drained into the 'sales' collection
+      right away instead of waiting for the nightly migration.
+    - Cold-sales archiving: when a tenant's stored sales cross
+      SALES_ARCHIVE_THRESHOLD_BYTES, every month older than
+      SALES_ARCHIVE_MIN_AGE_DAYS is moved into 'sales_archive' as a compressed
+      chunk with per-day summaries, which the analytics merge back in.
+
+    Archiving applies to the flat sales layout only.
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.company_repository = CompanyRepository(db_client)
+        self.sale_repository = SaleRepository(db_client)
+        self.archive_repository = SaleArchiveRepository(db_client)
+
+    async def guard_all_companies(self) -> dict:
+        """
+        Run the size guard and the archiver over every company.
+        """
+        drained_sales = 0
+        archived_sales = 0
+        archived_companies = 0
+        errors = 0
+
+        async for company in self.company_repository.iter_companies():
+            try:
+                drained_sales += await self._guard_company_document(company["_id"])
+
+                archived = await self._archive_if_needed(company["_id"])
+                if archived:
+                    archived_sales += archived
+                    archived_companies += 1
+            except Exception as e:
+                # Do not fail the whole batch; log and continue
+                logger.error(f"Size guard failed for company {company['_id']}: {e}")
+                errors += 1
+
+        return {
+            "drainedSales": drained_sales,
+            "archivedCompanies": archived_companies,
+            "archivedSales": archived_sales,
+            "errors": errors
+        }
+
+    async def _guard_company_document(self, company_id) -> int:
+        size = await self.company_repository.document_size(company_id)
+        if size < COMPANY_DOC_SIZE_LIMIT_BYTES:
+            return 0
+
+        logger.warning(
+            f"Company {company_id} document is {size} bytes "
+            f"(limit {COMPANY_DOC_SIZE_LIMIT_BYTES}); draining embedded sales"
+        )
+        return await self.sale_repository.migrate_company_sales(company_id)
+
+    async def _archive_if_needed(self, company_id) -> int:
+        if self.sale_repository.layout != "flat":
+            return 0
+
+        footprint = await self.sale_repository.sales_footprint(company_id)
+        if footprint < SALES_ARCHIVE_THRESHOLD_BYTES:
+            return 0
+
+        # Legacy embedded sales cannot be deleted by _id; move them out first
+        await self.sale_repository.migrate_company_sales(company_id)
+
+        oldest = await self.sale_repository.oldest_sale_date(company_id)
+        if oldest is None:
+            return 0
+
+        cutoff = month_floor(datetime.utcnow() - timedelta(days=SALES_ARCHIVE_MIN_AGE_DAYS))
+        archived = 0
+        month = month_floor(oldest)
+
+        # One month at a time: each chunk is written before its sales are deleted
+        while month < cutoff:
+            next_month = _next_month(month)
+            sales = await self.sale_repository.find_company_sales(company_id, start=month, end=next_month)
+            if sales:
+                await self.archive_repository.archive_month(company_id, month, sales)
+                archived += await self.sale_repository.delete_sales(company_id, [s["_id"] for s in sales])
+            month = next_month
+
+        logger.info(f"Company {company_id}: archived {archived} sales older than {cutoff.date()}")
+        return archived
@@ -0,0 +1,39 @@
+from ...repositories.sale_repository import SaleRepository
+from ...repositories.company_repository import CompanyRepository
+
+
+class SalesMigrationService:
+    """
+    Drains the legacy embedded 'sales' arrays into the dedicated 'sales' collection.
+
+    Companies are migrated one at a time; a failure on one company does not stop
+    the batch and the next run resumes where the previous one left off.
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.company_repository = CompanyRepository(db_client)
+        self.sale_repository = SaleRepository(db_client)
+
+    async def migrate_all_companies(self) -> dict:
+        """
+        Move embedded sales of every company that still has them.
+        """
+        migrated_companies = 0
+        moved_sales = 0
+        errors = 0
+
+        async for company in self.company_repository.iter_companies(query={"sales.0": {"$exists": True}}):
+            try:
+                moved_sales += await self.sale_repository.migrate_company_sales(company["_id"])
+                migrated_companies += 1
+            except Exception:
+                # Do not fail the whole batch; count and continue
+                errors += 1
+                continue
+
+        return {
+            "migratedCompanies": migrated_companies,
+            "movedSales": moved_sales,
+            "errors": errors
+        }
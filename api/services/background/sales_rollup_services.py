@@ -0,0 +1,100 @@
+"""
+Backfill of the 'sales_daily' rollups.
+
+New sales update their day rollup as they are created; existing tenants need a
+one-off backfill before reports can read from the rollups:
+
+    python -m api.services.background.sales_rollup_services            # every company
+    python -m api.services.background.sales_rollup_services <id> ...   # some companies
+
+Run it off-peak: a sale created while its company is being backfilled may be
+counted twice or missed for that day (re-running the backfill fixes it).
+"""
+import argparse
+import asyncio
+from datetime import datetime
+import logging
+from ...repositories.sale_repository import SaleRepository
+from ...repositories.sale_archive_repository import SaleArchiveRepository
+from ...repositories.sales_daily_repository import SalesDailyRepository
+from ...repositories.product_repository import ProductRepository
+from ...repositories.company_repository import CompanyRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+class SalesRollupService:
+    """
+    Rebuilds the daily rollups of a company from its sales (legacy embedded
+    sales are drained first) and its archived months, then marks the company
+    with 'salesDailyBackfilledAt' so reports start reading the rollups.
+    """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self.company_repository = CompanyRepository(db_client)
+        self.sale_repository = SaleRepository(db_client)
+        self.archive_repository = SaleArchiveRepository(db_client)
+        self.daily_repository = SalesDailyRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
+
+    async def backfill_company(self, company_id) -> int:
+        """
+        Returns:
+            int: Number of day rollups written.
+        """
+        await self.sale_repository.migrate_company_sales(company_id)
+
+        sales = await self.sale_repository.find_company_sales(company_id)
+        archived = await self.archive_repository.find_summaries(company_id)
+        products = await self.product_repository.list_company_products(company_id, "categories")
+        categories = {p["_id"]: p.get("category", "Unknown") for p in products}
+
+        company = await self.company_repository.find_by_id(company_id, "sales_rollups")
+        written = await self.daily_repository.rebuild(company_id, sales, categories, archived)
+        await self.company_repository.set_fields(
+            company_id, {"salesDailyBackfilledAt": datetime.utcnow()}, bump_version=False
+        )
+        # The first backfill switches reports to the rollups; later rebuilds
+        # rewrite the figures the live writes already kept up to date
+        if company and not company.get("salesDailyBackfilledAt"):
+            await self.company_repository.touch(company_id)
+        return written
+
+    async def backfill_all_companies(self) -> dict:
+        companies = 0
+        days = 0
+        errors = 0
+
+        async for company in self.company_repository.iter_companies():
+            try:
+                days += await self.backfill_company(company["_id"])
+                companies += 1
+            except Exception as e:
+                # Do not fail the whole batch; log and continue
+                logger.error(f"Rollup backfill failed for company {company['_id']}: {e}")
+                errors += 1
+
+        return {"companies": companies, "days": days, "errors": errors}
+
+
+async def _main(company_ids) -> None:
+    from ...infra.database import mongo
+
+    service = SalesRollupService(mongo.db)
+    if not company_ids:
+        print(await service.backfill_all_companies())
+        return
+
+    for company_id in company_ids:
+        written = await service.backfill_company(company_id)
+        print(f"Company {company_id}: {written} day rollups written")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the sales_daily rollups.")
+    parser.add_argument("company_ids", nargs="*", help="Companies to backfill (default: all)")
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.company_ids))
@@ -2,6 +2,9 @@ from datetime import datetime, timedelta
 import math
 import os
 from ...infra.database import mongo  # Adjust import path if needed
+from ...repositories.sale_repository import SaleRepository
+from ...repositories.client_repository import ClientRepository
+from ...repositories.company_repository import CompanyRepository
 
 
 # --------------------------------------------------------------------
@@ -34,8 +37,10 @@ class SatisfactionService:
     """
 
     def __init__(self):
-        # Access the MongoDB 'company' collection
-        self.company_col = mongo.get_collection("company")
+        # Access the company documents through the repository
+        self.company_repository = CompanyRepository(mongo)
+        self.sale_repository = SaleRepository(mongo)
+        self.client_repository = ClientRepository(mongo)
 
     async def update_all_companies_satisfaction(self) -> None:
         """
@@ -45,27 +50,26 @@ class SatisfactionService:
         The operation does NOT create or use any 'metrics' subdocument.
         """
         # Select only necessary fields for calculation
-        cursor = self.company_col.find({}, {"_id": 1, "sales": 1, "clients": 1})
+        async for company in self.company_repository.iter_companies():
+            # Load only the analysis window through the (companyId, date) index
+            cutoff = datetime.utcnow() - timedelta(days=WINDOW_DAYS)
+            sales = await self.sale_repository.find_company_sales(company["_id"], start=cutoff)
+
+            clients = await self.client_repository.list_company_clients(company["_id"], "ids")
 
-        async for company in cursor:
             # Compute the new satisfaction value
-            value = self._compute_company_satisfaction(company)
+            value = self._compute_company_satisfaction(clients, sales)
 
             # Persist the result directly in the root document
-            await self.company_col.update_one(
-                {"_id": company["_id"]},
-                {
-                    "$set": {
-                        "average_satisfaction": round(value, 2),  # e.g., 4.37
-                        "updatedAt": datetime.utcnow()
-                    }
-                }
+            await self.company_repository.set_fields(
+                company["_id"],
+                {"average_satisfaction": round(value, 2)}  # e.g., 4.37
             )
 
             # Optional debug log
             # print(f"[SatisfactionService] Updated {company.get('name')} → {round(value, 2)}")
 
-    def _compute_company_satisfaction(self, company: dict) -> float:
+    def _compute_company_satisfaction(self, clients: list, sales: list) -> float:
         """
         Compute a company's satisfaction score (0.0–5.0) using client recurrence and recency.
 
@@ -82,8 +86,8 @@ class SatisfactionService:
         """
         now = datetime.utcnow()
         cutoff = now - timedelta(days=WINDOW_DAYS)
-        sales = company.get("sales", []) or []
-        clients = company.get("clients", []) or []
+        sales = sales or []
+        clients = clients or []
 
         # Get all valid client IDs
         client_ids = {str(c.get("_id")) for c in clients if c.get("_id")}
@@ -1,83 +1,84 @@
 from bson import ObjectId
 from datetime import datetime
 from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
 from ..schemas.client_schemas import ClientCreate, ClientInDB
 from ..utils.helper_functions import serialize_mongo  # ou conforme o caminho certo
+from ..utils.response_cache import cached_company_response
+from ..repositories.sale_repository import SaleRepository
+from ..repositories.client_repository import ClientRepository, client_spend_from_sales
+from ..repositories.company_repository import CompanyRepository
+
+
+def new_client_document(client_data: ClientCreate) -> dict:
+    """Build the document of a new client (shared by every path that creates clients)."""
+    return {
+        "_id": ObjectId(),  
+        "name": client_data.name,
+        "email": client_data.email or "",
+        "phone": client_data.phone or "",
+        # "address": getattr(client_data, "address", ""),
+        "address": client_data.city or "",
+        "createdAt": datetime.utcnow()
+    }
 
 
 class ClientService:
     """
-    Handles all client-related operations inside the company's subdocument array.
+    Handles all client-related operations on the company's clients collection.
     """
 
     def __init__(self, db_client):
         self.db = db_client
-        self.company_collection = self.db.get_collection("company")
+        self.company_repository = CompanyRepository(db_client)
+        self.sale_repository = SaleRepository(db_client)
+        self.client_repository = ClientRepository(db_client)
 
     async def get_client_by_name(self, company_id: str, client_name: str):
         """
-        Searches for a client by name inside a specific company's embedded 'clients' array.
+        Searches for a client by name inside a specific company,
+        through the (companyId, name) index.
         """
-        company = await self.company_collection.find_one(
-            {
-                "_id": ObjectId(company_id),
-                "clients.name": client_name
-            },
-            {"clients.$": 1}
-        )
+        return await self.client_repository.find_by_name(company_id, client_name)
 
-        # Return the single matched client (if found)
-        if company and "clients" in company and len(company["clients"]) > 0:
-            return company["clients"][0]
-        return None
     async def get_client_by_email(self, company_id: str, client_email: str):
         """
-        Searches for a client by email inside a specific company's embedded 'clients' array.
+        Searches for a client by email inside a specific company,
+        through the (companyId, email) index.
         Returns the client if found.
         """
         if not client_email:
             return None  # Email might be optional in some cases
 
-        company = await self.company_collection.find_one(
-            {
-                "_id": ObjectId(company_id),
-                "clients.email": client_email
-            },
-            {"clients.$": 1}
-        )
-
-        if company and "clients" in company and len(company["clients"]) > 0:
-            return company["clients"][0]
-        return None
+        return await self.client_repository.find_by_email(company_id, client_email)
     
     async def create_client(self, company_id: str, client_data: ClientCreate) -> ClientInDB:
         """
-        Adds a new client inside the specified company's embedded 'clients' array.
+        Adds a new client to the specified company.
         Returns the created client document.
+
+        Raises:
+            HTTPException(404): If the company does not exist.
+            HTTPException(409): If the company already has a client with this name.
         """
-        new_client = {
-            "_id": ObjectId(),  
-            "name": client_data.name,
-            "email": client_data.email or "",
-            "phone": client_data.phone or "",
-            # "address": getattr(client_data, "address", ""),
-            "address": client_data.city or "",
-            "createdAt": datetime.utcnow()
-        }
+        company = await self.company_repository.find_by_id(company_id)
+        if not company:
+            raise HTTPException(status_code=404, detail="Company not found")
 
-        result = await self.company_collection.update_one(
-            {"_id": ObjectId(company_id)},
-            {
-                "$push": {"clients": new_client},
-                "$set": {"updatedAt": datetime.utcnow()}
-            }
-        )
+        new_client = new_client_document(client_data)
 
-        if result.modified_count == 0:
-            raise HTTPException(status_code=500, detail="Failed to add client to company.")
-                                  
+        try:
+            await self.client_repository.insert_client(company_id, new_client)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A client named '{client_data.name}' already exists in this company."
+            )
+
+        await self.company_repository.touch(company_id)
         return ClientInDB(**new_client)
     
+    @cached_company_response("clients_overview_full")
     async def get_clients_overview_full(self, company_id: str):
         """
         Retrieves an overview of all clients for a given company, including:
@@ -90,14 +91,22 @@ class ClientService:
         - Name, email, phone, address, category
         - Total spent
         - Last purchase
+
+        Total spent and last purchase come from the spend aggregates kept on each
+        client once the company is backfilled (see client_spend_services); before
+        that they are computed in a single pass over the company's sales.
         """
         # Find the company document by ID
-        company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+        company = await self.company_repository.find_by_id(company_id, "clients_overview")
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
 
         # Extract data
-        clients = company.get("clients", [])
+        clients = await self.client_repository.list_company_clients(company_id)
+        spend_by_client = None
+        if not company.get("clientSpendBackfilledAt"):
+            sales = await self.sale_repository.find_company_sales(company_id)
+            spend_by_client = client_spend_from_sales(sales)
         avg_satisfaction = company.get("average_satisfaction", 0)
 
         # Overview metrics
@@ -118,9 +127,8 @@ class ClientService:
         cleaned_clients = []
         for c in clients:
             client_id = c.get("_id")
-            # Get total spent and last purchase using new methods
-            total_spent = await self.get_client_total_spent(company, client_id)
-            last_purchase = await self.get_client_last_purchase(company, client_id)
+            spend = c if spend_by_client is None else spend_by_client.get(client_id, {})
+            last_purchase_at = spend.get("lastPurchaseAt")
 
             cleaned_clients.append({
                 "id": str(client_id),
@@ -130,8 +138,8 @@ class ClientService:
                 # o certo é address
                 "address": c.get("address"),
                 "category": c.get("category", "regular"),
-                "totalSpent": total_spent,
-                "lastPurchase": last_purchase["date"] if last_purchase else None,
+                "totalSpent": round(float(spend.get("totalSpent") or 0), 2),
+                "lastPurchase": last_purchase_at.strftime("%Y-%m-%d") if isinstance(last_purchase_at, datetime) else None,
             })
 
         # Return structured response
@@ -149,12 +157,12 @@ class ClientService:
         Returns a list of strings with client names only.
         """
         # Find the company
-        company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+        company = await self.company_repository.find_by_id(company_id)
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
 
         # Extract client names
-        clients = company.get("clients", [])
+        clients = await self.client_repository.list_company_clients(company_id, "names")
         client_names = [c.get("name") for c in clients if "name" in c]
 
         return {
@@ -162,51 +170,9 @@ class ClientService:
             "clients": client_names
         }
     
-    async def get_client_last_purchase(self, company: dict, client_id: ObjectId):
-        """
-        Returns the last (most recent) purchase made by the given client
-        within the company's embedded 'sales' array.
-
-        Returns:
-        {
-            "date": "YYYY-MM-DD",
-            "total": float
-        }
-        or None if no sales found.
-        """
-        sales = company.get("sales", [])
-        # Filter only this client's sales
-        client_sales = [s for s in sales if s.get("clientId") == client_id]
-
-        if not client_sales:
-            return None
-
-        # Find the latest sale by date
-        last_sale = max(client_sales, key=lambda s: s.get("date", datetime.min))
-
-        last_date = last_sale.get("date")
-        formatted_date = None
-        if isinstance(last_date, datetime):
-            # Keep only the date portion (YYYY-MM-DD)
-            formatted_date = last_date.strftime("%Y-%m-%d")
-
-        return {
-            "date": formatted_date,
-            "total": round(float(last_sale.get("total", 0)), 2)
-        }
-    
-    async def get_client_total_spent(self, company: dict, client_id: ObjectId) -> float:
-        """
-        Calculates the total amount of money spent by a specific client
-        across all their sales within the given company.
-        """
-        sales = company.get("sales", [])
-        total = sum(float(s.get("total", 0)) for s in sales if s.get("clientId") == client_id)
-        return round(total, 2)
-
     async def update_client(self, company_id: str, client_id: str, body) -> None:
         """
-        Update a client inside the company's embedded 'clients' array.
+        Update a client of the company.
         The update is based on company_id and client_id and the fields provided in body.
         IMPORTANT: category must not be changed/updated here.
         """
@@ -219,64 +185,45 @@ class ClientService:
         # Prepare set operations for provided fields (ignore None)
         set_ops = {}
         if getattr(body, "name", None) is not None:
-            set_ops["clients.$[elem].name"] = body.name
+            set_ops["name"] = body.name
         if getattr(body, "email", None) is not None:
-            set_ops["clients.$[elem].email"] = body.email
+            set_ops["email"] = body.email
         if getattr(body, "phone", None) is not None:
-            set_ops["clients.$[elem].phone"] = body.phone
+            set_ops["phone"] = body.phone
         if getattr(body, "address", None) is not None:
-            set_ops["clients.$[elem].address"] = body.address
-
-        # Always update company's updatedAt
-        set_ops["updatedAt"] = datetime.utcnow()
+            set_ops["address"] = body.address
 
-        # If no client-updatable fields provided, still touch updatedAt in company
-        if len(set_ops) == 1 and "updatedAt" in set_ops:
-            result = await self.company_collection.update_one(
-                {"_id": ObjectId(company_id), "clients._id": ObjectId(client_id)},
-                {"$set": {"updatedAt": set_ops["updatedAt"]}}
+        # If no client-updatable fields are provided, only the client's updatedAt is touched
+        try:
+            updated = await self.client_repository.update_client(company_id, ObjectId(client_id), set_ops)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A client with the same name already exists in this company."
             )
-            if result.modified_count == 0:
-                raise HTTPException(status_code=500, detail="Failed to update client.")
-            return
-
-        # Perform array update with arrayFilters to target the specific client
-        result = await self.company_collection.update_one(
-            {"_id": ObjectId(company_id)},
-            {"$set": set_ops},
-            array_filters=[{"elem._id": ObjectId(client_id)}]
-        )
 
-        if result.modified_count == 0:
+        if not updated:
             raise HTTPException(status_code=500, detail="Failed to update client.")
 
+        await self.company_repository.touch(company_id)
+
     async def get_client_by_id(self, company_id: str, client_id: str):
         """
-        Searches for a client by ID inside a specific company's embedded 'clients' array.
+        Searches for a client by ID inside a specific company.
         Returns the client if found, None otherwise.
         """
         try:
             # Validate if client_id is a valid ObjectId
             if not ObjectId.is_valid(client_id):
                 return None
-                
-            company = await self.company_collection.find_one(
-                {
-                    "_id": ObjectId(company_id),
-                    "clients._id": ObjectId(client_id)
-                },
-                {"clients.$": 1}
-            )
 
-            if company and "clients" in company and len(company["clients"]) > 0:
-                return company["clients"][0]
-            return None
+            return await self.client_repository.find_by_id(company_id, ObjectId(client_id))
         except Exception:
             return None
     
     async def delete_client(self, company_id: str, client_id: str) -> None:
         """
-        Deletes a client from the company's embedded 'clients' array.
+        Deletes a client from the company.
         Raises HTTPException on failure.
         """
         # Validate ObjectIds
@@ -285,13 +232,9 @@ class ClientService:
         if not ObjectId.is_valid(company_id):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid company_id format.")
 
-        result = await self.company_collection.update_one(
-            {"_id": ObjectId(company_id), "clients._id": ObjectId(client_id)},
-            {
-                "$pull": {"clients": {"_id": ObjectId(client_id)}},
-                "$set": {"updatedAt": datetime.utcnow()}
-            }
-        )
+        deleted = await self.client_repository.delete_client(company_id, ObjectId(client_id))
+
+        if not deleted:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete client.")
 
-        if result.modified_count == 0:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete client.")
\ No newline at end of file
+        await self.company_repository.touch(company_id)
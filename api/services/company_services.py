@@ -3,6 +3,7 @@ from bson import ObjectId
 from fastapi import HTTPException, status
 from pymongo.errors import PyMongoError
 from ..schemas.company_schemas import CompanyCreate, CompanyInDB
+from ..repositories.company_repository import CompanyRepository
 
 class CompanyService:
     """
@@ -12,7 +13,7 @@ class CompanyService:
 
     def __init__(self, db_client):
         self.db = db_client
-        self.company_collection = self.db.get_collection("company")
+        self.company_repository = CompanyRepository(db_client)
         self.user_collection = self.db.get_collection("user")
 
     async def create_company(self, company_data: CompanyCreate) -> CompanyInDB:
@@ -37,17 +38,13 @@ class CompanyService:
                 "taxId": company_data.taxId,
                 "ownerId": ObjectId(company_data.ownerId),
                 "createdAt": datetime.utcnow(),
-                "updatedAt": datetime.utcnow(),
-                "clients": [],
-                "inventory": [],
-                "sales": []
+                "updatedAt": datetime.utcnow()
             }
 
             # Insert into DB
-            result = await self.company_collection.insert_one(company_doc)
-            created_company = await self.company_collection.find_one({"_id": result.inserted_id})
+            company_doc["_id"] = await self.company_repository.insert_company(company_doc)
 
-            return CompanyInDB(**created_company)
+            return CompanyInDB(**company_doc)
 
         except PyMongoError as e:
             raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -57,7 +54,7 @@ class CompanyService:
 
     async def get_company_public_info(self, company_id: str) -> dict:
         try:
-            company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+            company = await self.company_repository.find_by_id(company_id, "public_info")
 
             if not company:
                 raise HTTPException(
@@ -65,7 +62,10 @@ class CompanyService:
                     detail="Company not found"
                 )
 
-            owner = await self.user_collection.find_one({"_id": company["ownerId"]})
+            owner = await self.user_collection.find_one(
+                {"_id": company["ownerId"]},
+                {"email": 1, "phone_number": 1}
+            )
 
             if not owner:
                 raise HTTPException(
@@ -95,7 +95,7 @@ class CompanyService:
         address: str = ""
     ) -> dict:
         try:
-            company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+            company = await self.company_repository.find_by_id(company_id, "owner")
 
             if not company:
                 raise HTTPException(
@@ -109,14 +109,10 @@ class CompanyService:
             update_company = {
                 "name": name,
                 "taxId": cpf_cnpj,
-                "address": address,
-                "updatedAt": datetime.utcnow()
+                "address": address
             }
 
-            await self.company_collection.update_one(
-                {"_id": ObjectId(company_id)},
-                {"$set": update_company}
-            )
+            await self.company_repository.set_fields(company_id, update_company)
 
             # Atualizar USER (email e telephone)
             update_user = {
@@ -131,8 +127,11 @@ class CompanyService:
             )
 
             # Buscar dados atualizados para retorno
-            updated_company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
-            updated_owner = await self.user_collection.find_one({"_id": owner_id})
+            updated_company = await self.company_repository.find_by_id(company_id, "public_info")
+            updated_owner = await self.user_collection.find_one(
+                {"_id": owner_id},
+                {"email": 1, "phone_number": 1}
+            )
 
             return {
                 "name": updated_company.get("name", "") or "",
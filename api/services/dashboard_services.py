@@ -0,0 +1,155 @@
+"""
+Materialized dashboard snapshot of each company.
+
+The snapshot holds everything the dashboard shows on load: the sales overview,
+the advanced report for every period and the inventory header stats. It is
+rebuilt after sales, product and client writes (coalesced, in the background),
+by a periodic job for companies whose data changed or whose snapshot is from a
+previous day, on read when it lags behind the company's data version, and on
+demand (`?fresh=true`).
+"""
+import asyncio
+from datetime import datetime
+import logging
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from .sale_services import SaleService
+from .report_services import SalesAnalyticsService
+from ..repositories.company_repository import CompanyRepository
+from ..repositories.product_repository import ProductRepository
+from ..repositories.dashboard_snapshot_repository import DashboardSnapshotRepository
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PERIODS = ("7d", "30d", "6m", "1y")
+
+# Companies being refreshed in this process -> whether another refresh was
+# requested meanwhile (bursts of sales trigger at most one extra rebuild)
+_refreshing: Dict[str, bool] = {}
+
+
+def _is_stale(snapshot: Dict[str, Any], version: int) -> bool:
+    """True if the snapshot lags behind the company's data version or is from a previous (UTC) day."""
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return snapshot.get("dataVersion") != version or snapshot.get("refreshedAt", datetime.min) < today_start
+
+
+class DashboardSnapshotService:
+    def __init__(self, db_client):
+        self.db = db_client
+        self.company_repository = CompanyRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
+        self.snapshot_repository = DashboardSnapshotRepository(db_client)
+        self.sale_service = SaleService(db_client)
+        self.analytics_service = SalesAnalyticsService(db_client)
+
+    async def get_snapshot(self, company_id: str, fresh: bool = False, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Return the company's snapshot with a single find_one (optionally only
+        some sections, e.g. ["report.7d"]), read together with the company's
+        data version. It is rebuilt first, in full, if it does not exist, lags
+        behind the company's data version, is from a previous (UTC) day or
+        `fresh` is set.
+
+        Raises:
+            HTTPException(404): If the company does not exist.
+        """
+        if not fresh:
+            snapshot, version = await asyncio.gather(
+                self.snapshot_repository.find(company_id, fields),
+                self.company_repository.data_version(company_id),
+            )
+            if version is None:
+                raise HTTPException(status_code=404, detail="Company not found")
+            if snapshot is not None and not _is_stale(snapshot, version):
+                return snapshot
+
+        return await self.refresh_company(company_id)
+
+    async def refresh_company(self, company_id: str) -> Dict[str, Any]:
+        """
+        Recompute and store the company's snapshot.
+
+        Raises:
+            HTTPException(404): If the company does not exist.
+        """
+        # Read the version first: a write landing during the rebuild leaves the
+        # snapshot behind the company, so the job rebuilds it again
+        version = await self.company_repository.data_version(company_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Company not found")
+
+        snapshot = {
+            "salesOverview": await self.sale_service.get_sales_overview(company_id),
+            "report": await self.analytics_service.get_advanced_sales_overviews(company_id, SNAPSHOT_PERIODS),
+            "inventoryStats": await self._inventory_stats(company_id),
+            "dataVersion": version,
+            "refreshedAt": datetime.utcnow(),
+        }
+        await self.snapshot_repository.save(company_id, snapshot)
+        return snapshot
+
+    async def refresh_company_coalesced(self, company_id: str) -> None:
+        """
+        Refresh after a write without piling up rebuilds: while a refresh of the
+        company is running, further requests collapse into one more refresh.
+        Errors are logged (this runs after the response was sent).
+        """
+        key = str(company_id)
+        if key in _refreshing:
+            _refreshing[key] = True
+            return
+
+        _refreshing[key] = False
+        try:
+            while True:
+                await self.refresh_company(company_id)
+                if not _refreshing[key]:
+                    break
+                _refreshing[key] = False
+        except Exception as e:
+            logger.error(f"Dashboard snapshot refresh failed for company {company_id}: {e}")
+        finally:
+            del _refreshing[key]
+
+    async def refresh_stale_companies(self) -> dict:
+        """
+        Rebuild the snapshots that are missing, behind their company's data
+        version, or from a previous (UTC) day.
+        """
+        snapshots = await self.snapshot_repository.versions()
+        refreshed = 0
+        errors = 0
+
+        async for company in self.company_repository.iter_companies("data_version"):
+            snapshot = snapshots.get(company["_id"])
+            if snapshot is not None and not _is_stale(snapshot, company.get("dataVersion", 0)):
+                continue
+
+            try:
+                await self.refresh_company(company["_id"])
+                refreshed += 1
+            except Exception as e:
+                # Do not fail the whole batch; log and continue
+                logger.error(f"Dashboard snapshot refresh failed for company {company['_id']}: {e}")
+                errors += 1
+            # Let request handlers run between companies
+            await asyncio.sleep(0)
+
+        return {"refreshed": refreshed, "errors": errors}
+
+    async def _inventory_stats(self, company_id: str) -> Dict[str, Any]:
+        """Header figures of InventoryService.get_inventory_overview."""
+        company = await self.company_repository.find_by_id(company_id, "inventory_stats")
+        stats = company.get("inventoryStats", {}) if company else {}
+        total_products = stats.get("totalProducts")
+        if total_products is None:
+            total_products = await self.product_repository.count_company_products(company_id)
+
+        return {
+            "totalProducts": total_products,
+            "lowInventory": stats.get("lowInventory", 0),
+            "criticalInventory": stats.get("criticalInventory", 0),
+            "totalValue": stats.get("totalValue", 0.0),
+        }
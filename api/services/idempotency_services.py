@@ -0,0 +1,163 @@
+"""
+Idempotency keys for write endpoints.
+
+A client sends the same `Idempotency-Key` header on every retry of a request.
+The first request runs and its response is stored in 'idempotency_keys' (see
+IdempotencyRepository); retries get the stored response back without running
+the write again. Completed responses are also kept in a per-process LRU, so a
+retry reaching the same worker costs no database round trip.
+
+A running request holds its key with an owner token and a lease it keeps
+renewing; another request may only take a pending key over once that lease
+expired, i.e. when the worker that held it died.
+"""
+import asyncio
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Optional, Set
+import uuid
+from fastapi import HTTPException, status
+from pymongo.errors import PyMongoError
+from ..repositories.idempotency_repository import IDEMPOTENCY_TTL_SECONDS, IdempotencyRepository
+from ..utils.response_cache import VersionedResponseCache
+
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_CACHE_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_CACHE_MAX_ENTRIES", 4096))
+# Lease of a pending key, renewed every third of it while its request runs: a key
+# whose lease expired belongs to a request whose worker died
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", 30))
+IDEMPOTENCY_COMPLETE_ATTEMPTS = 3
+
+# (companyId, key) -> stored response, tagged with (endpoint, request hash)
+idempotency_cache = VersionedResponseCache(IDEMPOTENCY_CACHE_MAX_ENTRIES, IDEMPOTENCY_TTL_SECONDS)
+
+# Responses still being stored after their request returned (strong references)
+_background_completions: Set[asyncio.Task] = set()
+
+
+def _lease_until() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)
+
+
+def request_hash(payload: Any) -> str:
+    """Fingerprint of a request body, to reject a key reused for another request."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyService:
+    def __init__(self, db_client):
+        self.db = db_client
+        self.idempotency_repository = IdempotencyRepository(db_client)
+
+    async def run(
+        self,
+        company_id: str,
+        key: Optional[str],
+        endpoint: str,
+        payload: Any,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Return the stored response of `key`, or await `compute()` and store its
+        response. Without a key, `compute()` just runs.
+
+        Failed requests (any exception) release their key, so they can be retried.
+        Once `compute()` succeeded the key is never released: if its response
+        cannot be stored right away, it keeps being retried in the background
+        while the key's lease is renewed.
+
+        Raises:
+            HTTPException(400): If the key is empty or too long.
+            HTTPException(409): If the key's first request is still running.
+            HTTPException(422): If the key was used for another endpoint or body.
+        """
+        if key is None:
+            return await compute()
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Idempotency-Key must have between 1 and {IDEMPOTENCY_KEY_MAX_LENGTH} characters."
+            )
+
+        fingerprint = (endpoint, request_hash(payload))
+        cache_key = (str(company_id), key)
+        found, response = idempotency_cache.get(cache_key, fingerprint)
+        if found:
+            return response
+
+        owner = uuid.uuid4().hex
+        existing = await self.idempotency_repository.claim(company_id, key, endpoint, fingerprint[1], owner, _lease_until())
+        if existing is not None:
+            if (existing["endpoint"], existing["requestHash"]) != fingerprint:
+                raise HTTPException(
+                    status_code=422,
+                    detail="This Idempotency-Key was already used with a different request."
+                )
+            if existing["status"] == "done":
+                idempotency_cache.set(cache_key, fingerprint, existing["response"])
+                return existing["response"]
+            # Pending: only take the key over if its owner stopped renewing the lease
+            if not await self.idempotency_repository.take_over(company_id, key, owner, _lease_until()):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still being processed."
+                )
+            logger.warning(f"Taking over the expired idempotency key of a dead request for company {company_id}")
+
+        heartbeat = asyncio.create_task(self._renew_lease(company_id, key, owner))
+        try:
+            try:
+                response = await compute()
+            except BaseException:
+                # The request failed: free the key so it can be retried
+                try:
+                    await self.idempotency_repository.release(company_id, key, owner)
+                except PyMongoError:
+                    logger.exception("Could not release an idempotency key; it is freed when its lease expires")
+                raise
+
+            idempotency_cache.set(cache_key, fingerprint, response)
+            if not await self._complete(company_id, key, owner, response):
+                # The write is done: keep the key leased until its response is stored
+                task = asyncio.create_task(self._complete_in_background(company_id, key, owner, response, heartbeat))
+                _background_completions.add(task)
+                task.add_done_callback(_background_completions.discard)
+                heartbeat = None
+            return response
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+
+    async def _renew_lease(self, company_id: str, key: str, owner: str) -> None:
+        """Keep the key's lease alive while its request runs (cancelled when it ends)."""
+        while True:
+            await asyncio.sleep(IDEMPOTENCY_LEASE_SECONDS / 3)
+            try:
+                await self.idempotency_repository.renew(company_id, key, owner, _lease_until())
+            except PyMongoError:
+                logger.warning(f"Could not renew an idempotency key lease for company {company_id}")
+
+    async def _complete(self, company_id: str, key: str, owner: str, response: Any) -> bool:
+        """Store the response, retrying IDEMPOTENCY_COMPLETE_ATTEMPTS times. Returns False if it never succeeded."""
+        for attempt in range(IDEMPOTENCY_COMPLETE_ATTEMPTS):
+            try:
+                await self.idempotency_repository.complete(company_id, key, owner, response)
+                return True
+            except PyMongoError:
+                logger.warning(f"Could not store an idempotency key response (attempt {attempt + 1})")
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        return False
+
+    async def _complete_in_background(self, company_id: str, key: str, owner: str, response: Any, heartbeat) -> None:
+        """Retry storing the response until it succeeds, renewing the lease meanwhile."""
+        try:
+            while not await self._complete(company_id, key, owner, response):
+                await asyncio.sleep(IDEMPOTENCY_LEASE_SECONDS / 3)
+        finally:
+            heartbeat.cancel()
@@ -1,22 +1,32 @@
 from fastapi import HTTPException, status
+import heapq
 from bson import ObjectId, errors as bson_errors
+from pymongo.errors import DuplicateKeyError
 from ..utils.helper_functions import serialize_mongo
 from ..utils.helper_functions import serialize_doc
+from ..utils.response_cache import cached_company_response
 from datetime import datetime
 from ..schemas.inventory_schemas import InventoryItemInDB, InventoryCreate
+from ..repositories.product_repository import ProductRepository
+from ..repositories.company_repository import CompanyRepository
+
+# Ranking fields of the best-sellers endpoint
+TOP_PRODUCTS_RANKINGS = {"units": "unitsSold", "revenue": "revenue"}
+
 
 class InventoryService:
     """
-    Handles inventory-related operations inside a company's subdocument array.
+    Handles inventory-related operations on the company's products.
     """
 
     def __init__(self, db_client):
         self.db = db_client
-        self.company_collection = self.db.get_collection("company")
+        self.company_repository = CompanyRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
 
     async def get_inventory_full(self, company_id: str):
         """
-        Retrieves all products (except 'createdAt') from the company's 'inventory' array.
+        Retrieves all products (except 'createdAt') from the company's inventory.
 
         Returns:
         {
@@ -34,11 +44,11 @@ class InventoryService:
         }
         """
         # Find the company
-        company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+        company = await self.company_repository.find_by_id(company_id)
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
 
-        inventory = company.get("inventory", [])
+        inventory = await self.product_repository.list_company_products(company_id)
         if not inventory:
             return {"status": "success", "products": []}
 
@@ -59,22 +69,20 @@ class InventoryService:
         }
     async def get_product_by_name(self, company_id: str, product_name: str):
         """
-        Retrieves a product document from a company's 'inventory' array by its name.
-        Returns the full product document, or raises 404 if not found.
+        Retrieves a product document from a company's inventory by its name
+        (case-insensitive). Returns the full product document, or raises 404 if not found.
         """
-        company = await self.company_collection.find_one(
-            {"_id": ObjectId(company_id), "inventory.name": product_name},
-            {"inventory.$": 1}
-        )
+        product = await self.product_repository.find_by_name(company_id, product_name)
 
-        if not company or "inventory" not in company or not company["inventory"]:
+        if not product:
             raise HTTPException(
                 status_code=404,
                 detail=f"Product '{product_name}' not found in company inventory."
             )
 
-        return company["inventory"][0]
+        return product
     
+    @cached_company_response("inventory_overview")
     async def get_inventory_overview(self, company_id: str):
         """
     Generate a summarized overview of a company's inventory.
@@ -87,12 +95,12 @@ class InventoryService:
     unit price, stock status ("Normal", "Baixo", "Crítico", "Esgotado") 
     and total value (quantity × costPrice). Now also includes productId.
     """
-        company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+        company = await self.company_repository.find_by_id(company_id, "inventory_stats")
 
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
 
-        inventory = company.get("inventory", [])
+        inventory = await self.product_repository.list_company_products(company_id)
         stats = company.get("inventoryStats", {})
 
         formatted_products = []
@@ -136,36 +144,72 @@ class InventoryService:
             "products": formatted_products
         }
     
+    @cached_company_response("inventory_top")
+    async def get_top_products(self, company_id: str, by: str = "units", limit: int = 10):
+        """
+        Return the company's best-selling products, ranked by units sold or by
+        revenue, from the sales counters kept on each product (see
+        ProductRepository.decrement_stock).
+
+        Only the top `limit` products are selected (heap-based partial selection,
+        O(products · log limit)) instead of sorting the whole catalog.
+
+        Raises:
+            400 - Invalid ranking field
+            404 - Company not found
+        """
+        if by not in TOP_PRODUCTS_RANKINGS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid ranking. Use one of: {', '.join(TOP_PRODUCTS_RANKINGS)}."
+            )
+
+        company = await self.company_repository.find_by_id(company_id)
+        if not company:
+            raise HTTPException(status_code=404, detail="Company not found")
+
+        products = await self.product_repository.list_company_products(company_id, "sales_counters")
+        field = TOP_PRODUCTS_RANKINGS[by]
+        sold = (p for p in products if p.get("unitsSold"))
+        top = heapq.nlargest(limit, sold, key=lambda p: p.get(field) or 0)
+
+        return {
+            "status": "success",
+            "by": by,
+            "products": [
+                {
+                    "productId": str(p["_id"]),
+                    "name": p.get("name"),
+                    "category": p.get("category"),
+                    "unitsSold": int(p.get("unitsSold") or 0),
+                    "revenue": round(float(p.get("revenue") or 0), 2),
+                    "lastSoldAt": p["lastSoldAt"].isoformat() if isinstance(p.get("lastSoldAt"), datetime) else None,
+                }
+                for p in top
+            ],
+        }
+
     async def create_product(self, company_id: str, product_data: InventoryCreate) -> InventoryItemInDB:
         """
         Inserts a new product into company's inventory.
-        Rejects duplicate product names in same company.
+        Rejects duplicate product names (case-insensitive) in same company,
+        enforced by the unique (companyId, name) index.
         """
-        company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+        company = await self.company_repository.find_by_id(company_id)
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
 
-        # Check duplicate product name
-        existing = next((p for p in company.get("inventory", []) if p.get("name") == product_data.name), None)
-        if existing:
+        new_product = InventoryItemInDB(**product_data.dict())
+
+        try:
+            await self.product_repository.insert_product(company_id, new_product.dict(by_alias=True))
+        except DuplicateKeyError:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"Product '{product_data.name}' already exists in this company."
             )
 
-        new_product = InventoryItemInDB(**product_data.dict())
-
-        result = await self.company_collection.update_one(
-            {"_id": ObjectId(company_id)},
-            {
-                "$push": {"inventory": new_product.dict(by_alias=True)},
-                "$set": {"updatedAt": datetime.utcnow()}
-            }
-        )
-
-        if result.modified_count == 0:
-            raise HTTPException(status_code=500, detail="Failed to add product to inventory.")
-
+        await self.company_repository.touch(company_id)
         return new_product
     
     async def increase_product_inventory(self, company_id: str, product_name: str, increment: int):
@@ -174,10 +218,8 @@ class InventoryService:
 
         Steps:
         - Find company
-        - Search for product inside embedded inventory array
-        - Increase its quantity by the given 'increment'
-        - Update the document atomically
-        - Return the updated product
+        - Increase the quantity of the product matching the name (case-insensitive)
+          with a single atomic $inc on the product document
 
         Raises:
             404 - Company not found
@@ -185,52 +227,26 @@ class InventoryService:
         """
 
         # 1. Check company
-        company = await self.company_collection.find_one(
-            {"_id": ObjectId(company_id)},
-            {"inventory": 1}
-        )
+        company = await self.company_repository.find_by_id(company_id)
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
 
-        # 2. Find product inside array
-        product = next(
-            (p for p in company.get("inventory", []) if p["name"].lower() == product_name.lower()),
-            None
-        )
-        if not product:
+        # 2. Increment through the (companyId, name) index
+        updated = await self.product_repository.increment_quantity_by_name(company_id, product_name, increment)
+        if not updated:
             raise HTTPException(status_code=404, detail=f"Product '{product_name}' not found")
 
-        new_quantity = int(product.get("quantity", 0)) + int(increment)
-
-        # 3. Update using positional operator
-        result = await self.company_collection.update_one(
-            {
-                "_id": ObjectId(company_id),
-                "inventory._id": product["_id"]
-            },
-            {
-                "$set": {
-                    "inventory.$.quantity": new_quantity,
-                    "updatedAt": datetime.utcnow()
-                }
-            }
-        )
-
-        if result.modified_count == 0:
-            raise HTTPException(status_code=500, detail="Failed to update product inventory")
-
-    
+        await self.company_repository.touch(company_id)
         return
     
     async def delete_product(self, company_id: str, product_id: str):
         """
-        Delete a product from the company's inventory subarray by its id.
+        Delete a product from the company's inventory by its id.
 
         Steps:
         - Validate product id
         - Ensure company exists
-        - Pull the inventory item with matching _id from the company's inventory array
-        - Update company's updatedAt timestamp
+        - Delete the product document with matching _id and companyId
 
         Raises:
             400 - Invalid product id
@@ -244,24 +260,18 @@ class InventoryService:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid product id")
 
         # Ensure company exists
-        company = await self.company_collection.find_one({"_id": ObjectId(company_id)}, {"inventory": 1})
+        company = await self.company_repository.find_by_id(company_id)
         if not company:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Company not found")
 
         try:
-            # Only match the company document if it contains the inventory item with the given _id.
-            result = await self.company_collection.update_one(
-                {"_id": ObjectId(company_id), "inventory._id": oid},
-                {
-                    "$pull": {"inventory": {"_id": oid}},
-                    "$set": {"updatedAt": datetime.utcnow()}
-                }
-            )
+            deleted = await self.product_repository.delete_product(company_id, oid)
 
-             # If no document matched the filter, the product wasn't found in the array
-            if result.matched_count == 0:
+            # If no document matched the filter, the product wasn't found in the company
+            if not deleted:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
+            await self.company_repository.touch(company_id)
             return None
         except HTTPException:
             raise
@@ -1,21 +1,29 @@
 from datetime import datetime, timedelta
+import os
 from bson import ObjectId
 from fastapi import HTTPException
 
 # import the exact helpers that exist in your helpers file
 from ..utils.sales_metrics import (
+    GRANULARITIES,
     get_date_ranges,
-    calculate_revenue_in_period,
-    calculate_category_revenue_distribution_period,
-    calculate_sales_counts,
-    calculate_ticket_metrics,
-    calculate_daily_metrics,
-    calculate_month_revenue_metrics,
-    calculate_sales_totals,
-    calculate_monthly_sales_change
+    calculate_ticket_metrics_from_summaries,
+    calculate_month_revenue_metrics_from_summaries,
+    calculate_monthly_sales_change_from_summaries
 )
+from ..utils.sales_metrics_engine import MultiPeriodSalesMetrics, SalesMetricsAccumulator, SalesRangeMetrics
+from ..utils.sales_metrics_columnar import create_sales_metrics
+from ..utils.response_cache import cached_company_response
+from ..utils.helper_functions import naive_utc
+from ..utils.quantile_sketch import TICKET_QUANTILES
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Union
+from ..repositories.sale_repository import SaleRepository
+from ..repositories.sale_archive_repository import SaleArchiveRepository
+from ..repositories.sales_daily_repository import SalesDailyRepository, day_floor
+from ..repositories.product_repository import ProductRepository
+from ..repositories.client_repository import ClientRepository
+from ..repositories.company_repository import CompanyRepository
 
 
 def _parse_date_safe(d):
@@ -37,11 +45,84 @@ def _parse_date_safe(d):
     raise TypeError(f"Invalid date type: {type(d)}")
 
 
+# Where the advanced report is computed:
+#   - "python": sales are loaded and folded by the Python helpers (reference)
+#   - "mongo" : figures are aggregated by a MongoDB pipeline (flat layout only;
+#               the bucket layout always uses the Python backend)
+REPORT_BACKEND = os.getenv("REPORT_BACKEND", "python")
+REPORT_BACKENDS = ("python", "mongo")
+
+
+# How the report counts active customers (distinct buyers of the last 90 days):
+#   - "exact" : client ids collected from the raw sales since the cutoff
+#   - "approx": merged HyperLogLog sketches of the day rollups (companies with
+#               backfilled rollups; others are always counted exactly)
+#   - "auto"  : exact for companies with at most ACTIVE_CUSTOMERS_EXACT_MAX_CLIENTS clients
+ACTIVE_CUSTOMERS_MODE = os.getenv("ACTIVE_CUSTOMERS_MODE", "auto")
+ACTIVE_CUSTOMERS_MODES = ("exact", "approx", "auto")
+ACTIVE_CUSTOMERS_EXACT_MAX_CLIENTS = int(os.getenv("ACTIVE_CUSTOMERS_EXACT_MAX_CLIENTS", 5000))
+# Longest window of the active customers endpoint (one sketch per day)
+ACTIVE_CUSTOMERS_MAX_DAYS = 366
+
+
+def _approximate_active_customers(client_count: int) -> bool:
+    if ACTIVE_CUSTOMERS_MODE not in ACTIVE_CUSTOMERS_MODES:
+        raise ValueError(f"Invalid active customers mode: {ACTIVE_CUSTOMERS_MODE!r}")
+    if ACTIVE_CUSTOMERS_MODE == "auto":
+        return client_count > ACTIVE_CUSTOMERS_EXACT_MAX_CLIENTS
+    return ACTIVE_CUSTOMERS_MODE == "approx"
+
+
+REPORT_PERIODS = ("7d", "30d", "6m", "1y")
+
+# Days of history each report period reads (with margin for the month arithmetic).
+_PERIOD_DAYS = {"7d": 7, "30d": 30, "6m": 186, "1y": 366}
+
+
+def _report_window_start(period: str) -> datetime:
+    """
+    Earliest sale date the report needs for `period`: the period itself and the
+    fixed 90-day active-customers window, whichever reaches further back.
+    """
+    days = max(_PERIOD_DAYS.get(period, 366), 90) + 1
+    return datetime.utcnow() - timedelta(days=days)
+
+
+# Custom ranges: approximate bucket length and the largest bucket count served
+_GRANULARITY_SPAN = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=31),
+}
+RANGE_MAX_BUCKETS = int(os.getenv("REPORT_RANGE_MAX_BUCKETS", 2000))
+
+
+def _default_granularity(start: datetime, end: datetime) -> str:
+    span = end - start
+    if span <= timedelta(days=2):
+        return "hour"
+    if span <= timedelta(days=92):
+        return "day"
+    if span <= timedelta(days=366):
+        return "week"
+    return "month"
+
+
 class SalesAnalyticsService:
-    def __init__(self, db_client):
+    def __init__(self, db_client, backend: Optional[str] = None):
         self.db_client = db_client
-        self.company_collection = self.db_client.get_collection("company")
+        self.backend = backend or REPORT_BACKEND
+        if self.backend not in REPORT_BACKENDS:
+            raise ValueError(f"Invalid report backend: {self.backend!r}")
+        self.company_repository = CompanyRepository(db_client)
+        self.sale_repository = SaleRepository(db_client)
+        self.archive_repository = SaleArchiveRepository(db_client)
+        self.daily_repository = SalesDailyRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
+        self.client_repository = ClientRepository(db_client)
 
+    @cached_company_response("report_sales_overview")
     async def get_advanced_sales_overview(self, company_id: str, period: str):
         """
         Orchestrates helpers to produce the dashboard report.
@@ -49,33 +130,89 @@ class SalesAnalyticsService:
         Uses helpers from `api.services.helpers.analytics`. Period affects:
           - categoryDistribution (filtered by period)
           - salesTotals / evolution (filtered by period)
+          - ticket median / p90 / p99 (whole UTC days of the period, from the
+            day rollups' ticket sketches; null until the rollups are backfilled)
 
         Fixed rules:
           - Active customers: customers who bought in the last 3 months
           - New customers: customers created in the current month
         """
-        company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+        reports = await self._build_reports(company_id, [period])
+        return reports[period]
+
+    @cached_company_response("report_sales_overviews")
+    async def get_advanced_sales_overviews(self, company_id: str, periods: Tuple[str, ...]):
+        """
+        `get_advanced_sales_overview` of several periods, as {period: report}.
+
+        The company and its clients and products are read once, the sales are
+        walked once for every period, and the period-independent figures (month
+        revenue, ticket, customers, ...) are computed once and shared.
+
+        Raises:
+            HTTPException(400): If a period is invalid or none is given.
+        """
+        invalid = [period for period in periods if period not in REPORT_PERIODS]
+        if invalid or not periods:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid periods. Use one or more of: {', '.join(REPORT_PERIODS)}."
+            )
+        return await self._build_reports(company_id, list(dict.fromkeys(periods)))
+
+    async def _build_reports(self, company_id: str, periods: List[str]) -> Dict[str, Dict[str, Any]]:
+        company = await self.company_repository.find_by_id(company_id, "sales_rollups")
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
 
-        # Raw data from DB
-        raw_sales: List[Dict[str, Any]] = company.get("sales", [])
-        inventory: List[Dict[str, Any]] = company.get("inventory", [])
-        clients: List[Dict[str, Any]] = company.get("clients", [])
+        bucket_layout = self.sale_repository.layout == "bucket"
+        if self.backend == "mongo" and not bucket_layout:
+            # Every period is its own database-side aggregation
+            return {
+                period: await self._get_overview_from_pipeline(company_id, period, company)
+                for period in periods
+            }
 
-        # 1) Normalize dates in sales and clients so helpers can rely on datetime objects
-        sales: List[Dict[str, Any]] = []
-        for s in raw_sales:
-            s_copy = dict(s)  # shallow copy
-            try:
-                s_copy["date"] = _parse_date_safe(s.get("date"))
-            except Exception:
-                # if a sale has an invalid date, skip it
-                continue
+        use_rollups = not bucket_layout and bool(company.get("salesDailyBackfilledAt"))
+
+        inventory: List[Dict[str, Any]] = await self.product_repository.list_company_products(company_id, "names_categories")
+        clients: List[Dict[str, Any]] = await self.client_repository.list_company_clients(company_id, "report")
+
+        # Dates ranges for helpers that need them
+        dates = get_date_ranges()
+        three_months_ago = datetime.utcnow() - timedelta(days=90)
+        approximate_active = use_rollups and _approximate_active_customers(len(clients))
+
+        # 1) Single pass over the sales: every figure below is accumulated at once.
+        #    Dates are normalized on the fly (sales with an invalid date are skipped).
+        #    Several periods share one pass (MultiPeriodSalesMetrics, Python engine).
+        metrics_options = dict(
+            dates=dates,
+            inventory=inventory,
+            # Client ids are only collected when active customers are counted exactly
+            active_since=None if approximate_active else three_months_ago,
+            parse_date=_parse_date_safe,
+        )
+        if len(periods) == 1:
+            metrics = create_sales_metrics(period=periods[0], **metrics_options)
+            shared, by_period = metrics, {periods[0]: metrics}
+        else:
+            metrics = MultiPeriodSalesMetrics(periods, **metrics_options)
+            shared, by_period = metrics.shared, metrics.by_period
 
-            # ensure items exist and are well formed
-            s_copy["items"] = s.get("items", []) or []
-            sales.append(s_copy)
+        if use_rollups:
+            await self._fold_sales_from_rollups(company_id, metrics)
+        else:
+            # Raw data from DB (the bucket layout only needs the report windows,
+            # monthly and all-time figures come from the bucket totals)
+            raw_sales: List[Dict[str, Any]] = await self.sale_repository.find_company_sales(
+                company_id,
+                start=min(_report_window_start(period) for period in periods) if bucket_layout else None
+            )
+            # Summaries of archived (cold) months; empty unless the archiver ran
+            archived: List[Dict[str, Any]] = await self.archive_repository.find_summaries(company_id)
+            metrics.add_all(raw_sales)
+            metrics.add_archived(archived)
 
         # normalize client createdAt / last purchase fields (support multiple key variants)
         normalized_clients = []
@@ -106,48 +243,41 @@ class SalesAnalyticsService:
 
             normalized_clients.append(c_copy)
 
-        # Dates ranges for helpers that need them
-        dates = get_date_ranges()
-
         # -----------------------------
-        # CATEGORY DISTRIBUTION (period-aware)
+        # DAILY / TICKET / MONTH METRICS
         # -----------------------------
-        # The helper expects full sales list and inventory; it filters internally by 'period'
-        category_distribution = calculate_category_revenue_distribution_period(
-            sales=sales,
-            inventory=inventory,
-            period=period
-        )
+        if bucket_layout:
+            overall = await self.sale_repository.get_overall_summary(company_id)
+            current_month, last_month, last_month_full = await self.sale_repository.get_report_month_summaries(
+                company_id,
+                dates,
+                {p["_id"]: p.get("category") for p in inventory}
+            )
 
-        # -----------------------------
-        # SALES EVOLUTION / TOTALS (period-aware)
-        # -----------------------------
-        sales_totals = calculate_revenue_in_period(sales=sales, period=period)
+            ticket_metrics = calculate_ticket_metrics_from_summaries(overall, current_month, last_month)
+            month_revenue = calculate_month_revenue_metrics_from_summaries(current_month, last_month)
+            sales_month_change = calculate_monthly_sales_change_from_summaries(current_month, last_month_full)
+            sales_counts = {"totalCount": overall["count"]}
+        else:
+            ticket_metrics = shared.ticket_metrics()
+            month_revenue = shared.month_revenue_metrics()
+            sales_month_change = shared.monthly_sales_change()
+            sales_counts = shared.sales_counts()
 
-        # -----------------------------
-        # DAILY / TICKET / MONTH METRICS (reuse existing helpers where applicable)
-        # -----------------------------
-        daily_metrics = calculate_daily_metrics(sales, dates["today_start"], dates["yesterday_start"])
-        ticket_metrics = calculate_ticket_metrics(sales, dates["month_start"], dates["last_month_start"], dates["last_month_end"])
-        month_revenue = calculate_month_revenue_metrics(sales, dates["month_start"], dates["last_month_start"], dates["last_month_end"])
-        sales_month_change = calculate_monthly_sales_change(
-            sales,
-            dates["month_start"],
-            dates["last_month_start"]
+        ticket_quantiles = await self._ticket_quantiles(
+            company_id, company, {period: by_period[period].revenue_start for period in periods}
         )
-        sales_counts = calculate_sales_counts(sales, dates["week_start"])
-        # calculate_sales_totals exists too (total, week)
-        totals = calculate_sales_totals(sales, dates["week_start"])
 
         # -----------------------------
         # ACTIVE CUSTOMERS (fixed: last 3 months)
         # -----------------------------
-        three_months_ago = datetime.utcnow() - timedelta(days=90)
-        # use sales to determine which clientIds bought in last 3 months
-        active_client_ids = {
-            str(sale.get("clientId")) for sale in sales if sale.get("clientId") and sale["date"] >= three_months_ago
-        }
-        active_customers_count = sum(1 for c in normalized_clients if str(c.get("_id")) in active_client_ids)
+        if approximate_active:
+            # Distinct buyers since the cutoff day, from the day sketches
+            active_customers_count = await self.daily_repository.distinct_clients(company_id, three_months_ago)
+        else:
+            # clientIds that bought in the last 3 months, collected during the sales pass
+            active_client_ids = shared.active_client_ids
+            active_customers_count = sum(1 for c in normalized_clients if str(c.get("_id")) in active_client_ids)
 
         # -----------------------------
         # NEW CUSTOMERS (fixed: current month)
@@ -155,6 +285,314 @@ class SalesAnalyticsService:
         month_start = dates["month_start"]
         new_customers_count = sum(1 for c in normalized_clients if c.get("createdAt") and c["createdAt"] >= month_start)
 
+        # -----------------------------
+        # CATEGORY DISTRIBUTION / SALES TOTALS (period-aware)
+        # -----------------------------
+        return {
+            period: self._report_response(
+                period,
+                month_revenue=month_revenue,
+                sales_month_change=sales_month_change,
+                sales_counts=sales_counts,
+                new_customers_count=new_customers_count,
+                active_customers_count=active_customers_count,
+                ticket_metrics=ticket_metrics,
+                ticket_quantiles=ticket_quantiles[period],
+                category_distribution=by_period[period].category_distribution(),
+                sales_totals=by_period[period].revenue_in_period(),
+            )
+            for period in periods
+        }
+
+    @cached_company_response("report_sales_range")
+    async def get_sales_range_overview(
+        self,
+        company_id: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        granularity: Optional[str] = None,
+    ):
+        """
+        Revenue evolution and category distribution over a custom [start, end)
+        range, bucketed by hour, day, week or month.
+
+        Only the sales inside the range are read (indexed date-range scan, plus
+        the archived months it overlaps), so a narrow range costs proportionally
+        less than a long one.
+        """
+        start = naive_utc(start)
+        end = naive_utc(end) or datetime.utcnow()
+        granularity = granularity or _default_granularity(start, end)
+
+        if granularity not in GRANULARITIES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid granularity. Use one of: {', '.join(GRANULARITIES)}."
+            )
+        if start >= end:
+            raise HTTPException(status_code=400, detail="The range start must be before its end.")
+        if (end - start) / _GRANULARITY_SPAN[granularity] > RANGE_MAX_BUCKETS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Range too long for '{granularity}' buckets (at most {RANGE_MAX_BUCKETS})."
+            )
+
+        company = await self.company_repository.find_by_id(company_id)
+        if not company:
+            raise HTTPException(status_code=404, detail="Company not found")
+
+        inventory = await self.product_repository.list_company_products(company_id, "names_categories")
+        metrics = SalesRangeMetrics(start, end, granularity, inventory=inventory, parse_date=_parse_date_safe)
+
+        metrics.add_all(await self._find_range_sales(company_id, start, end))
+
+        return {
+            "range": {"start": start, "end": end, "granularity": granularity},
+            "overview": {
+                "sales": metrics.totals(),
+                "categoryDistribution": metrics.category_distribution(),  # percentages
+                "salesTotals": metrics.revenue_buckets(),  # per bucket, oldest first
+            },
+        }
+
+    @cached_company_response("report_active_customers")
+    async def get_active_customers(
+        self,
+        company_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        mode: str = "auto",
+    ):
+        """
+        Count the distinct customers who bought in [start, end) (default: the
+        last 90 days).
+
+        Modes (see ACTIVE_CUSTOMERS_MODE): "exact" reads the sales of the range;
+        "approx" merges the HyperLogLog sketches of the day rollups (whole UTC
+        days, about 0.8% error) and needs backfilled rollups, otherwise the count
+        is exact; "auto" is exact for companies with at most
+        ACTIVE_CUSTOMERS_EXACT_MAX_CLIENTS clients.
+        """
+        if mode not in ACTIVE_CUSTOMERS_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid mode. Use one of: {', '.join(ACTIVE_CUSTOMERS_MODES)}."
+            )
+
+        end = naive_utc(end) or datetime.utcnow()
+        start = naive_utc(start) or end - timedelta(days=90)
+        if start >= end:
+            raise HTTPException(status_code=400, detail="The range start must be before its end.")
+        if end - start > timedelta(days=ACTIVE_CUSTOMERS_MAX_DAYS):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Range too long (at most {ACTIVE_CUSTOMERS_MAX_DAYS} days)."
+            )
+
+        company = await self.company_repository.find_by_id(company_id, "sales_rollups")
+        if not company:
+            raise HTTPException(status_code=404, detail="Company not found")
+
+        approximate = False
+        if bool(company.get("salesDailyBackfilledAt")) and self.sale_repository.layout != "bucket":
+            if mode == "auto":
+                clients = await self.client_repository.list_company_clients(company_id, "ids")
+                approximate = len(clients) > ACTIVE_CUSTOMERS_EXACT_MAX_CLIENTS
+            else:
+                approximate = mode == "approx"
+
+        if approximate:
+            count = await self.daily_repository.distinct_clients(company_id, start, end)
+        else:
+            client_ids = set()
+            for sale in await self._find_range_sales(company_id, start, end):
+                try:
+                    date = _parse_date_safe(sale.get("date"))
+                except Exception:
+                    continue
+                if sale.get("clientId") and start <= date < end:
+                    client_ids.add(str(sale["clientId"]))
+            count = len(client_ids)
+
+        return {
+            "start": start,
+            "end": end,
+            "activeCustomers": count,
+            "approximate": approximate,
+        }
+
+    async def _find_range_sales(self, company_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """
+        Sales of [start, end): an indexed date-range scan plus the archived months
+        the range overlaps (those sales are not filtered by date).
+        """
+        sales = await self.sale_repository.find_company_sales(company_id, start=start, end=end)
+        for month in await self.archive_repository.find_summaries(company_id, start):
+            if month["month"] < end:
+                sales.extend(await self.archive_repository.load_sales(company_id, month["month"]))
+        return sales
+
+    async def _fold_sales_from_rollups(
+        self,
+        company_id: str,
+        metrics: Union[SalesMetricsAccumulator, MultiPeriodSalesMetrics],
+    ) -> None:
+        """
+        Feed the report accumulator from the 'sales_daily' rollups.
+
+        Raw sales are only read where a day rollup is not precise enough: since
+        the active-customers cutoff when client ids are collected (`active_since`
+        set), and on the days containing the period starts (of every period of a
+        MultiPeriodSalesMetrics), which fall mid-day. Every other day in the
+        report windows is one rollup document, and older
+        days are a single database-side total. The rollups already include
+        archived months. A period start on an archived day has no raw sales
+        left: that day's archive summary is folded instead, whole, as the
+        live-sales helpers do with archived days.
+        """
+        dates = metrics.dates
+        raw_start = day_floor(metrics.active_since) if metrics.active_since is not None else None
+        window_start = min(
+            *(day_floor(start) for start in metrics.period_starts),
+            dates["last_month_start"],
+            raw_start or dates["today_start"],
+        )
+        boundary_days = {
+            day_floor(start) for start in metrics.period_starts
+            if raw_start is None or day_floor(start) < raw_start
+        }
+
+        metrics.add_rollup_totals(await self.daily_repository.total_before(company_id, window_start))
+
+        # Fold the days in chronological order, so the period keys keep the
+        # order of the live-sales helpers
+        segments = [
+            (rollup["day"], rollup, None)
+            for rollup in await self.daily_repository.find_days(company_id, window_start, raw_start)
+            if rollup["day"] not in boundary_days
+        ]
+        archived_days: Dict[str, Dict[str, Any]] = {}
+        if boundary_days:
+            for month in await self.archive_repository.find_summaries(company_id, min(boundary_days)):
+                archived_days.update(month.get("days", {}))
+        archived_boundary = {"count": 0, "revenue": 0.0, "days": {}}
+        for day in boundary_days:
+            key = day.strftime("%Y-%m-%d")
+            if key in archived_days:
+                archived_boundary["days"][key] = archived_days[key]
+                archived_boundary["count"] += int(archived_days[key].get("count", 0))
+                archived_boundary["revenue"] += float(archived_days[key].get("revenue", 0.0))
+                continue
+            sales = await self.sale_repository.find_company_sales(company_id, start=day, end=day + timedelta(days=1))
+            segments.append((day, None, sales))
+        if archived_boundary["days"]:
+            # Summaries of archived days count whole, like archived months do
+            metrics.add_archived([archived_boundary])
+        segments.sort(key=lambda segment: segment[0])
+
+        for _, rollup, sales in segments:
+            if rollup is not None:
+                metrics.add_rollup(rollup)
+            else:
+                metrics.add_all(sales)
+
+        if raw_start is not None:
+            metrics.add_all(await self.sale_repository.find_company_sales(company_id, start=raw_start))
+
+    async def _ticket_quantiles(
+        self,
+        company_id: str,
+        company: Dict[str, Any],
+        starts: Dict[str, datetime],
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Median, p90 and p99 ticket of the days since day_floor(start) of each
+        period ({period: start}), merged from the day rollups' ticket sketches
+        (within 1% of the exact values). None until the company's rollups are
+        backfilled, as older days have no sketch; archived months never have one.
+        """
+        if not company.get("salesDailyBackfilledAt"):
+            return {period: {name: None for name in TICKET_QUANTILES} for period in starts}
+        sketches = await self.daily_repository.ticket_sketches(company_id, starts)
+        return {period: sketch.quantiles() for period, sketch in sketches.items()}
+
+    async def _get_overview_from_pipeline(self, company_id: str, period: str, company: Dict[str, Any]):
+        """
+        MongoDB backend of `get_advanced_sales_overview` (REPORT_BACKEND=mongo).
+
+        The figures are aggregated inside the database and only the final numbers
+        are transferred; the Python helpers stay the reference implementation
+        (see api/tests/test_report_parity.py). Flat sales layout only.
+
+        Read-only: legacy embedded sales the pipeline cannot see are folded in
+        Python (dual read) until the migration job drains them.
+        """
+        dates = get_date_ranges()
+        three_months_ago = datetime.utcnow() - timedelta(days=90)
+
+        legacy_sales = await self.sale_repository.find_unmigrated_legacy_sales(company_id)
+        inventory = (
+            await self.product_repository.list_company_products(company_id, "names_categories")
+            if legacy_sales else None
+        )
+        metrics = SalesMetricsAccumulator(
+            dates=dates,
+            period=period,
+            inventory=inventory,
+            active_since=three_months_ago,
+            parse_date=_parse_date_safe,
+        )
+        # Legacy sales predate the collection: fold them first, like the Python backend
+        metrics.add_all(legacy_sales)
+        legacy_client_ids = [
+            ObjectId(client_id) for client_id in metrics.active_client_ids if ObjectId.is_valid(client_id)
+        ]
+
+        figures = await self.sale_repository.aggregate_report_figures(
+            company_id,
+            dates=dates,
+            revenue_start=metrics.revenue_start,
+            group_by=metrics.group_by,
+            category_start=metrics.category_start,
+            active_since=three_months_ago,
+            counted_client_ids=legacy_client_ids,
+        )
+        metrics.load_aggregates(figures["totals"], dict(figures["period"]), dict(figures["categories"]))
+        metrics.add_archived(await self.archive_repository.find_summaries(company_id))
+
+        active_customers_count = figures["activeClients"]
+        if legacy_client_ids:
+            active_customers_count += await self.client_repository.count_by_ids(company_id, legacy_client_ids)
+
+        new_customers_count = await self.client_repository.count_created_since(company_id, dates["month_start"])
+        ticket_quantiles = await self._ticket_quantiles(company_id, company, {period: metrics.revenue_start})
+
+        return self._report_response(
+            period,
+            month_revenue=metrics.month_revenue_metrics(),
+            sales_month_change=metrics.monthly_sales_change(),
+            sales_counts=metrics.sales_counts(),
+            new_customers_count=new_customers_count,
+            active_customers_count=active_customers_count,
+            ticket_metrics=metrics.ticket_metrics(),
+            ticket_quantiles=ticket_quantiles[period],
+            category_distribution=metrics.category_distribution(),
+            sales_totals=metrics.revenue_in_period(),
+        )
+
+    @staticmethod
+    def _report_response(
+        period: str,
+        month_revenue: Dict[str, Any],
+        sales_month_change: Dict[str, Any],
+        sales_counts: Dict[str, Any],
+        new_customers_count: int,
+        active_customers_count: int,
+        ticket_metrics: Dict[str, Any],
+        ticket_quantiles: Dict[str, Optional[float]],
+        category_distribution: Dict[str, float],
+        sales_totals: Dict[str, float],
+    ) -> Dict[str, Any]:
         # -----------------------------
         # FINAL RESPONSE (structure ready for frontend)
         # -----------------------------
@@ -174,6 +612,7 @@ class SalesAnalyticsService:
                 "ticket": {
                     "average": ticket_metrics["average"],
                     "comparison": ticket_metrics["comparison"],
+                    **ticket_quantiles,
                 },
                 
                 "categoryDistribution": category_distribution,  # percentages
@@ -1,27 +1,102 @@
 from datetime import datetime
+import csv
+import io
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from bson import ObjectId
 from fastapi import HTTPException, status
+from pydantic import TypeAdapter, ValidationError
 from pymongo.errors import PyMongoError
-from ..schemas.sale_schemas import SaleCreate, SaleInDB
+from ..schemas.sale_schemas import SaleCreate, SaleImportRow, SaleInDB
 from ..schemas.client_schemas import ClientCreate  
-from ..services.client_services import ClientService
+from ..services.client_services import ClientService, new_client_document
 from ..services.inventory_services import InventoryService
+from ..repositories.sale_repository import SaleRepository
+from ..repositories.sale_archive_repository import SaleArchiveRepository
+from ..repositories.sales_daily_repository import SalesDailyRepository
+from ..repositories.product_repository import ProductRepository, product_sales_from_sales
+from ..repositories.client_repository import ClientRepository, client_spend_from_sales
+from ..repositories.company_repository import CompanyRepository
 import re
-from ..utils.helper_functions import serialize_mongo
+from ..utils.helper_functions import naive_utc, serialize_mongo
 import math
 from datetime import timedelta
 import logging
 from ..utils.sales_metrics import (
     get_date_ranges,
-    calculate_daily_metrics,
-    calculate_sales_totals,
-    calculate_ticket_metrics,
-    calculate_sales_counts
+    calculate_ticket_metrics_from_summaries
 )
+from ..utils.sales_metrics_columnar import create_sales_metrics
+from ..utils.response_cache import cached_company_response
+from ..infra.transactions import transactions_supported
 
 
 logger = logging.getLogger(__name__)
 
+# Sales export: formats, and sales per cursor batch / streamed chunk
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_CSV_HEADER = ("saleId", "date", "clientName", "productName", "quantity", "price", "total")
+SALES_EXPORT_BATCH_SIZE = int(os.getenv("SALES_EXPORT_BATCH_SIZE", 500))
+
+# Sales import: sales validated and written per batch, and per-row errors reported
+SALES_IMPORT_BATCH_SIZE = int(os.getenv("SALES_IMPORT_BATCH_SIZE", 1000))
+SALES_IMPORT_MAX_ERRORS = int(os.getenv("SALES_IMPORT_MAX_ERRORS", 100))
+SALE_IMPORT_ROW_ADAPTER = TypeAdapter(SaleImportRow)
+SALE_IMPORT_BATCH_ADAPTER = TypeAdapter(List[SaleImportRow])
+
+
+async def _ndjson_batches(chunks: AsyncIterator[bytes], batch_size: int) -> AsyncIterator[List[Tuple[int, bytes]]]:
+    """Split a byte stream into batches of non-blank (line number, line), numbered from 1."""
+    batch: List[Tuple[int, bytes]] = []
+    pending = b""
+    line_no = 0
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                batch.append((line_no, line))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if pending.strip():
+        batch.append((line_no + 1, pending))
+    if batch:
+        yield batch
+
+
+def _validate_import_batch(batch: List[Tuple[int, bytes]], report: Dict[str, Any]) -> List[Tuple[int, SaleImportRow]]:
+    """
+    Validate a batch of NDJSON lines. The whole batch is parsed as one JSON
+    array first; only if that fails is each line validated on its own to
+    report the bad ones.
+    """
+    try:
+        rows = SALE_IMPORT_BATCH_ADAPTER.validate_json(b"[" + b",".join(line for _, line in batch) + b"]")
+        if len(rows) == len(batch):
+            return [(line_no, row) for (line_no, _), row in zip(batch, rows)]
+    except ValidationError:
+        pass
+
+    valid = []
+    for line_no, line in batch:
+        try:
+            valid.append((line_no, SALE_IMPORT_ROW_ADAPTER.validate_json(line)))
+        except ValidationError as e:
+            _import_error(report, line_no, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc']) or 'line'}: {error['msg']}" for error in e.errors()
+            ))
+    return valid
+
+
+def _import_error(report: Dict[str, Any], line_no: int, message: str) -> None:
+    report["failed"] += 1
+    if len(report["errors"]) < SALES_IMPORT_MAX_ERRORS:
+        report["errors"].append({"line": line_no, "error": message})
+
 
 class SaleService:
     """
@@ -30,9 +105,14 @@ class SaleService:
 
     def __init__(self, db_client):
         self.db = db_client
-        self.company_collection = self.db.get_collection("company")
+        self.company_repository = CompanyRepository(db_client)
         self.client_service = ClientService(db_client) 
         self.inventory_service = InventoryService(db_client)
+        self.sale_repository = SaleRepository(db_client)
+        self.archive_repository = SaleArchiveRepository(db_client)
+        self.daily_repository = SalesDailyRepository(db_client)
+        self.product_repository = ProductRepository(db_client)
+        self.client_repository = ClientRepository(db_client)
 
     # dont forget to decrement inventory
     async def create_sale(self, sale_data: SaleCreate, company_id: str) -> dict:
@@ -53,8 +133,7 @@ class SaleService:
         """
         try:
             # Step 1: Validate company existence
-            company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
-            if not company:
+            if await self.company_repository.data_version(company_id) is None:
                 raise HTTPException(status_code=404, detail="Company not found")
 
             logger.info(f"Creating sale for company {company_id}")
@@ -69,25 +148,40 @@ class SaleService:
                     phone=None,
                     city=None
                 )
-                new_client = await self.client_service.create_client(company_id, client_data)
-                client_id = ObjectId(str(new_client.id))
+                try:
+                    new_client = await self.client_service.create_client(company_id, client_data)
+                    client_id = ObjectId(str(new_client.id))
+                except HTTPException as e:
+                    if e.status_code != status.HTTP_409_CONFLICT:
+                        raise
+                    # A concurrent sale created the same client first
+                    client = await self.client_service.get_client_by_name(company_id, sale_data.clientName)
+                    client_id = client["_id"]
             else:
                 client_id = client["_id"]
 
-            # Step 3: Resolve product IDs + validate stock
-            sale_items = []
-            inventory_updates = []
+            # Step 3: Resolve every product in one query + validate stock
+            products = await self._resolve_sale_products(company_id, [i.productName for i in sale_data.items])
+            requested: Dict[ObjectId, int] = {}
             for item in sale_data.items:
-                product = await self.inventory_service.get_product_by_name(company_id, item.productName)
-                product_id = product["_id"]
+                product = products[item.productName.casefold()]
+                requested[product["_id"]] = requested.get(product["_id"], 0) + item.quantity
+            for item in sale_data.items:
+                product = products[item.productName.casefold()]
                 current_qty = int(product.get("quantity", 0))
-
-                if current_qty < item.quantity:
+                if current_qty < requested[product["_id"]]:
                     raise HTTPException(
                         status_code=400,
-                        detail=f"Insufficient stock for product '{item.productName}'. Available: {current_qty}, Requested: {item.quantity}"
+                        detail=f"Insufficient stock for product '{item.productName}'. Available: {current_qty}, Requested: {requested[product['_id']]}"
                     )
 
+            sale_items = []
+            inventory_updates = []
+            category_totals = {}
+            for item in sale_data.items:
+                product = products[item.productName.casefold()]
+                product_id = product["_id"]
+
                 # Prepare sale item
                 sale_items.append({
                     "productId": product_id,
@@ -95,11 +189,11 @@ class SaleService:
                     "price": item.price
                 })
 
-                # Prepare inventory decrement operation
-                inventory_updates.append({
-                    "filter": {"_id": ObjectId(company_id), "inventory._id": product_id},
-                    "update": {"$inc": {"inventory.$.quantity": -item.quantity}}
-                })
+                # Prepare inventory decrement operation (with the product's sales counters)
+                inventory_updates.append((product_id, item.quantity, item.price * item.quantity))
+
+                category = product.get("category") or "Unknown"
+                category_totals[category] = category_totals.get(category, 0.0) + item.price * item.quantity
 
             # Step 4: Calculate total
             total = round(sum(i["price"] * i["quantity"] for i in sale_items), 2)
@@ -111,21 +205,14 @@ class SaleService:
                 "date": datetime.utcnow(),
             }
 
-            # Step 5: Save sale in company
-            result = await self.company_collection.update_one(
-                {"_id": ObjectId(company_id)},
-                {
-                    "$push": {"sales": sale_doc},
-                    "$set": {"updatedAt": datetime.utcnow()},
-                },
-            )
-
-            if result.modified_count == 0:
-                raise HTTPException(status_code=500, detail="Failed to register sale")
-
-            # Step 6: Decrement stock for each sold product
-            for op in inventory_updates:
-                await self.company_collection.update_one(op["filter"], op["update"])
+            # Step 5: Decrement stock and save the sale, all or nothing
+            if await transactions_supported(self.db):
+                async with await self.db.client.start_session() as session:
+                    await session.with_transaction(
+                        lambda s: self._apply_sale(company_id, sale_doc, category_totals, inventory_updates, products, s)
+                    )
+            else:
+                await self._apply_sale_without_transaction(company_id, sale_doc, category_totals, inventory_updates, products)
 
             logger.info(f"Sale created successfully for company {company_id} — Total: R${total}")
             return {"status": "success", "sale": serialize_mongo(sale_doc)}
@@ -143,6 +230,105 @@ class SaleService:
 
     
 
+    async def _resolve_sale_products(self, company_id: str, names) -> Dict[str, dict]:
+        """
+        Fetch the products of a sale with a single query, keyed by casefolded name.
+
+        Raises:
+            HTTPException(404): For the first item whose product does not exist.
+        """
+        products = await self.product_repository.find_by_names(company_id, names, "sale")
+        by_name = {p["name"].casefold(): p for p in products}
+        for name in names:
+            if name.casefold() not in by_name:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Product '{name}' not found in company inventory."
+                )
+        return by_name
+
+    async def _apply_sale(self, company_id: str, sale_doc: dict, category_totals, inventory_updates, products, session) -> None:
+        """
+        Write a sale inside a transaction: guarded stock decrements (in item
+        order, stopping at the first that lacks stock), the sale, its daily
+        rollup, the client counters and the company version. Raising aborts the
+        transaction, so nothing is left half-applied.
+        """
+        failed = await self.product_repository.decrement_stocks(
+            company_id, inventory_updates, sale_doc["date"], session=session
+        )
+        if failed is not None:
+            await self._raise_insufficient_stock(company_id, inventory_updates, failed, products)
+
+        await self.sale_repository.insert_sale(company_id, sale_doc, category_totals, session=session)
+        await self.daily_repository.record_sale(company_id, sale_doc, category_totals, session=session)
+        await self.client_repository.record_purchase(
+            company_id, sale_doc["clientId"], sale_doc["total"], sale_doc["date"], session=session
+        )
+        # Last write: bumps the company's data version, invalidating cached overviews
+        await self.company_repository.touch(company_id, session=session)
+
+    async def _apply_sale_without_transaction(
+        self, company_id: str, sale_doc: dict, category_totals, inventory_updates, products
+    ) -> None:
+        """
+        Same writes as `_apply_sale` for servers without transactions. Stock is
+        decremented first, one guarded write per item; if one fails, the earlier
+        ones are restored before the sale is rejected.
+
+        If a later write fails, the stock is restored and the sale document
+        removed before the error is raised. A day rollup or client counter
+        already written keeps the rejected sale: they are derived figures, off
+        by that one sale (a HyperLogLog register cannot be lowered anyway).
+        """
+        done = []
+        for index, (product_id, quantity, revenue) in enumerate(inventory_updates):
+            ok = await self.product_repository.decrement_stock(
+                company_id, product_id, quantity, revenue=revenue, sold_at=sale_doc["date"], guarded=True
+            )
+            if not ok:
+                await self._restore_sale_stock(company_id, done)
+                await self._raise_insufficient_stock(company_id, inventory_updates, index, products)
+            done.append((product_id, quantity, revenue))
+
+        sale_written = False
+        try:
+            await self.sale_repository.insert_sale(company_id, sale_doc, category_totals)
+            sale_written = True
+            await self.daily_repository.record_sale(company_id, sale_doc, category_totals)
+            await self.client_repository.record_purchase(company_id, sale_doc["clientId"], sale_doc["total"], sale_doc["date"])
+            # Last write: bumps the company's data version, invalidating cached overviews
+            await self.company_repository.touch(company_id)
+        except Exception:
+            try:
+                if sale_written:
+                    await self.sale_repository.remove_sale(company_id, sale_doc, category_totals)
+                await self._restore_sale_stock(company_id, done)
+            except PyMongoError:
+                logger.exception(f"Could not undo the failed sale {sale_doc['_id']} of company {company_id}")
+            raise
+
+    async def _restore_sale_stock(self, company_id: str, done) -> None:
+        """Give back the stock (and sales counters) of applied decrements, latest first."""
+        for product_id, quantity, revenue in reversed(done):
+            await self.product_repository.restore_stock(company_id, product_id, quantity, revenue)
+
+    async def _raise_insufficient_stock(self, company_id: str, inventory_updates, failed: int, products: Dict[str, dict]) -> None:
+        """
+        Raise the 400 for the decrement at index `failed`, rejected by its stock
+        guard (a concurrent sale won). Like the precheck, it reports the sale's
+        total quantity of that product against its committed stock.
+        """
+        product_id = inventory_updates[failed][0]
+        requested = sum(quantity for pid, quantity, _ in inventory_updates if pid == product_id)
+        name = next(p["name"] for p in products.values() if p["_id"] == product_id)
+        product = await self.product_repository.find_by_name(company_id, name)
+        available = int(product.get("quantity", 0)) if product else 0
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insufficient stock for product '{name}'. Available: {available}, Requested: {requested}"
+        )
+
     async def get_all_sales(self, company_id: str):
         """
     Retrieve all sales for a given company, returning enriched and serialized data.
@@ -177,13 +363,15 @@ class SaleService:
         HTTPException(404): Company not found.
     """
 
-        company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+        company = await self.company_repository.find_by_id(company_id)
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
 
-        sales = company.get("sales", [])
-        clients = {str(c["_id"]): c for c in company.get("clients", [])}
-        inventory = {str(p["_id"]): p for p in company.get("inventory", [])}
+        sales = await self.sale_repository.find_company_sales(company_id)
+        products = await self.product_repository.list_company_products(company_id, "names")
+        client_list = await self.client_repository.list_company_clients(company_id, "names")
+        clients = {str(c["_id"]): c for c in client_list}
+        inventory = {str(p["_id"]): p for p in products}
 
         result = []
 
@@ -213,7 +401,332 @@ class SaleService:
 
         # Serialize possible ObjectIds/dates
         return serialize_mongo(result)
-    
+
+    async def export_sales(
+        self,
+        company_id: str,
+        fmt: str = "ndjson",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        include_archived: bool = False,
+    ) -> AsyncIterator[str]:
+        """
+        Validate an export of the company's sales and return its body as an
+        async iterator of text chunks (see `_export_chunks`).
+
+        The sales are read through a cursor and written out as they arrive, so
+        memory stays flat whatever the number of sales; only the client and
+        product names are loaded upfront.
+
+        Raises:
+            HTTPException(400): Invalid format.
+            HTTPException(404): Company not found.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid format. Use one of: {', '.join(EXPORT_FORMATS)}."
+            )
+
+        start, end = naive_utc(start), naive_utc(end)
+
+        # Checked before the response starts: errors cannot be reported mid-stream
+        if await self.company_repository.data_version(company_id) is None:
+            raise HTTPException(status_code=404, detail="Company not found")
+
+        products = await self.product_repository.list_company_products(company_id, "names")
+        clients = await self.client_repository.list_company_clients(company_id, "names")
+        product_names = {str(p["_id"]): p["name"] for p in products}
+        client_names = {str(c["_id"]): c["name"] for c in clients}
+
+        return self._export_chunks(company_id, fmt, start, end, include_archived, client_names, product_names)
+
+    async def _export_chunks(
+        self,
+        company_id: str,
+        fmt: str,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        include_archived: bool,
+        client_names: Dict[str, str],
+        product_names: Dict[str, str],
+    ) -> AsyncIterator[str]:
+        """
+        Yield the export in chunks of SALES_EXPORT_BATCH_SIZE sales.
+
+        NDJSON: one sale per line, shaped like `get_all_sales`.
+        CSV: one row per sale item (saleId, date, clientName, productName,
+        quantity, price, total), the sale's total repeated on each of its rows.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == "csv" else None
+        if writer:
+            writer.writerow(EXPORT_CSV_HEADER)
+
+        pending = 0
+        async for sale in self._iter_export_sales(company_id, start, end, include_archived):
+            client_name = client_names.get(str(sale.get("clientId")), "Unknown Client")
+            items = [
+                {
+                    "productName": product_names.get(str(item.get("productId")), "Unknown Product"),
+                    "quantity": item["quantity"],
+                    "price": item["price"],
+                }
+                for item in sale.get("items", [])
+            ]
+            sale_id = str(sale["_id"])
+            total = round(float(sale["total"]), 2)
+            date = sale["date"].isoformat() if isinstance(sale["date"], datetime) else sale["date"]
+
+            if writer:
+                for item in items:
+                    writer.writerow([sale_id, date, client_name, item["productName"], item["quantity"], item["price"], total])
+            else:
+                buffer.write(json.dumps(
+                    {"_id": sale_id, "clientName": client_name, "items": items, "total": total, "date": date},
+                    ensure_ascii=False,
+                ))
+                buffer.write("\n")
+
+            pending += 1
+            if pending >= SALES_EXPORT_BATCH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    async def _iter_export_sales(
+        self,
+        company_id: str,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        include_archived: bool,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Archived months first (one month in memory at a time), then the stored sales."""
+        if include_archived:
+            for month in await self.archive_repository.find_summaries(company_id, start):
+                if end is not None and month["month"] >= end:
+                    break
+                for sale in await self.archive_repository.load_sales(company_id, month["month"]):
+                    date = sale.get("date")
+                    if (start is None or date >= start) and (end is None or date < end):
+                        yield sale
+
+        async for sale in self.sale_repository.iter_company_sales(
+            company_id, start, end, batch_size=SALES_EXPORT_BATCH_SIZE
+        ):
+            yield sale
+
+    async def import_sales(
+        self,
+        company_id: str,
+        chunks: AsyncIterator[bytes],
+        decrement_stock: bool = True,
+        batch_size: int = SALES_IMPORT_BATCH_SIZE,
+    ) -> dict:
+        """
+        Import sales from an NDJSON stream, one `SaleImportRow` per line.
+
+        Lines are validated and written `batch_size` at a time: client and
+        product names are resolved with one query each per batch, unknown
+        clients are created, and every collection touched by `create_sale` gets
+        one bulk write per batch. Invalid rows (bad JSON or fields, unknown
+        product, not enough stock) are skipped and reported with their line
+        number; the rest of the import goes on.
+
+        Batches are not transactional. If a database error stops the import,
+        the batches written before it stay imported; the failing batch's
+        sales, stock and product counters are undone (see `_import_batch`).
+
+        Args:
+            decrement_stock: False for historical imports, whose units already
+                left the inventory. Product sales counters are updated either way.
+
+        Returns:
+            dict: Row counts, the first SALES_IMPORT_MAX_ERRORS errors and the throughput.
+
+        Raises:
+            HTTPException(404): If the company does not exist.
+            HTTPException(500): On database errors (the response tells how many
+                sales were imported before the error).
+        """
+        if await self.company_repository.data_version(company_id) is None:
+            raise HTTPException(status_code=404, detail="Company not found")
+
+        report: Dict[str, Any] = {"received": 0, "imported": 0, "failed": 0, "errors": []}
+        started = time.perf_counter()
+        try:
+            async for batch in _ndjson_batches(chunks, batch_size):
+                report["received"] += len(batch)
+                rows = _validate_import_batch(batch, report)
+                report["imported"] += await self._import_batch(company_id, rows, decrement_stock, report)
+        except PyMongoError as e:
+            logger.exception("Database error while importing sales")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Database error after importing {report['imported']} sales: {str(e)}"
+            )
+        finally:
+            if report["imported"]:
+                # Bumps the company's data version, invalidating cached overviews
+                await self.company_repository.touch(company_id)
+
+        elapsed = time.perf_counter() - started
+        report["errors"].sort(key=lambda error: error["line"])
+        logger.info(f"Imported {report['imported']}/{report['received']} sales for company {company_id} in {elapsed:.2f}s")
+        return {
+            "status": "success",
+            **report,
+            "elapsedSeconds": round(elapsed, 3),
+            "salesPerSecond": round(report["imported"] / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    async def _import_batch(self, company_id: str, rows, decrement_stock: bool, report: Dict[str, Any]) -> int:
+        """Resolve, check and write one batch of validated (line, SaleImportRow). Returns the sales written."""
+        if not rows:
+            return 0
+
+        products = {
+            p["name"].casefold(): p
+            for p in await self.product_repository.find_by_names(
+                company_id, {i.productName for _, row in rows for i in row.items}, "sale"
+            )
+        }
+        available = {p["_id"]: int(p.get("quantity", 0)) for p in products.values()}
+
+        now = datetime.utcnow()
+        accepted = []
+        lines: Dict[ObjectId, int] = {}
+        for line, row in rows:
+            missing = next((i.productName for i in row.items if i.productName.casefold() not in products), None)
+            if missing:
+                _import_error(report, line, f"Product '{missing}' not found in company inventory.")
+                continue
+
+            # Stock is checked against the batch's read, minus the rows accepted before
+            requested: Dict[str, int] = {}
+            for item in row.items:
+                requested[item.productName.casefold()] = requested.get(item.productName.casefold(), 0) + item.quantity
+            if decrement_stock:
+                short = next((name for name, qty in requested.items() if available[products[name]["_id"]] < qty), None)
+                if short:
+                    _import_error(
+                        report, line,
+                        f"Insufficient stock for product '{products[short]['name']}'. Available: {available[products[short]['_id']]}, Requested: {requested[short]}"
+                    )
+                    continue
+                for name, quantity in requested.items():
+                    available[products[name]["_id"]] -= quantity
+
+            sale_items = []
+            category_totals: Dict[str, float] = {}
+            for item in row.items:
+                product = products[item.productName.casefold()]
+                sale_items.append({"productId": product["_id"], "quantity": item.quantity, "price": item.price})
+                category = product.get("category") or "Unknown"
+                category_totals[category] = category_totals.get(category, 0.0) + item.price * item.quantity
+
+            sale_doc = {
+                "_id": ObjectId(),
+                "clientName": row.clientName,
+                "items": sale_items,
+                "total": round(sum(i["price"] * i["quantity"] for i in sale_items), 2),
+                "date": naive_utc(row.date) if row.date else now,
+            }
+            accepted.append((sale_doc, category_totals))
+            lines[sale_doc["_id"]] = line
+
+        if not accepted:
+            return 0
+
+        # Clients first, like create_sale: nothing has touched the stock yet
+        clients = await self._resolve_import_clients(company_id, {sale_doc["clientName"] for sale_doc, _ in accepted})
+        for sale_doc, _ in accepted:
+            sale_doc["clientId"] = clients[sale_doc.pop("clientName")]
+
+        short = await self.product_repository.add_sales_counters(
+            company_id, product_sales_from_sales([sale_doc for sale_doc, _ in accepted]), decrement_stock
+        )
+        if short:
+            # A concurrent sale took the stock after our read: reject the rows of
+            # those products and give back what they took from their other products
+            accepted = await self._reject_short_import_rows(company_id, accepted, set(short), lines, report)
+            if not accepted:
+                return 0
+
+        sales = [sale_doc for sale_doc, _ in accepted]
+        try:
+            await self.sale_repository.insert_sales(company_id, accepted)
+            await self.daily_repository.record_sales(company_id, accepted)
+            await self.client_repository.add_spend_aggregates(company_id, client_spend_from_sales(sales))
+        except Exception:
+            # Undo the batch's sales (even partially written) and its stock and
+            # counters. Day rollups or client aggregates already written keep the
+            # batch, like a failed create_sale's do.
+            try:
+                await self.sale_repository.remove_sales(company_id, accepted)
+                await self.product_repository.remove_sales_counters(
+                    company_id, product_sales_from_sales(sales), decrement_stock
+                )
+            except PyMongoError:
+                logger.exception(f"Could not undo a failed sale import batch of company {company_id}")
+            raise
+        return len(accepted)
+
+    async def _reject_short_import_rows(self, company_id: str, accepted, short: set, lines: Dict[ObjectId, int], report: Dict[str, Any]):
+        """
+        Drop the accepted rows that sell a product whose guarded decrement failed,
+        reporting them as insufficient stock, and restore the stock and counters
+        those rows added to their other products. Returns the remaining rows.
+        """
+        kept, dropped = [], []
+        for sale_doc, category_totals in accepted:
+            if any(item["productId"] in short for item in sale_doc["items"]):
+                dropped.append((sale_doc, category_totals))
+            else:
+                kept.append((sale_doc, category_totals))
+
+        await self.product_repository.remove_sales_counters(company_id, {
+            product_id: entry
+            for product_id, entry in product_sales_from_sales([sale_doc for sale_doc, _ in dropped]).items()
+            if product_id not in short
+        })
+
+        products = {
+            p["_id"]: p
+            for p in await self.product_repository.find_by_ids(company_id, short, "sale")
+        }
+        for sale_doc, _ in dropped:
+            requested: Dict[ObjectId, int] = {}
+            for item in sale_doc["items"]:
+                requested[item["productId"]] = requested.get(item["productId"], 0) + item["quantity"]
+            product_id = next(pid for pid in requested if pid in short)
+            product = products.get(product_id) or {"name": str(product_id)}
+            _import_error(
+                report, lines[sale_doc["_id"]],
+                f"Insufficient stock for product '{product['name']}'. Available: {int(product.get('quantity', 0))}, Requested: {requested[product_id]}"
+            )
+        return kept
+
+    async def _resolve_import_clients(self, company_id: str, names) -> Dict[str, ObjectId]:
+        """Map client names to their _id, creating the missing clients in one write."""
+        clients = {c["name"]: c["_id"] for c in await self.client_repository.find_by_names(company_id, names, "names")}
+        missing = [name for name in names if name not in clients]
+        if missing:
+            # Same client documents as the ones create_sale creates
+            await self.client_repository.insert_clients(company_id, [
+                new_client_document(ClientCreate(name=name, email=None, phone=None, city=None))
+                for name in missing
+            ])
+            # Re-read: clients created concurrently keep their own _id
+            for c in await self.client_repository.find_by_names(company_id, missing, "names"):
+                clients[c["name"]] = c["_id"]
+        return clients
+
+    @cached_company_response("sales_overview")
     async def get_sales_overview(self, company_id: str):
         """
             Retrieve a summarized sales overview for a given company.
@@ -238,40 +751,103 @@ class SaleService:
                 HTTPException: If the company does not exist (404).
         """
 
-        company = await self.company_collection.find_one({"_id": ObjectId(company_id)})
+        company = await self.company_repository.find_by_id(company_id, "sales_rollups")
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
 
-        sales = company.get("sales", [])
-        if not sales:
-            return {
-                "todayTotal": 0.0,
-                "yesterdayComparison": 0.0,
-                "totalSales": 0.0,
-                "weekSales": 0.0,
-                "averageTicket": 0.0,
-                "averageTicketComparison": 0.0,
-            }
+        if self.sale_repository.layout == "bucket":
+            return await self._get_sales_overview_from_summaries(company_id)
+
+        if company.get("salesDailyBackfilledAt"):
+            return await self._get_sales_overview_from_rollups(company_id)
+
+        sales = await self.sale_repository.find_company_sales(company_id)
+        archived = await self.archive_repository.find_summaries(company_id)
+        if not sales and not archived:
+            return self._empty_sales_overview()
+
+        # Metrics (single pass over the sales)
+        metrics = create_sales_metrics(dates=get_date_ranges())
+        metrics.add_all(sales)
+        metrics.add_archived(archived)
+
+        daily = metrics.daily_metrics()
+        tickets = metrics.ticket_metrics()
+        sales_counts = metrics.sales_counts()
+
+        return {
+                "today": {
+                    "total": daily["today_total"],
+                    "comparison": daily["comparison"]
+                },
+                "sales": {
+                    "total": sales_counts["totalCount"],
+                    "week": sales_counts["weekCount"],
+                },
+                "ticket": {
+                    "average": tickets["average"],
+                    "comparison": tickets["comparison"]
+                }
+        }
+
+    async def _get_sales_overview_from_summaries(self, company_id: str):
+        """
+        Bucket-layout variant of `get_sales_overview`.
 
-        # Dates
+        Monthly and all-time figures come from the precomputed bucket totals;
+        only the last 7 days of sales are loaded for the daily/weekly figures.
+        """
         dates = get_date_ranges()
 
-        # Metrics
-        daily = calculate_daily_metrics(
-            sales,
-            dates["today_start"],
-            dates["yesterday_start"]
-        )
-        tickets = calculate_ticket_metrics(
-            sales,
-            dates["month_start"],
-            dates["last_month_start"],
-            dates["last_month_end"]
-        )
-        sales_counts = calculate_sales_counts(
-            sales,
-            dates["week_start"]
-        )
+        overall = await self.sale_repository.get_overall_summary(company_id)
+        if overall["count"] == 0:
+            return self._empty_sales_overview()
+
+        current_month, last_month, _ = await self.sale_repository.get_report_month_summaries(company_id, dates)
+        recent_sales = await self.sale_repository.find_company_sales(company_id, start=dates["week_start"])
+        recent = create_sales_metrics(dates=dates).add_all(recent_sales)
+
+        daily = recent.daily_metrics()
+        tickets = calculate_ticket_metrics_from_summaries(overall, current_month, last_month)
+        sales_counts = recent.sales_counts()
+
+        return {
+                "today": {
+                    "total": daily["today_total"],
+                    "comparison": daily["comparison"]
+                },
+                "sales": {
+                    "total": overall["count"],
+                    "week": sales_counts["weekCount"],
+                },
+                "ticket": {
+                    "average": tickets["average"],
+                    "comparison": tickets["comparison"]
+                }
+        }
+
+    async def _get_sales_overview_from_rollups(self, company_id: str):
+        """
+        Rollup variant of `get_sales_overview` (companies with backfilled
+        'sales_daily' documents).
+
+        Every overview window starts at midnight, so the figures are read from
+        the day rollups since last month; older days only contribute to the
+        all-time totals, aggregated in the database.
+        """
+        dates = get_date_ranges()
+
+        metrics = create_sales_metrics(dates=dates)
+        metrics.add_rollup_totals(await self.daily_repository.total_before(company_id, dates["last_month_start"]))
+        for rollup in await self.daily_repository.find_days(company_id, start=dates["last_month_start"]):
+            metrics.add_rollup(rollup)
+
+        if metrics.count == 0:
+            return self._empty_sales_overview()
+
+        daily = metrics.daily_metrics()
+        tickets = metrics.ticket_metrics()
+        sales_counts = metrics.sales_counts()
 
         return {
                 "today": {
@@ -288,3 +864,13 @@ class SaleService:
                 }
         }
 
+    @staticmethod
+    def _empty_sales_overview():
+        return {
+            "todayTotal": 0.0,
+            "yesterdayComparison": 0.0,
+            "totalSales": 0.0,
+            "weekSales": 0.0,
+            "averageTicket": 0.0,
+            "averageTicketComparison": 0.0,
+        }
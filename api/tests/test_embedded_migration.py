@@ -0,0 +1,88 @@
+"""
+Embedded arrays are only unset once everything in them was copied, even when
+a concurrent writer changes them during the migration (fake collections).
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from api.repositories import embedded_migration
+from api.repositories.embedded_migration import MIGRATION_ATTEMPTS, ensure_embedded_array_migrated
+
+
+class FakeCompanyCollection:
+    """One company document; `pushes` are elements a concurrent writer appends, one per unset."""
+
+    def __init__(self, items, pushes=()):
+        self.document = {"_id": ObjectId(), "inventory": list(items)}
+        self.pushes = list(pushes)
+        self.unsets = 0
+
+    async def find_one(self, query, projection):
+        if "inventory" not in self.document:
+            return None
+        return {"_id": self.document["_id"], "inventory": list(self.document["inventory"])}
+
+    async def update_one(self, query, update):
+        self.unsets += 1
+        if self.pushes:
+            self.document["inventory"].append(self.pushes.pop(0))
+        if "inventory" in self.document and self.document["inventory"] == query["inventory"]:
+            del self.document["inventory"]
+            return SimpleNamespace(matched_count=1)
+        return SimpleNamespace(matched_count=0)
+
+
+class FakeTargetCollection:
+    def __init__(self):
+        self.documents = {}
+
+    async def bulk_write(self, ops, ordered):
+        for op in ops:
+            self.documents.setdefault(op._filter["_id"], op._doc["$setOnInsert"])
+
+
+def item(name):
+    return {"_id": ObjectId(), "name": name}
+
+
+@pytest.fixture(autouse=True)
+def forget_migrations(monkeypatch):
+    monkeypatch.setattr(embedded_migration, "_migrated", set())
+
+
+def migrate(company, target):
+    asyncio.run(ensure_embedded_array_migrated(company, target, company.document["_id"], "inventory"))
+
+
+def test_array_is_moved_then_unset():
+    company, target = FakeCompanyCollection([item("Pen"), item("Mug")]), FakeTargetCollection()
+    migrate(company, target)
+
+    assert "inventory" not in company.document
+    assert sorted(doc["name"] for doc in target.documents.values()) == ["Mug", "Pen"]
+
+
+def test_elements_added_during_the_migration_are_not_lost():
+    company = FakeCompanyCollection([item("Pen")], pushes=[item("Mug"), item("Cup")])
+    target = FakeTargetCollection()
+    migrate(company, target)
+
+    assert company.unsets == 3
+    assert "inventory" not in company.document
+    assert sorted(doc["name"] for doc in target.documents.values()) == ["Cup", "Mug", "Pen"]
+
+
+def test_array_that_keeps_changing_is_left_for_the_next_access():
+    pushes = [item(f"Item {i}") for i in range(MIGRATION_ATTEMPTS)]
+    company, target = FakeCompanyCollection([item("Pen")], pushes), FakeTargetCollection()
+    migrate(company, target)
+
+    assert len(company.document["inventory"]) == MIGRATION_ATTEMPTS + 1
+    assert len(target.documents) == MIGRATION_ATTEMPTS
+
+    migrate(company, target)
+    assert "inventory" not in company.document
+    assert len(target.documents) == MIGRATION_ATTEMPTS + 1
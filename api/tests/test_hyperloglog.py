@@ -0,0 +1,57 @@
+"""
+HyperLogLog distinct counts stay within their error bound and merge like a
+set union.
+"""
+import math
+
+import pytest
+from bson import ObjectId
+
+from api.utils.hyperloglog import HLL_REGISTERS, HyperLogLog
+
+
+# Three standard errors (1.04 / sqrt(m), about 0.8% each)
+ERROR_BOUND = 3 * 1.04 / math.sqrt(HLL_REGISTERS)
+
+
+def sketch_of(values):
+    sketch = HyperLogLog()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_empty_sketch_counts_zero():
+    assert HyperLogLog().count() == 0
+
+
+@pytest.mark.parametrize("distinct", [10, 1000, 50_000, 200_000])
+def test_count_is_within_the_error_bound(distinct):
+    sketch = sketch_of(f"client-{i}" for i in range(distinct))
+    assert abs(sketch.count() - distinct) <= max(1, ERROR_BOUND * distinct)
+
+
+def test_duplicates_are_counted_once():
+    sketch = sketch_of(f"client-{i % 500}" for i in range(20_000))
+    assert abs(sketch.count() - 500) <= ERROR_BOUND * 500
+
+
+def test_objectid_and_its_hex_string_are_the_same_customer():
+    client_id = ObjectId()
+    assert sketch_of([client_id, str(client_id)]).count() == 1
+
+
+def test_merged_day_sketches_count_the_union():
+    # Three "days" of buyers that overlap
+    days = [range(0, 30_000), range(20_000, 50_000), range(45_000, 60_000)]
+    stored = [sketch_of(f"client-{i}" for i in day).to_document() for day in days]
+
+    merged = HyperLogLog().merge_all(stored)
+    assert merged.registers == sketch_of(f"client-{i}" for i in range(60_000)).registers
+    assert abs(merged.count() - 60_000) <= ERROR_BOUND * 60_000
+
+
+def test_stored_sketch_uses_string_register_keys():
+    document = sketch_of(["a", "b"]).to_document()
+    assert all(isinstance(key, str) for key in document)
+    assert HyperLogLog().merge(document).count() == 2
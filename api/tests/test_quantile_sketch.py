@@ -0,0 +1,87 @@
+"""
+Quantile sketches return, for each quantile, a value within
+QUANTILE_RELATIVE_ACCURACY of the value actually at that rank.
+"""
+import math
+import random
+
+import pytest
+
+from api.utils.quantile_sketch import (
+    QUANTILE_RELATIVE_ACCURACY,
+    TICKET_QUANTILES,
+    QuantileSketch,
+    sketch_bucket,
+)
+
+
+QUANTILES = (0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0)
+
+
+def exact_quantile(values, q):
+    """Value at rank floor(q * (n - 1)), the rank the sketch targets."""
+    ordered = sorted(values)
+    return ordered[math.floor(q * (len(ordered) - 1))]
+
+
+def assert_within_accuracy(estimate, exact):
+    # Plus half a cent: estimates are rounded to 2 decimals
+    assert abs(estimate - exact) <= QUANTILE_RELATIVE_ACCURACY * exact + 0.005, (estimate, exact)
+
+
+def tickets(seed, count):
+    rng = random.Random(seed)
+    return [round(rng.lognormvariate(4, 1.2), 2) for _ in range(count)]
+
+
+def test_empty_sketch_has_no_quantiles():
+    assert QuantileSketch().quantiles() == {name: None for name in TICKET_QUANTILES}
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("q", QUANTILES)
+def test_quantile_is_within_the_relative_accuracy(seed, q):
+    values = tickets(seed, 5000)
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+
+    assert_within_accuracy(sketch.quantile(q), exact_quantile(values, q))
+
+
+def test_single_value():
+    sketch = QuantileSketch()
+    sketch.add(42.5)
+    for q in QUANTILES:
+        assert_within_accuracy(sketch.quantile(q), 42.5)
+
+
+def test_non_positive_values_share_the_zero_bucket():
+    assert sketch_bucket(0) == sketch_bucket(-3.5) == "z"
+
+    sketch = QuantileSketch()
+    for value in (0, 0, 0, 10):
+        sketch.add(value)
+    assert sketch.quantile(0.5) == 0.0
+    assert_within_accuracy(sketch.quantile(1.0), 10)
+
+
+def test_merged_day_sketches_equal_one_sketch():
+    values = tickets(7, 3000)
+    days = [values[i:i + 500] for i in range(0, len(values), 500)]
+    stored = []
+    for day in days:
+        sketch = QuantileSketch()
+        for value in day:
+            sketch.add(value)
+        stored.append(sketch.to_document())
+
+    merged = QuantileSketch().merge_all(stored)
+    whole = QuantileSketch()
+    for value in values:
+        whole.add(value)
+
+    assert merged.count == len(values)
+    assert merged.buckets == whole.buckets
+    for name, q in TICKET_QUANTILES.items():
+        assert_within_accuracy(merged.quantiles()[name], exact_quantile(values, q))
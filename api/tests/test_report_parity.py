@@ -0,0 +1,140 @@
+"""
+Parity between the "python" and "mongo" backends of the sales report.
+
+A generated tenant (company, products, clients and sales) is written to a
+dedicated test database, the advanced report is computed with both backends for
+every period, and the payloads must match. The Python backend is the reference
+implementation.
+
+Needs a MongoDB server; the tests are skipped unless TEST_MONGO_URI is set:
+
+    TEST_MONGO_URI=mongodb://localhost:27017 python -m pytest api/tests
+
+TEST_MONGO_DB names the database (default "report_parity_test"); it must not be
+the application's MONGO_DB. The generated tenant is deleted afterwards.
+"""
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from api.services.report_services import SalesAnalyticsService
+from api.utils.response_cache import response_cache
+
+
+TEST_MONGO_URI = os.getenv("TEST_MONGO_URI")
+TEST_MONGO_DB = os.getenv("TEST_MONGO_DB", "report_parity_test")
+
+PERIODS = ("7d", "30d", "6m", "1y")
+CATEGORIES = ("Eletrônicos", "Roupas", "Alimentos", None)
+SALES_COUNT = 3000
+SEED = 42
+
+# Revenue sums are done in a different order by MongoDB; allow rounding noise.
+TOLERANCE = 0.011
+
+pytestmark = pytest.mark.skipif(not TEST_MONGO_URI, reason="TEST_MONGO_URI is not set")
+
+
+async def generate_tenant(db, sales_count: int, seed: int) -> ObjectId:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    company_id = ObjectId()
+
+    await db.get_collection("company").insert_one({
+        "_id": company_id,
+        "name": "report-parity-test",
+        "createdAt": now,
+    })
+
+    products = [
+        {"_id": ObjectId(), "companyId": company_id, "name": f"Product {i}",
+         "category": rng.choice(CATEGORIES), "price": round(rng.uniform(5, 500), 2), "quantity": 1000}
+        for i in range(40)
+    ]
+    await db.get_collection("products").insert_many(products)
+
+    clients = [
+        {"_id": ObjectId(), "companyId": company_id, "name": f"Client {i}",
+         "createdAt": now - timedelta(days=rng.randint(0, 400))}
+        for i in range(200)
+    ]
+    await db.get_collection("clients").insert_many(clients)
+
+    sales = []
+    for _ in range(sales_count):
+        items = []
+        for product in rng.sample(products, rng.randint(1, 3)):
+            items.append({"productId": product["_id"], "quantity": rng.randint(1, 4), "price": product["price"]})
+        sales.append({
+            "_id": ObjectId(),
+            "companyId": company_id,
+            "clientId": rng.choice(clients)["_id"],
+            "items": items,
+            "total": round(sum(i["price"] * i["quantity"] for i in items), 2),
+            "date": now - timedelta(seconds=rng.randint(0, 420 * 86400)),
+        })
+    await db.get_collection("sales").insert_many(sales)
+
+    return company_id
+
+
+async def delete_tenant(db, company_id: ObjectId) -> None:
+    for name in ("sales", "products", "clients"):
+        await db.get_collection(name).delete_many({"companyId": company_id})
+    await db.get_collection("company").delete_one({"_id": company_id})
+
+
+def compare(expected: Any, actual: Any, path: str = "") -> List[str]:
+    """Return the differences between two report payloads."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        diffs = []
+        if list(expected) != list(actual):
+            diffs.append(f"{path or '/'}: keys {list(expected)} != {list(actual)}")
+        for key in expected.keys() & actual.keys():
+            diffs.extend(compare(expected[key], actual[key], f"{path}/{key}"))
+        return diffs
+
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        return [] if abs(expected - actual) <= TOLERANCE else [f"{path}: {expected} != {actual}"]
+
+    return [] if expected == actual else [f"{path}: {expected!r} != {actual!r}"]
+
+
+async def compute_reports() -> Dict[str, Dict[str, Any]]:
+    """Return {period: {"python": report, "mongo": report}} for a generated tenant."""
+    client = AsyncIOMotorClient(TEST_MONGO_URI)
+    db = client[TEST_MONGO_DB]
+    company_id = await generate_tenant(db, SALES_COUNT, SEED)
+    try:
+        reports: Dict[str, Dict[str, Any]] = {}
+        for period in PERIODS:
+            reports[period] = {}
+            for backend in ("python", "mongo"):
+                # Both backends share the response cache key: compute each one for real
+                response_cache.clear()
+                service = SalesAnalyticsService(db, backend=backend)
+                reports[period][backend] = await service.get_advanced_sales_overview(str(company_id), period)
+        return reports
+    finally:
+        response_cache.clear()
+        await delete_tenant(db, company_id)
+        client.close()
+
+
+@pytest.fixture(scope="module")
+def reports():
+    if TEST_MONGO_DB == os.getenv("MONGO_DB"):
+        pytest.fail("TEST_MONGO_DB must not be the application's database (MONGO_DB)")
+    return asyncio.run(compute_reports())
+
+
+@pytest.mark.parametrize("period", PERIODS)
+def test_mongo_backend_matches_python_backend(reports, period):
+    diffs = compare(reports[period]["python"], reports[period]["mongo"])
+    assert not diffs, "\n".join(diffs)
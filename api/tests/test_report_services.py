@@ -0,0 +1,119 @@
+"""
+Reports read from the day rollups must match the live-sales computation,
+including when a period starts on an archived day (fake repositories).
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from api.repositories.sale_archive_repository import summarize_sales
+from api.repositories.sales_daily_repository import day_floor
+from api.services.report_services import SalesAnalyticsService
+from api.utils.sales_metrics import get_date_ranges
+from api.utils.sales_metrics_engine import SalesMetricsAccumulator
+
+
+TOLERANCE = 0.011
+
+
+def make_sales(rng, products, start, end, count):
+    sales = []
+    for _ in range(count):
+        items = [
+            {"productId": product["_id"], "quantity": rng.randint(1, 3), "price": round(rng.uniform(1, 100), 2)}
+            for product in rng.sample(products, 2)
+        ]
+        sales.append({
+            "_id": ObjectId(),
+            "clientId": ObjectId(),
+            "items": items,
+            "total": round(sum(i["price"] * i["quantity"] for i in items), 2),
+            "date": start + (end - start) * rng.random(),
+        })
+    sales.sort(key=lambda s: s["date"])
+    return sales
+
+
+def rollups_of(days):
+    """Day rollups with the fields the report folds, from archive-style day summaries."""
+    return sorted(
+        ({**day, "day": datetime.strptime(key, "%Y-%m-%d")} for key, day in days.items()),
+        key=lambda rollup: rollup["day"],
+    )
+
+
+class FakeDailyRepository:
+    def __init__(self, rollups):
+        self.rollups = rollups
+
+    async def total_before(self, company_id, before):
+        older = [r for r in self.rollups if r["day"] < before]
+        return {"count": sum(r["count"] for r in older), "revenue": sum(r["revenue"] for r in older)}
+
+    async def find_days(self, company_id, start=None, end=None):
+        return [
+            r for r in self.rollups
+            if (start is None or r["day"] >= start) and (end is None or r["day"] < end)
+        ]
+
+
+class FakeSaleRepository:
+    def __init__(self, sales):
+        self.sales = sales
+
+    async def find_company_sales(self, company_id, start=None, end=None):
+        return [
+            s for s in self.sales
+            if (start is None or s["date"] >= start) and (end is None or s["date"] < end)
+        ]
+
+
+class FakeArchiveRepository:
+    def __init__(self, months):
+        self.months = months
+
+    async def find_summaries(self, company_id, start=None):
+        return [m for m in self.months if start is None or m["month"] >= datetime(start.year, start.month, 1)]
+
+
+@pytest.mark.parametrize("period", ["6m", "1y"])
+def test_archived_boundary_days_are_not_dropped(period):
+    rng = random.Random(11)
+    now = datetime.utcnow()
+    products = [{"_id": ObjectId(), "name": f"Product {i}", "category": f"Category {i % 3}"} for i in range(6)]
+
+    # Everything older than 100 days was archived, so both period starts fall on archived days
+    archive_end = day_floor(now - timedelta(days=100))
+    archived_sales = make_sales(rng, products, now - timedelta(days=420), archive_end, 1500)
+    live_sales = make_sales(rng, products, archive_end, now, 500)
+
+    archived_months = {}
+    for sale in archived_sales:
+        archived_months.setdefault(datetime(sale["date"].year, sale["date"].month, 1), []).append(sale)
+    archive = [{"month": month, **summarize_sales(sales)} for month, sales in sorted(archived_months.items())]
+
+    all_days = {}
+    for month in archive:
+        all_days.update(month["days"])
+    all_days.update(summarize_sales(live_sales)["days"])
+
+    service = SalesAnalyticsService.__new__(SalesAnalyticsService)
+    service.daily_repository = FakeDailyRepository(rollups_of(all_days))
+    service.sale_repository = FakeSaleRepository(live_sales)
+    service.archive_repository = FakeArchiveRepository(archive)
+
+    dates = get_date_ranges()
+    from_rollups = SalesMetricsAccumulator(dates=dates, period=period, inventory=products, now=now)
+    asyncio.run(service._fold_sales_from_rollups("company", from_rollups))
+
+    expected = SalesMetricsAccumulator(dates=dates, period=period, inventory=products, now=now)
+    expected.add_all(live_sales)
+    expected.add_archived(archive)
+
+    assert from_rollups.sales_counts() == expected.sales_counts()
+    assert from_rollups.sales_totals() == pytest.approx(expected.sales_totals(), abs=TOLERANCE)
+    assert from_rollups.revenue_in_period() == pytest.approx(expected.revenue_in_period(), abs=TOLERANCE)
+    assert from_rollups.category_distribution() == pytest.approx(expected.category_distribution(), abs=TOLERANCE)
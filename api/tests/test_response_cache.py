@@ -0,0 +1,122 @@
+"""
+VersionedResponseCache: LRU eviction, TTL expiry and data-version invalidation.
+"""
+import asyncio
+
+import pytest
+
+from api.utils import response_cache as response_cache_module
+from api.utils.response_cache import VersionedResponseCache, cached_company_response, response_cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_hit_requires_the_same_version(clock):
+    cache = VersionedResponseCache(max_entries=10, ttl_seconds=60)
+    cache.set("key", 1, "value")
+
+    assert cache.get("key", 1) == (True, "value")
+    # A write bumped the company's data version: the entry is stale and dropped
+    assert cache.get("key", 2) == (False, None)
+    assert cache.get("key", 1) == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = VersionedResponseCache(max_entries=10, ttl_seconds=60)
+    cache.set("key", 1, "value")
+
+    clock.now += 59
+    assert cache.get("key", 1) == (True, "value")
+    clock.now += 1
+    assert cache.get("key", 1) == (False, None)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = VersionedResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1, "A")
+    cache.set("b", 1, "B")
+    cache.get("a", 1)  # "b" is now the least recently used
+    cache.set("c", 1, "C")
+
+    assert cache.get("b", 1) == (False, None)
+    assert cache.get("a", 1) == (True, "A")
+    assert cache.get("c", 1) == (True, "C")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_stats_count_hits_and_misses(clock):
+    cache = VersionedResponseCache(max_entries=10, ttl_seconds=60)
+    cache.set("key", 1, "value")
+    cache.get("key", 1)
+    cache.get("other", 1)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hitRate"]) == (1, 1, 0.5)
+
+
+def test_get_or_compute_bypasses_unknown_companies(clock):
+    cache = VersionedResponseCache(max_entries=10, ttl_seconds=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert asyncio.run(cache.get_or_compute("key", 1, compute)) == 1
+    assert asyncio.run(cache.get_or_compute("key", 1, compute)) == 1
+    # A None version (unknown company) is never cached
+    assert asyncio.run(cache.get_or_compute("key", None, compute)) == 2
+    assert asyncio.run(cache.get_or_compute("key", None, compute)) == 3
+
+
+class FakeCompanyRepository:
+    def __init__(self):
+        self.version = 1
+
+    async def data_version(self, company_id):
+        return self.version
+
+
+class FakeService:
+    def __init__(self):
+        self.company_repository = FakeCompanyRepository()
+        self.calls = 0
+
+    @cached_company_response("test_overview")
+    async def overview(self, company_id, period):
+        self.calls += 1
+        return {"period": period, "call": self.calls}
+
+
+def test_cached_company_response_follows_the_data_version(clock, monkeypatch):
+    monkeypatch.setattr(response_cache_module, "RESPONSE_CACHE_ENABLED", True)
+    response_cache.clear()
+    service = FakeService()
+
+    async def scenario():
+        first = await service.overview("company", "7d")
+        assert await service.overview("company", "7d") is first
+        # The period is part of the key
+        assert (await service.overview("company", "30d"))["call"] == 2
+        # A write bumps the data version: the next read recomputes
+        service.company_repository.version += 1
+        assert (await service.overview("company", "7d"))["call"] == 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        response_cache.clear()
@@ -0,0 +1,150 @@
+"""
+Bucket-layout month summaries must use the windows of the live-sales helpers
+and fold legacy embedded sales into every total (fake collections).
+"""
+import asyncio
+import random
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+
+from api.repositories.sale_repository import SaleRepository, add_to_summary, empty_summary, month_floor
+from api.utils.sales_metrics import (
+    calculate_month_revenue_metrics,
+    calculate_month_revenue_metrics_from_summaries,
+    calculate_monthly_sales_change,
+    calculate_monthly_sales_change_from_summaries,
+    get_date_ranges,
+)
+
+
+TOLERANCE = 0.011
+COMPANY_ID = str(ObjectId())
+
+
+class Cursor:
+    def __init__(self, documents):
+        self.documents = iter(documents)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.documents)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeBucketCollection:
+    def __init__(self, buckets):
+        self.buckets = buckets
+
+    def find(self, query, projection):
+        months = query["month"]["$in"]
+        return Cursor({k: v for k, v in b.items() if k != "sales"} for b in self.buckets if b["month"] in months)
+
+    def aggregate(self, pipeline):
+        month = pipeline[0]["$match"]["month"]
+        after, before = pipeline[1]["$project"]["sales"]["$filter"]["cond"]["$and"]
+        start, end = after["$gte"][1], before["$lt"][1]
+        return Cursor(
+            {"sales": [s for s in b["sales"] if start <= s["date"] < end]}
+            for b in self.buckets if month["$gte"] <= b["month"] < month["$lt"]
+        )
+
+
+class FakeCompanyCollection:
+    def __init__(self, legacy_sales):
+        self.legacy_sales = legacy_sales
+
+    async def find_one(self, query, projection):
+        return {"sales": self.legacy_sales}
+
+
+def make_sales(rng, products, start, end, count):
+    sales = []
+    for _ in range(count):
+        items = [
+            {"productId": product["_id"], "quantity": rng.randint(1, 3), "price": round(rng.uniform(1, 100), 2)}
+            for product in rng.sample(products, 2)
+        ]
+        sales.append({
+            "_id": ObjectId(),
+            "items": items,
+            "total": round(sum(i["price"] * i["quantity"] for i in items), 2),
+            "date": start + (end - start) * rng.random(),
+        })
+    return sales
+
+
+def summary_of(sales, product_categories):
+    summary = empty_summary()
+    for sale in sales:
+        add_to_summary(summary, sale, product_categories)
+    return summary
+
+
+@pytest.fixture
+def repository_and_sales():
+    rng = random.Random(3)
+    dates = get_date_ranges()
+    products = [{"_id": ObjectId(), "category": f"Category {i % 3}"} for i in range(6)]
+    categories = {p["_id"]: p["category"] for p in products}
+
+    sales = make_sales(rng, products, dates["last_month_start"], dates["month_start"], 300)
+    # The last day of last month is outside the revenue and ticket window
+    sales += make_sales(rng, products, dates["last_month_end"], dates["month_start"], 40)
+    sales += make_sales(rng, products, dates["month_start"], dates["today_start"] + timedelta(hours=1), 200)
+    rng.shuffle(sales)
+    bucketed, legacy = sales[:-60], sales[-60:]
+
+    buckets = {}
+    for sale in bucketed:
+        month = month_floor(sale["date"])
+        bucket = buckets.setdefault(month, {"month": month, "sales": [], **empty_summary()})
+        bucket["sales"].append(sale)
+        add_to_summary(bucket, sale, categories)
+
+    repository = SaleRepository.__new__(SaleRepository)
+    repository.layout = "bucket"
+    repository.buckets_collection = FakeBucketCollection(list(buckets.values()))
+    repository.company_collection = FakeCompanyCollection(legacy)
+    return repository, sales, categories, dates
+
+
+def test_report_month_summaries_match_the_live_sales_windows(repository_and_sales):
+    repository, sales, categories, dates = repository_and_sales
+    current_month, last_month, last_month_full = asyncio.run(
+        repository.get_report_month_summaries(COMPANY_ID, dates, categories)
+    )
+
+    assert calculate_month_revenue_metrics_from_summaries(current_month, last_month) == pytest.approx(
+        calculate_month_revenue_metrics(sales, dates["month_start"], dates["last_month_start"], dates["last_month_end"]),
+        abs=TOLERANCE,
+    )
+    assert calculate_monthly_sales_change_from_summaries(current_month, last_month_full) == pytest.approx(
+        calculate_monthly_sales_change(sales, dates["month_start"], dates["last_month_start"])
+    )
+
+
+def test_legacy_sales_are_folded_into_the_categories(repository_and_sales):
+    repository, sales, categories, dates = repository_and_sales
+    current_month, last_month, last_month_full = asyncio.run(
+        repository.get_report_month_summaries(COMPANY_ID, dates, categories)
+    )
+
+    def expected(start, end):
+        return summary_of([s for s in sales if start <= s["date"] < end], categories)
+
+    end_of_time = dates["today_start"] + timedelta(days=1)
+    for summary, (start, end) in [
+        (current_month, (dates["month_start"], end_of_time)),
+        (last_month, (dates["last_month_start"], dates["last_month_end"])),
+        (last_month_full, (dates["last_month_start"], dates["month_start"])),
+    ]:
+        reference = expected(start, end)
+        assert summary["count"] == reference["count"]
+        assert summary["revenue"] == pytest.approx(reference["revenue"], abs=TOLERANCE)
+        assert summary["categories"] == pytest.approx(reference["categories"], abs=TOLERANCE)
@@ -0,0 +1,102 @@
+"""
+Sale writes on servers without transactions: a sale that cannot be completed
+must give its stock back.
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import PyMongoError
+
+from api.services.sale_services import SaleService
+
+
+PEN, MUG = ObjectId(), ObjectId()
+PRODUCTS = {"pen": {"_id": PEN, "name": "Pen"}, "mug": {"_id": MUG, "name": "Mug"}}
+
+
+class FakeProductRepository:
+    def __init__(self, stock):
+        self.stock = dict(stock)
+
+    async def decrement_stock(self, company_id, product_id, quantity, revenue=None, sold_at=None, guarded=False, session=None):
+        if guarded and self.stock[product_id] < quantity:
+            return False
+        self.stock[product_id] -= quantity
+        return True
+
+    async def restore_stock(self, company_id, product_id, quantity, revenue):
+        self.stock[product_id] += quantity
+
+    async def find_by_name(self, company_id, name):
+        product = PRODUCTS[name.casefold()]
+        return {**product, "quantity": self.stock[product["_id"]]}
+
+
+class FakeWrites:
+    """Records the writes of one repository; `fail` names the one that raises."""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.calls = []
+
+    def __getattr__(self, name):
+        async def write(*args, **kwargs):
+            if name == self.fail:
+                raise PyMongoError(f"{name} failed")
+            self.calls.append(name)
+        return write
+
+
+def make_service(stock, failing_repository=None, failing_write=None):
+    service = SaleService.__new__(SaleService)
+    service.product_repository = FakeProductRepository(stock)
+    for name in ("sale_repository", "daily_repository", "client_repository", "company_repository"):
+        fail = failing_write if name == failing_repository else None
+        setattr(service, name, FakeWrites(fail))
+    return service
+
+
+def apply(service):
+    sale_doc = {"_id": ObjectId(), "clientId": ObjectId(), "items": [], "total": 12.0, "date": datetime.utcnow()}
+    inventory_updates = [(PEN, 2, 4.0), (MUG, 1, 8.0)]
+    return asyncio.run(service._apply_sale_without_transaction(
+        "company", sale_doc, {"Office": 12.0}, inventory_updates, PRODUCTS
+    ))
+
+
+def test_sale_is_written_after_its_stock():
+    service = make_service({PEN: 5, MUG: 1})
+    apply(service)
+
+    assert service.product_repository.stock == {PEN: 3, MUG: 0}
+    assert service.sale_repository.calls == ["insert_sale"]
+    assert service.company_repository.calls == ["touch"]
+
+
+def test_insufficient_stock_restores_earlier_decrements():
+    service = make_service({PEN: 5, MUG: 0})
+    with pytest.raises(HTTPException) as error:
+        apply(service)
+
+    assert error.value.status_code == 400
+    assert "'Mug'" in error.value.detail
+    assert service.product_repository.stock == {PEN: 5, MUG: 0}
+    assert service.sale_repository.calls == []
+
+
+@pytest.mark.parametrize("failing_repository, failing_write, sale_removed", [
+    ("sale_repository", "insert_sale", False),
+    ("daily_repository", "record_sale", True),
+    ("client_repository", "record_purchase", True),
+    ("company_repository", "touch", True),
+])
+def test_failed_write_restores_the_stock(failing_repository, failing_write, sale_removed):
+    service = make_service({PEN: 5, MUG: 1}, failing_repository, failing_write)
+    with pytest.raises(PyMongoError):
+        apply(service)
+
+    assert service.product_repository.stock == {PEN: 5, MUG: 1}
+    assert ("remove_sale" in service.sale_repository.calls) is sale_removed
@@ -0,0 +1,267 @@
+"""
+NDJSON sale import: splitting the body into numbered batches, validating
+them with per-line error reporting, and writing a batch (with fake
+repositories) without losing stock when a write fails.
+"""
+import asyncio
+import json
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from api.services import sale_services
+from api.services.sale_services import SaleService, _import_error, _ndjson_batches, _validate_import_batch
+
+
+def row(client="Ana", product="Caneta", quantity=1, price=2.5, **extra):
+    return json.dumps({
+        "clientName": client,
+        "items": [{"productName": product, "quantity": quantity, "price": price}],
+        **extra,
+    }).encode()
+
+
+def new_report():
+    return {"failed": 0, "errors": []}
+
+
+def batches_of(chunks, batch_size):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [batch async for batch in _ndjson_batches(stream(), batch_size)]
+
+    return asyncio.run(collect())
+
+
+def test_lines_are_numbered_from_one_and_blank_lines_skipped():
+    body = b"a\n\n  \nb\nc"
+    assert batches_of([body], 10) == [[(1, b"a"), (4, b"b"), (5, b"c")]]
+
+
+def test_lines_split_across_chunks_are_joined():
+    body = b'{"x": 1}\n{"x": 2}\n{"x": 3}\n'
+    chunks = [body[i:i + 3] for i in range(0, len(body), 3)]
+    assert batches_of(chunks, 10) == [[(1, b'{"x": 1}'), (2, b'{"x": 2}'), (3, b'{"x": 3}')]]
+
+
+def test_batches_hold_at_most_batch_size_lines():
+    body = b"\n".join(str(i).encode() for i in range(1, 8)) + b"\n"
+    batches = batches_of([body], 3)
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [line_no for batch in batches for line_no, _ in batch] == list(range(1, 8))
+
+
+def test_empty_body_has_no_batches():
+    assert batches_of([b"", b"\n\n"], 10) == []
+
+
+def test_valid_batch_is_validated_at_once():
+    batch = [(1, row()), (3, row(client="Bia", date="2024-05-01T10:00:00"))]
+    report = new_report()
+
+    rows = _validate_import_batch(batch, report)
+
+    assert [line_no for line_no, _ in rows] == [1, 3]
+    assert rows[1][1].clientName == "Bia"
+    assert rows[1][1].date.year == 2024
+    assert rows[0][1].date is None
+    assert report == new_report()
+
+
+def test_invalid_lines_are_reported_and_the_others_kept():
+    batch = [
+        (1, row()),
+        (2, b"{not json"),
+        (3, row(quantity=0)),
+        (4, json.dumps({"items": []}).encode()),
+        (5, row(client="Caio")),
+    ]
+    report = new_report()
+
+    rows = _validate_import_batch(batch, report)
+
+    assert [line_no for line_no, _ in rows] == [1, 5]
+    assert report["failed"] == 3
+    errors = {error["line"]: error["error"] for error in report["errors"]}
+    assert set(errors) == {2, 3, 4}
+    assert "items.0.quantity" in errors[3]
+    assert "clientName" in errors[4]
+
+
+def test_a_line_holding_two_rows_is_rejected():
+    # Joined as one JSON array, "{...},{...}" would otherwise become two rows
+    batch = [(1, row() + b"," + row()), (2, row())]
+    report = new_report()
+
+    rows = _validate_import_batch(batch, report)
+
+    assert [line_no for line_no, _ in rows] == [2]
+    assert [error["line"] for error in report["errors"]] == [1]
+
+
+def test_reported_errors_are_capped(monkeypatch):
+    monkeypatch.setattr(sale_services, "SALES_IMPORT_MAX_ERRORS", 2)
+    report = new_report()
+    for line_no in range(1, 6):
+        _import_error(report, line_no, "bad")
+
+    assert report["failed"] == 5
+    assert [error["line"] for error in report["errors"]] == [1, 2]
+
+
+@pytest.mark.parametrize("line", [b"[]", b"42", b'"text"', b"null"])
+def test_non_object_lines_are_rejected(line):
+    report = new_report()
+    assert _validate_import_batch([(1, line)], report) == []
+    assert report["failed"] == 1
+
+
+PEN, MUG = ObjectId(), ObjectId()
+
+
+class FakeProductRepository:
+    """Products with stock and sales counters; `take` simulates concurrent sales."""
+
+    def __init__(self, stock, take=None):
+        self.stock = dict(stock)
+        self.units_sold = {product_id: 0 for product_id in stock}
+        self.take = take or {}
+
+    async def find_by_names(self, company_id, names, shape):
+        products = {"pen": (PEN, "Pen"), "mug": (MUG, "Mug")}
+        return [
+            {"_id": products[name.casefold()][0], "name": products[name.casefold()][1],
+             "quantity": self.stock[products[name.casefold()][0]]}
+            for name in names if name.casefold() in products
+        ]
+
+    async def find_by_ids(self, company_id, ids, shape):
+        return [{"_id": i, "name": "Pen" if i == PEN else "Mug", "quantity": self.stock[i]} for i in ids]
+
+    async def add_sales_counters(self, company_id, counters, decrement_stock):
+        for product_id, quantity in self.take.items():
+            self.stock[product_id] -= quantity
+        short = []
+        for product_id, entry in counters.items():
+            if decrement_stock and self.stock[product_id] < entry["unitsSold"]:
+                short.append(product_id)
+                continue
+            if decrement_stock:
+                self.stock[product_id] -= entry["unitsSold"]
+            self.units_sold[product_id] += entry["unitsSold"]
+        return short
+
+    async def remove_sales_counters(self, company_id, counters, restore_stock=True):
+        for product_id, entry in counters.items():
+            if restore_stock:
+                self.stock[product_id] += entry["unitsSold"]
+            self.units_sold[product_id] -= entry["unitsSold"]
+
+
+class FakeClientRepository:
+    def __init__(self):
+        self.clients = {"Ana": ObjectId()}
+
+    async def find_by_names(self, company_id, names, shape):
+        return [{"_id": self.clients[name], "name": name} for name in names if name in self.clients]
+
+    async def insert_clients(self, company_id, client_docs):
+        for client in client_docs:
+            self.clients[client["name"]] = client["_id"]
+
+    async def add_spend_aggregates(self, company_id, aggregates):
+        pass
+
+
+class FakeSaleRepository:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sales = {}
+
+    async def insert_sales(self, company_id, sales):
+        # A partial write: the first sale lands before the error
+        self.sales[sales[0][0]["_id"]] = sales[0][0]
+        if self.fail:
+            raise PyMongoError("insert failed")
+        for sale_doc, _ in sales:
+            self.sales[sale_doc["_id"]] = sale_doc
+
+    async def remove_sales(self, company_id, sales):
+        for sale_doc, _ in sales:
+            self.sales.pop(sale_doc["_id"], None)
+
+
+class FakeDailyRepository:
+    async def record_sales(self, company_id, sales):
+        pass
+
+
+def import_service(products, sales):
+    service = SaleService.__new__(SaleService)
+    service.product_repository = products
+    service.client_repository = FakeClientRepository()
+    service.sale_repository = sales
+    service.daily_repository = FakeDailyRepository()
+    return service
+
+
+def import_batch(service, rows, decrement_stock=True):
+    report = new_report()
+    lines = [(line_no, row(**fields)) for line_no, fields in enumerate(rows, 1)]
+    imported = asyncio.run(service._import_batch(
+        "company", _validate_import_batch(lines, report), decrement_stock, report
+    ))
+    return imported, report
+
+
+def test_batch_updates_stock_counters_and_sales():
+    products, sales = FakeProductRepository({PEN: 5, MUG: 5}), FakeSaleRepository()
+    imported, report = import_batch(import_service(products, sales), [
+        {"product": "Pen", "quantity": 2},
+        {"client": "Bia", "product": "mug", "quantity": 1},
+        {"product": "Nope"},
+        {"product": "Pen", "quantity": 4},
+    ])
+
+    assert imported == 2
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+    assert products.stock == {PEN: 3, MUG: 4}
+    assert products.units_sold == {PEN: 2, MUG: 1}
+    assert len(sales.sales) == 2
+
+
+def test_rows_short_after_a_concurrent_sale_give_their_stock_back():
+    # A concurrent sale takes 4 mugs between the batch's read and its write
+    products, sales = FakeProductRepository({PEN: 5, MUG: 5}, take={MUG: 4}), FakeSaleRepository()
+    service = import_service(products, sales)
+    report = new_report()
+    line = json.dumps({"clientName": "Ana", "items": [
+        {"productName": "Pen", "quantity": 1, "price": 1},
+        {"productName": "Mug", "quantity": 2, "price": 1},
+    ]}).encode()
+    imported = asyncio.run(service._import_batch(
+        "company", _validate_import_batch([(1, line), (2, row(product="Pen"))], report), True, report
+    ))
+
+    assert imported == 1
+    assert "Insufficient stock for product 'Mug'" in report["errors"][0]["error"]
+    assert products.stock == {PEN: 4, MUG: 1}
+    assert products.units_sold == {PEN: 1, MUG: 0}
+
+
+@pytest.mark.parametrize("decrement_stock", [True, False])
+def test_failed_sales_write_undoes_the_batch(decrement_stock):
+    products, sales = FakeProductRepository({PEN: 5, MUG: 5}), FakeSaleRepository(fail=True)
+    with pytest.raises(PyMongoError):
+        import_batch(import_service(products, sales), [
+            {"product": "Pen", "quantity": 2},
+            {"product": "Mug", "quantity": 1},
+        ], decrement_stock)
+
+    assert products.stock == {PEN: 5, MUG: 5}
+    assert products.units_sold == {PEN: 0, MUG: 0}
+    assert sales.sales == {}
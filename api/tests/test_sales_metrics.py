@@ -0,0 +1,54 @@
+"""
+Revenue evolution buckets (`bucket_start` / `bucket_key`) of every granularity.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.utils.sales_metrics import GRANULARITIES, bucket_key, bucket_start
+
+
+# A Wednesday afternoon
+DATE = datetime(2025, 1, 15, 13, 45, 30)
+
+EXPECTED = {
+    "hour": (datetime(2025, 1, 15, 13), "2025-01-15T13:00"),
+    "day": (datetime(2025, 1, 15), "2025-01-15"),
+    "week": (datetime(2025, 1, 13), "2025-01-13"),
+    "month": (datetime(2025, 1, 1), "2025-01"),
+}
+
+
+def test_every_granularity_is_covered():
+    assert set(EXPECTED) == set(GRANULARITIES)
+
+
+@pytest.mark.parametrize("granularity", GRANULARITIES)
+def test_bucket_start_and_key(granularity):
+    start, key = EXPECTED[granularity]
+    assert bucket_start(DATE, granularity) == start
+    assert bucket_key(DATE, granularity) == key
+    # The bucket's first instant is in the bucket
+    assert bucket_key(start, granularity) == key
+
+
+@pytest.mark.parametrize("granularity", GRANULARITIES)
+def test_keys_sort_chronologically(granularity):
+    dates = [datetime(2023, 11, 28) + timedelta(hours=7 * i) for i in range(400)]
+    keys = [bucket_key(date, granularity) for date in dates]
+    assert keys == sorted(keys)
+
+
+def test_weeks_start_on_monday_across_a_year_boundary():
+    # Sunday 2025-01-05 belongs to the week of Monday 2024-12-30
+    assert bucket_key(datetime(2025, 1, 5, 23, 59), "week") == "2024-12-30"
+    assert bucket_key(datetime(2025, 1, 6), "week") == "2025-01-06"
+
+
+def test_same_month_of_two_years_never_merges():
+    assert bucket_key(datetime(2024, 3, 10), "month") != bucket_key(datetime(2025, 3, 10), "month")
+
+
+def test_invalid_granularity():
+    with pytest.raises(ValueError):
+        bucket_key(DATE, "year")
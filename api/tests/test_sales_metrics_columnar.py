@@ -0,0 +1,75 @@
+"""
+The NumPy columnar engine must return the figures of the Python accumulator;
+sums may only differ in floating-point summation order.
+
+Skipped when NumPy (an optional dependency) is not installed.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from api.utils.sales_metrics import get_date_ranges
+from api.utils.sales_metrics_columnar import ColumnarSalesMetrics
+from api.utils.sales_metrics_engine import SalesMetricsAccumulator
+from .test_sales_metrics_engine import PERIODS, make_archived, make_inventory, make_sales
+
+
+# Revenue sums are done in another order; allow rounding noise
+TOLERANCE = 0.011
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = random.Random(10)
+    inventory = make_inventory(rng)
+    return inventory, make_sales(rng, inventory, count=3000), make_archived(rng, inventory)
+
+
+def build(engine, data, **kwargs):
+    inventory, sales, archived = data
+    metrics = engine(inventory=inventory, **kwargs)
+    metrics.add_all(sales)
+    metrics.add_archived(archived)
+    return metrics
+
+
+@pytest.mark.parametrize("period", PERIODS)
+def test_columnar_engine_matches_python_engine(data, period):
+    options = dict(
+        dates=get_date_ranges(),
+        period=period,
+        active_since=datetime.utcnow() - timedelta(days=90),
+    )
+    python = build(SalesMetricsAccumulator, data, **options)
+    columnar = build(ColumnarSalesMetrics, data, min_sales=0, **options)
+
+    for figure in ("daily_metrics", "sales_totals", "ticket_metrics", "month_revenue_metrics"):
+        assert getattr(columnar, figure)() == pytest.approx(getattr(python, figure)(), abs=TOLERANCE), figure
+    assert columnar.sales_counts() == python.sales_counts()
+    assert columnar.monthly_sales_change() == python.monthly_sales_change()
+    assert columnar.active_client_ids == python.active_client_ids
+
+    # Same keys in the same (first-seen) order
+    assert list(columnar.revenue_in_period()) == list(python.revenue_in_period())
+    assert columnar.revenue_in_period() == pytest.approx(python.revenue_in_period(), abs=TOLERANCE)
+    assert list(columnar.category_distribution()) == list(python.category_distribution())
+    assert columnar.category_distribution() == pytest.approx(python.category_distribution(), abs=TOLERANCE)
+
+
+def test_small_batches_use_the_python_loop(data):
+    _, sales, _ = data
+    metrics = ColumnarSalesMetrics(period="30d", min_sales=len(sales) + 1)
+    metrics.add_all(sales)
+
+    assert metrics.sales_counts()["totalCount"] == len(sales)
+
+
+def test_empty_batch(data):
+    metrics = ColumnarSalesMetrics(period="7d")
+    metrics.add_all([])
+
+    assert metrics.sales_counts() == SalesMetricsAccumulator(period="7d").sales_counts()
+    assert metrics.revenue_in_period() == {}
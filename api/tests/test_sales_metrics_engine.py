@@ -0,0 +1,175 @@
+"""
+The single-pass accumulators must return exactly what the `calculate_*`
+helpers of `sales_metrics.py` (the reference implementation) return.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from api.utils.sales_metrics import (
+    calculate_category_revenue_distribution_period,
+    calculate_daily_metrics,
+    calculate_month_revenue_metrics,
+    calculate_monthly_sales_change,
+    calculate_revenue_in_period,
+    calculate_sales_counts,
+    calculate_sales_totals,
+    calculate_ticket_metrics,
+    get_date_ranges,
+)
+from api.utils.sales_metrics_engine import _AGGREGATE_FIELDS, MultiPeriodSalesMetrics, SalesMetricsAccumulator
+
+
+PERIODS = ("7d", "30d", "6m", "1y")
+CATEGORIES = ("Eletrônicos", "Roupas", "Alimentos", None)
+
+
+def make_inventory(rng, count=15):
+    return [
+        {"_id": ObjectId(), "name": f"Product {i}", "category": rng.choice(CATEGORIES)}
+        for i in range(count)
+    ]
+
+
+def make_sales(rng, inventory, count=800, days=420):
+    now = datetime.utcnow()
+    sales = []
+    for _ in range(count):
+        items = []
+        for product in rng.sample(inventory, rng.randint(1, 3)):
+            item = {"quantity": rng.randint(1, 4), "price": round(rng.uniform(1, 300), 2)}
+            # Items reference their product by id, by string id or by name only
+            reference = rng.random()
+            if reference < 0.6:
+                item["productId"] = product["_id"]
+            elif reference < 0.8:
+                item["productId"] = str(product["_id"])
+            else:
+                item["productName"] = f"  {product['name'].upper()} "
+            items.append(item)
+        sales.append({
+            "_id": ObjectId(),
+            "clientId": ObjectId(),
+            "items": items,
+            "total": round(sum(i["price"] * i["quantity"] for i in items), 2),
+            "date": now - timedelta(seconds=rng.randint(0, days * 86400)),
+        })
+    sales.sort(key=lambda s: s["date"])
+    return sales
+
+
+def make_archived(rng, inventory):
+    """Summaries of two archived months, older than every live sale."""
+    archived = []
+    for month in (datetime(2020, 1, 1), datetime(2020, 2, 1)):
+        days = {}
+        for day in range(1, 6):
+            products = {str(p["_id"]): round(rng.uniform(1, 100), 2) for p in rng.sample(inventory, 3)}
+            days[f"{month:%Y-%m}-{day:02d}"] = {"count": 3, "revenue": sum(products.values()), "products": products}
+        archived.append({
+            "month": month,
+            "count": sum(d["count"] for d in days.values()),
+            "revenue": sum(d["revenue"] for d in days.values()),
+            "days": days,
+        })
+    return archived
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = random.Random(8)
+    inventory = make_inventory(rng)
+    return inventory, make_sales(rng, inventory), make_archived(rng, inventory)
+
+
+def assert_shared_figures(metrics, sales, archived, dates):
+    assert metrics.daily_metrics() == calculate_daily_metrics(sales, dates["today_start"], dates["yesterday_start"])
+    assert metrics.sales_totals() == calculate_sales_totals(sales, dates["week_start"], archived)
+    assert metrics.ticket_metrics() == calculate_ticket_metrics(
+        sales, dates["month_start"], dates["last_month_start"], dates["last_month_end"], archived
+    )
+    assert metrics.sales_counts() == calculate_sales_counts(sales, dates["week_start"], archived)
+    assert metrics.monthly_sales_change() == calculate_monthly_sales_change(
+        sales, dates["month_start"], dates["last_month_start"]
+    )
+    assert metrics.month_revenue_metrics() == calculate_month_revenue_metrics(
+        sales, dates["month_start"], dates["last_month_start"], dates["last_month_end"]
+    )
+
+
+@pytest.mark.parametrize("period", PERIODS)
+def test_accumulator_matches_helpers(data, period):
+    inventory, sales, archived = data
+    dates = get_date_ranges()
+    metrics = SalesMetricsAccumulator(dates=dates, period=period, inventory=inventory)
+    metrics.add_all(sales)
+    metrics.add_archived(archived)
+
+    assert_shared_figures(metrics, sales, archived, dates)
+    assert metrics.revenue_in_period() == calculate_revenue_in_period(sales, period, archived)
+    assert metrics.category_distribution() == calculate_category_revenue_distribution_period(
+        sales, inventory, period, archived
+    )
+
+
+def test_multi_period_matches_helpers(data):
+    inventory, sales, archived = data
+    dates = get_date_ranges()
+    metrics = MultiPeriodSalesMetrics(PERIODS, dates=dates, inventory=inventory)
+    metrics.add_all(sales)
+    metrics.add_archived(archived)
+
+    assert_shared_figures(metrics.shared, sales, archived, dates)
+    for period in PERIODS:
+        by_period = metrics.by_period[period]
+        assert by_period.revenue_in_period() == calculate_revenue_in_period(sales, period, archived)
+        assert by_period.category_distribution() == calculate_category_revenue_distribution_period(
+            sales, inventory, period, archived
+        )
+
+
+def test_invalid_dates_are_skipped(data):
+    inventory, sales, _ = data
+    metrics = SalesMetricsAccumulator(period="30d", inventory=inventory)
+    assert metrics.add({"date": "not a date", "total": 10}) is False
+    metrics.add_all(sales)
+
+    assert metrics.sales_counts()["totalCount"] == len(sales)
+
+
+def test_active_clients_since_cutoff(data):
+    _, sales, _ = data
+    since = datetime.utcnow() - timedelta(days=90)
+    metrics = SalesMetricsAccumulator(active_since=since)
+    metrics.add_all(sales)
+
+    assert metrics.active_client_ids == {str(s["clientId"]) for s in sales if s["date"] >= since}
+
+
+def test_period_figures_require_a_period(data):
+    metrics = SalesMetricsAccumulator()
+    with pytest.raises(ValueError):
+        metrics.revenue_in_period()
+
+
+def test_load_aggregates_adds_to_folded_sales(data):
+    # The mongo report backend folds legacy sales first, then loads the pipeline figures
+    inventory, sales, _ = data
+    dates = get_date_ranges()
+    legacy, stored = sales[:300], sales[300:]
+
+    pipeline = SalesMetricsAccumulator(dates=dates, period="1y", inventory=inventory).add_all(stored)
+    totals = {field: getattr(pipeline, field) for field in _AGGREGATE_FIELDS}
+
+    metrics = SalesMetricsAccumulator(dates=dates, period="1y", inventory=inventory).add_all(legacy)
+    metrics.load_aggregates(totals, pipeline.period_revenue, pipeline.category_totals)
+    expected = SalesMetricsAccumulator(dates=dates, period="1y", inventory=inventory).add_all(sales)
+
+    assert metrics.sales_counts() == expected.sales_counts()
+    assert metrics.ticket_metrics() == pytest.approx(expected.ticket_metrics(), abs=0.011)
+    assert metrics.monthly_sales_change() == expected.monthly_sales_change()
+    assert list(metrics.revenue_in_period()) == list(expected.revenue_in_period())
+    assert metrics.revenue_in_period() == pytest.approx(expected.revenue_in_period(), abs=0.011)
+    assert metrics.category_distribution() == pytest.approx(expected.category_distribution(), abs=0.011)
@@ -1,5 +1,6 @@
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Optional
 
 def serialize_doc(doc):
     """
@@ -34,3 +35,10 @@ def serialize_mongo(document):
                 new_doc[key] = serialize_mongo(value)
         return new_doc
     return document
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Sales dates are stored as naive UTC; convert aware datetimes to match."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,75 @@
+"""
+HyperLogLog sketches for distinct-customer counts.
+
+A sketch is stored sparsely as {register index (str): rank}, so a day with a
+handful of buyers stays a handful of fields, new sales update it atomically
+with `$max` on a single register, and sketches of any set of days merge by
+taking the per-register maximum. With HLL_PRECISION = 14 (16384 registers)
+the standard error of the estimate is about 0.8%.
+"""
+import hashlib
+import math
+from typing import Any, Dict, Iterable, Tuple
+
+HLL_PRECISION = 14
+HLL_REGISTERS = 1 << HLL_PRECISION
+_HASH_BITS = 64
+
+
+def hll_register(value: Any) -> Tuple[int, int]:
+    """
+    Return the (register index, rank) that `value` sets in a sketch.
+
+    Values are hashed through their string form, so an ObjectId and its hex
+    string count as the same customer.
+    """
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+    x = int.from_bytes(digest, "big")
+    index = x >> (_HASH_BITS - HLL_PRECISION)
+    rest = x & ((1 << (_HASH_BITS - HLL_PRECISION)) - 1)
+    rank = (_HASH_BITS - HLL_PRECISION) - rest.bit_length() + 1
+    return index, rank
+
+
+class HyperLogLog:
+    """Mergeable distinct counter (see the module docstring for the storage format)."""
+
+    def __init__(self):
+        self.registers: Dict[int, int] = {}
+
+    def add(self, value: Any) -> None:
+        index, rank = hll_register(value)
+        if rank > self.registers.get(index, 0):
+            self.registers[index] = rank
+
+    def merge(self, sketch: Dict[str, int]) -> "HyperLogLog":
+        """Merge a stored sketch ({str(index): rank})."""
+        for key, rank in (sketch or {}).items():
+            index = int(key)
+            if rank > self.registers.get(index, 0):
+                self.registers[index] = rank
+        return self
+
+    def merge_all(self, sketches: Iterable[Dict[str, int]]) -> "HyperLogLog":
+        for sketch in sketches:
+            self.merge(sketch)
+        return self
+
+    def to_document(self) -> Dict[str, int]:
+        return {str(index): rank for index, rank in self.registers.items()}
+
+    def count(self) -> int:
+        """Estimated number of distinct values added."""
+        m = HLL_REGISTERS
+        zeros = m - len(self.registers)
+        if zeros == m:
+            return 0
+
+        alpha = 0.7213 / (1 + 1.079 / m)
+        harmonic = zeros + sum(2.0 ** -rank for rank in self.registers.values())
+        estimate = alpha * m * m / harmonic
+
+        # Small cardinalities: linear counting is far more accurate
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
@@ -0,0 +1,90 @@
+"""
+Mergeable quantile sketches of sale tickets (median, p90, p99).
+
+A sketch counts values in logarithmic buckets: bucket k holds the values in
+(gamma^(k-1), gamma^k], with gamma = (1 + a) / (1 - a), so any quantile is
+returned within a relative error `a` (QUANTILE_RELATIVE_ACCURACY, 1%) of a
+value actually at that rank. Non-positive values share the bucket "z".
+
+Like the HyperLogLog sketches (see utils.hyperloglog), a sketch is stored
+sparsely as {bucket (str): count}: a new sale updates its day atomically with
+a single `$inc`, sketches of any set of days merge by adding their counts, and
+the size is bounded by the spread of the values (about 920 buckets from 0.01
+to 10^6), never by the number of sales.
+"""
+import math
+from typing import Dict, Iterable, Optional
+
+QUANTILE_RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + QUANTILE_RELATIVE_ACCURACY) / (1 - QUANTILE_RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+_ZERO_BUCKET = "z"
+
+# Quantiles shown next to the average ticket
+TICKET_QUANTILES = {"median": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+def sketch_bucket(value: float) -> str:
+    """Return the bucket (stored key) counting `value`."""
+    if value <= 0:
+        return _ZERO_BUCKET
+    return str(math.ceil(math.log(value) / _LOG_GAMMA))
+
+
+def _bucket_value(bucket: str) -> float:
+    """Representative value of a bucket (within the relative accuracy of all its values)."""
+    if bucket == _ZERO_BUCKET:
+        return 0.0
+    return 2 * _GAMMA ** int(bucket) / (_GAMMA + 1)
+
+
+def _bucket_order(bucket: str) -> float:
+    return -math.inf if bucket == _ZERO_BUCKET else int(bucket)
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch (see the module docstring for the storage format)."""
+
+    def __init__(self):
+        self.buckets: Dict[str, int] = {}
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        bucket = sketch_bucket(float(value))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+
+    def merge(self, sketch: Dict[str, int]) -> "QuantileSketch":
+        """Merge a stored sketch ({bucket: count})."""
+        for bucket, count in (sketch or {}).items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + int(count)
+            self.count += int(count)
+        return self
+
+    def merge_all(self, sketches: Iterable[Dict[str, int]]) -> "QuantileSketch":
+        for sketch in sketches:
+            self.merge(sketch)
+        return self
+
+    def to_document(self) -> Dict[str, int]:
+        return dict(self.buckets)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimated value at quantile `q` (0 <= q <= 1), rounded to 2 decimals;
+        None for an empty sketch.
+        """
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.buckets, key=_bucket_order):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                return round(_bucket_value(bucket), 2)
+        return round(_bucket_value(max(self.buckets, key=_bucket_order)), 2)
+
+    def quantiles(self, named: Dict[str, float] = TICKET_QUANTILES) -> Dict[str, Optional[float]]:
+        """Return {name: quantile(q)} for each named quantile (e.g. TICKET_QUANTILES)."""
+        return {name: self.quantile(q) for name, q in named.items()}
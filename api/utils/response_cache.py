@@ -0,0 +1,127 @@
+"""
+In-process cache for the dashboard read endpoints (sales, report, clients and
+inventory overviews).
+
+Entries are keyed by (companyId, endpoint, parameters, UTC day) and tagged with the
+company's data version (the `dataVersion` counter every write path bumps on the
+company document, see CompanyRepository.set_fields). An entry is only served
+while its version matches the current one and its TTL has not expired, so a
+write is visible on the next request of every worker, and day-relative windows
+("today", "this month") roll over at midnight.
+
+The cache is per process: each worker keeps its own entries and counters.
+"""
+from collections import OrderedDict
+from datetime import datetime
+import functools
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 300))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2048))
+
+
+def cache_key(company_id, endpoint: str, *params: Hashable) -> Tuple[str, str, Tuple[Hashable, ...], str]:
+    """Build the (companyId, endpoint, parameters (e.g. period), UTC day) key of a response."""
+    return (str(company_id), endpoint, params, datetime.utcnow().strftime("%Y-%m-%d"))
+
+
+class VersionedResponseCache:
+    """
+    LRU cache of endpoint responses with a TTL and a version tag per entry.
+
+    Cached values are shared between requests: callers must not mutate them.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (version, expires_at, value); most recently used last
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, version: Any) -> Tuple[bool, Any]:
+        """
+        Returns:
+            (found, value): found is False on a miss, a stale version or an expired entry.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry_version, expires_at, value = entry
+            if entry_version == version and expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+
+        self.misses += 1
+        return False, None
+
+    def set(self, key: Hashable, version: Any, value: Any) -> None:
+        self._entries[key] = (version, time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key: Hashable, version: Any, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value of `key` for `version`, or await `compute()` and cache it.
+
+        A None version (unknown company) bypasses the cache, so `compute` raises
+        its usual errors.
+        """
+        if not RESPONSE_CACHE_ENABLED or version is None:
+            return await compute()
+
+        found, value = self.get(key, version)
+        if found:
+            return value
+
+        value = await compute()
+        self.set(key, version, value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Shared by the services of this process
+response_cache = VersionedResponseCache()
+
+
+def cached_company_response(endpoint: str):
+    """
+    Cache the result of a service method `(self, company_id, *params)`; the
+    positional parameters (e.g. the period) are part of the key.
+
+    The service must expose `company_repository`; the company's data version is
+    read (one indexed, projected lookup) before every call.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, company_id, *args):
+            version = await self.company_repository.data_version(company_id)
+            return await response_cache.get_or_compute(
+                cache_key(company_id, endpoint, *args),
+                version,
+                lambda: method(self, company_id, *args),
+            )
+        return wrapper
+    return decorator
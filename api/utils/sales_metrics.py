@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional, Tuple
 
 
 def get_date_ranges():
@@ -53,7 +53,7 @@ def calculate_daily_metrics(sales: List[Dict], today_start, yesterday_start):
     }
 
 
-def calculate_sales_totals(sales: List[Dict], week_start):
+def calculate_sales_totals(sales: List[Dict], week_start, archived: Optional[List[Dict]] = None):
     """Calculate total sales overall and in the last 7 days."""
     total_sales = 0
     week_total = 0
@@ -65,16 +65,20 @@ def calculate_sales_totals(sales: List[Dict], week_start):
         if s["date"] >= week_start:
             week_total += value
 
+    total_sales += _archived_totals(archived)["revenue"]
+
     return {
         "total": round(total_sales, 2),
         "week": round(week_total, 2)
     }
 
 
-def calculate_ticket_metrics(sales: List[Dict], month_start, last_month_start, last_month_end):
+def calculate_ticket_metrics(sales: List[Dict], month_start, last_month_start, last_month_end, archived: Optional[List[Dict]] = None):
     """Calculate average ticket and monthly variation (%)."""
-    total_sales = sum(float(s.get("total", 0)) for s in sales)
-    avg_ticket = round(total_sales / len(sales), 2) if sales else 0
+    archived_totals = _archived_totals(archived)
+    total_sales = sum(float(s.get("total", 0)) for s in sales) + archived_totals["revenue"]
+    sales_count = len(sales) + archived_totals["count"]
+    avg_ticket = round(total_sales / sales_count, 2) if sales_count else 0
 
     this_month_values = []
     last_month_values = []
@@ -104,15 +108,15 @@ def calculate_ticket_metrics(sales: List[Dict], month_start, last_month_start, l
         "comparison": comparison
     }
 
-def calculate_sales_counts(sales, week_start):
+def calculate_sales_counts(sales, week_start, archived: Optional[List[Dict]] = None):
     """
     Calculate sales counts (not values).
 
     Returns:
-        - total_sales_count: total number of sales
+        - total_sales_count: total number of sales (archived ones included)
         - weekly_sales_count: number of sales from week_start to now
     """
-    total_sales_count = len(sales)
+    total_sales_count = len(sales) + _archived_totals(archived)["count"]
     weekly_sales_count = sum(1 for sale in sales if sale["date"] >= week_start)
 
     return {
@@ -182,15 +186,88 @@ def calculate_month_revenue_metrics(sales: List[Dict], month_start, last_month_s
     }
 
 
+# ---------------------------------------------------------------------
+# Summary-based variants (bucket sales layout)
+#
+# Each summary is a {"count": int, "revenue": float} dict, e.g. one month
+# bucket of `sales_buckets`. Pass the same windows as the live-sales helpers:
+# for ticket and revenue "last month" ends at last_month_end, for the sales
+# change it is the whole calendar month (SaleRepository.get_report_month_summaries).
+# ---------------------------------------------------------------------
+
+def _percentage_change(current: float, previous: float) -> float:
+    if previous == 0:
+        return 0.0 if current == 0 else 100.0
+    return ((current - previous) / previous) * 100
+
+
+def calculate_ticket_metrics_from_summaries(overall: Dict, current_month: Dict, last_month: Dict):
+    """Summary-based equivalent of calculate_ticket_metrics."""
+    avg_ticket = round(overall["revenue"] / overall["count"], 2) if overall["count"] else 0
+    avg_this_month = round(current_month["revenue"] / current_month["count"], 2) if current_month["count"] else 0
+    avg_last_month = round(last_month["revenue"] / last_month["count"], 2) if last_month["count"] else 0
+
+    return {
+        "average": avg_ticket,
+        "comparison": round(_percentage_change(avg_this_month, avg_last_month), 2)
+    }
+
+
+def calculate_month_revenue_metrics_from_summaries(current_month: Dict, last_month: Dict):
+    """Summary-based equivalent of calculate_month_revenue_metrics."""
+    current_month_total = round(current_month["revenue"], 2)
+    last_month_total = round(last_month["revenue"], 2)
+
+    return {
+        "total": current_month_total,
+        "comparison": round(_percentage_change(current_month_total, last_month_total), 2)
+    }
+
+
+def calculate_monthly_sales_change_from_summaries(current_month: Dict, last_month: Dict):
+    """Summary-based equivalent of calculate_monthly_sales_change."""
+    return {
+        "currentMonthCount": current_month["count"],
+        "lastMonthCount": last_month["count"],
+        "percentageChange": _percentage_change(current_month["count"], last_month["count"])
+    }
+
+
+# ---------------------------------------------------------------------
+# Archived sales (see api/repositories/sale_archive_repository.py)
+#
+# Helpers taking `archived` also accept the summaries of archived months, so
+# totals and periods that reach into archived data stay complete. Archived
+# data is summarized per UTC day: a period starting during a day includes
+# that whole archived day.
+# ---------------------------------------------------------------------
+
+def _archived_totals(archived: Optional[List[Dict]]) -> Dict:
+    """Sum the count and revenue of archived month summaries."""
+    totals = {"count": 0, "revenue": 0.0}
+    for month in archived or []:
+        totals["count"] += int(month.get("count", 0))
+        totals["revenue"] += float(month.get("revenue", 0.0))
+    return totals
+
+
+def _archived_days(archived: Optional[List[Dict]], start: Optional[datetime] = None) -> Iterator[Tuple[datetime, Dict]]:
+    """Yield (day, day summary) for every archived day overlapping [start, now)."""
+    for month in archived or []:
+        for key, day in month.get("days", {}).items():
+            day_start = datetime.strptime(key, "%Y-%m-%d")
+            if start is not None and day_start + timedelta(days=1) <= start:
+                continue
+            yield day_start, day
+
+
 from datetime import datetime, timedelta
 from typing import List, Dict
-import calendar
 
 
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 from bson import ObjectId
-import calendar
 
 
 def _parse_date_safe(d):
@@ -210,10 +287,76 @@ def _parse_date_safe(d):
     raise TypeError(f"Invalid date type: {type(d)}")
 
 
+class ProductCategoryIndex:
+    """
+    Product -> category lookup for sale items, built once from an inventory list.
+
+    Items are resolved by raw productId, then by its string form, then by the
+    item's product name (trimmed, case-insensitive; the first product with that
+    name wins), each in O(1). Unresolved or empty categories become "Unknown".
+    """
+
+    def __init__(self, inventory: List[Dict[str, Any]]):
+        self.by_raw_id: Dict[Any, Any] = {}
+        self.by_str_id: Dict[str, Any] = {}
+        self.by_name: Dict[str, Any] = {}
+
+        for product in inventory or []:
+            category = product.get("category", "Unknown")
+            self.by_name.setdefault(str(product.get("name")).strip().lower(), category)
+
+            pid = product.get("_id")
+            if pid is None:
+                continue
+            self.by_str_id[str(pid)] = category
+            self.by_raw_id[pid] = category
+
+    def item_category(self, item: Dict[str, Any]) -> str:
+        product_id = item.get("productId")
+        product_id_str = str(product_id) if product_id is not None else None
+
+        if product_id in self.by_raw_id:
+            category = self.by_raw_id[product_id]
+        elif product_id_str and product_id_str in self.by_str_id:
+            category = self.by_str_id[product_id_str]
+        else:
+            category = None
+            item_name = item.get("productName") or item.get("name")
+            if item_name:
+                category = self.by_name.get(str(item_name).strip().lower())
+
+        return category or "Unknown"
+
+    def category_for_id(self, product_id: str) -> str:
+        """Category of a product given its string id (e.g. a summary key)."""
+        return self.by_str_id.get(product_id) or "Unknown"
+
+    def resolves_by_id(self, product_id: Any) -> bool:
+        """True if `product_id` resolves without the name fallback."""
+        return product_id in self.by_raw_id
+
+
+def category_period_start(period: str, now: datetime) -> datetime:
+    """Start of the category distribution window for `period`."""
+    if period == "7d":
+        return now - timedelta(days=7)
+    elif period == "30d":
+        return now - timedelta(days=30)
+    elif period == "6m":
+        # retrocede 6 meses com segurança (aproximação por 6 * 30 dias)
+        # Se preferir contar mês a mês exato, a lógica pode ser ajustada.
+        return now - timedelta(days=180)
+    elif period == "1y":
+        return now - timedelta(days=365)
+    else:
+        raise ValueError("Invalid period. Use '7d', '30d', '6m' or '1y'.")
+
+
 def calculate_category_revenue_distribution_period(
     sales: List[Dict[str, Any]],
     inventory: List[Dict[str, Any]],
-    period: str
+    period: str,
+    archived: Optional[List[Dict[str, Any]]] = None
 ) -> Dict[str, float]:
     """
     Calculate revenue percentage by category within a given period.
@@ -232,33 +375,10 @@ def calculate_category_revenue_distribution_period(
     }
     """
 
-    now = datetime.utcnow()
+    start = category_period_start(period, datetime.utcnow())
 
-    # Determine start date
-    if period == "7d":
-        start = now - timedelta(days=7)
-    elif period == "30d":
-        start = now - timedelta(days=30)
-    elif period == "6m":
-        # retrocede 6 meses com segurança (aproximação por 6 * 30 dias)
-        # Se preferir contar mês a mês exato, a lógica pode ser ajustada.
-        start = now - timedelta(days=180)
-    elif period == "1y":
-        start = now - timedelta(days=365)
-    else:
-        raise ValueError("Invalid period. Use '7d', '30d', '6m' or '1y'.")
-
-    # Build robust lookup: both str(_id) and raw ObjectId map to category.
-    product_categories: Dict[str, str] = {}
-    raw_id_map: Dict[Any, str] = {}
-
-    for product in inventory:
-        pid = product.get("_id")
-        cat = product.get("category", "Unknown")
-        if pid is None:
-            continue
-        product_categories[str(pid)] = cat
-        raw_id_map[pid] = cat
+    # O(1) lookups by raw id, string id and normalized name (built once)
+    product_index = ProductCategoryIndex(inventory)
 
     category_totals: Dict[str, float] = {}
     total_revenue = 0.0
@@ -275,31 +395,7 @@ def calculate_category_revenue_distribution_period(
             continue
 
         for item in sale.get("items", []):
-            # possíveis formas de productId virem: ObjectId, str(ObjectId), None
-            product_id = item.get("productId")
-            product_id_str = str(product_id) if product_id is not None else None
-
-            # prefer lookup in these orders:
-            # 1) raw_id_map (ObjectId)
-            # 2) product_categories[str(id)]
-            # 3) fallback to productName (se disponível)
-            category = None
-            if product_id in raw_id_map:
-                category = raw_id_map[product_id]
-            elif product_id_str and product_id_str in product_categories:
-                category = product_categories[product_id_str]
-            else:
-                # fallback: se item contém nome, procure no inventário por nome (case-insensitive)
-                item_name = item.get("productName") or item.get("name")
-                if item_name:
-                    # procura primeira correspondência por nome
-                    for prod in inventory:
-                        if str(prod.get("name")).strip().lower() == str(item_name).strip().lower():
-                            category = prod.get("category", "Unknown")
-                            break
-
-            if not category:
-                category = "Unknown"
+            category = product_index.item_category(item)
 
             quantity = item.get("quantity", 0) or 0
             price = item.get("price", 0.0) or 0.0
@@ -312,6 +408,13 @@ def calculate_category_revenue_distribution_period(
             total_revenue += value
             category_totals[category] = category_totals.get(category, 0.0) + value
 
+    # Archived days keep the item revenue per product id
+    for _, day in _archived_days(archived, start):
+        for product_id, value in day.get("products", {}).items():
+            category = product_index.category_for_id(product_id)
+            total_revenue += value
+            category_totals[category] = category_totals.get(category, 0.0) + value
+
     # If no revenue collected (or no mapped categories), return empty dict or zeros
     if total_revenue == 0:
         # Retornar categorias conhecidas com 0.0 é útil para o frontend; aqui mantemos apenas as categorias encontradas.
@@ -328,37 +431,67 @@ def calculate_category_revenue_distribution_period(
 
 from datetime import datetime, timedelta
 from typing import List, Dict
-import calendar
 
 
-def calculate_revenue_in_period(sales: List[Dict], period: str):
+# Time buckets of the revenue evolution (ISO weeks start on Monday)
+GRANULARITIES = ("hour", "day", "week", "month")
+
+
+def bucket_start(date: datetime, granularity: str) -> datetime:
+    """Return the first instant of the `granularity` bucket containing `date`."""
+    if granularity == "hour":
+        return datetime(date.year, date.month, date.day, date.hour)
+    elif granularity == "day":
+        return datetime(date.year, date.month, date.day)
+    elif granularity == "week":
+        return datetime(date.year, date.month, date.day) - timedelta(days=date.weekday())
+    elif granularity == "month":
+        return datetime(date.year, date.month, 1)
+    else:
+        raise ValueError(f"Invalid granularity. Use one of: {', '.join(GRANULARITIES)}.")
+
+
+def bucket_key(date: datetime, granularity: str) -> str:
     """
-    Calculate revenue grouped by time for predefined periods:
-    - "7d" : last 7 days (group by day)
-    - "30d": last 30 days (group by day)
-    - "6m" : last 6 months (group by month name)
-    - "1y" : last 12 months (group by month name)
+    Label of the bucket containing `date`: "YYYY-MM-DDTHH:00" (hour),
+    "YYYY-MM-DD" (day, or the Monday of a week) or "YYYY-MM" (month).
+    Keys sort chronologically and never merge the same month of two years.
     """
+    start = bucket_start(date, granularity)
+    if granularity == "hour":
+        return start.strftime("%Y-%m-%dT%H:00")
+    elif granularity == "month":
+        return start.strftime("%Y-%m")
+    return start.strftime("%Y-%m-%d")
 
-    now = datetime.utcnow()
 
-    # Determine range and grouping mode
+def revenue_period_start(period: str, now: datetime):
+    """Return (start, group_by) of the revenue evolution window for `period`."""
     if period == "7d":
-        start = now - timedelta(days=7)
-        group_by = "day"
+        return now - timedelta(days=7), "day"
     elif period == "30d":
-        start = now - timedelta(days=30)
-        group_by = "day"
+        return now - timedelta(days=30), "day"
     elif period == "6m":
         start = now.replace(month=now.month - 6 if now.month > 6 else 12 - (6 - now.month),
                             year=now.year if now.month > 6 else now.year - 1)
-        group_by = "month"
+        return start, "month"
     elif period == "1y":
-        start = now.replace(year=now.year - 1)
-        group_by = "month"
+        return now.replace(year=now.year - 1), "month"
     else:
         raise ValueError("Invalid period. Use one of: '7d', '30d', '6m', '1y'.")
 
+
+def calculate_revenue_in_period(sales: List[Dict], period: str, archived: Optional[List[Dict]] = None):
+    """
+    Calculate revenue grouped by time for predefined periods:
+    - "7d" : last 7 days (group by day)
+    - "30d": last 30 days (group by day)
+    - "6m" : last 6 months (group by month, "YYYY-MM")
+    - "1y" : last 12 months (group by month, "YYYY-MM")
+    """
+
+    start, group_by = revenue_period_start(period, datetime.utcnow())
+
     results = {}
 
     for s in sales:
@@ -368,15 +501,14 @@ def calculate_revenue_in_period(sales: List[Dict], period: str):
         if date < start:
             continue
 
-        if group_by == "day":
-            key = date.strftime("%Y-%m-%d")
-        else:
-            # Convert month number → month name in PT-BR
-            month_name = calendar.month_name[date.month].capitalize()
-            key = month_name  # e.g. "Janeiro"
+        key = bucket_key(date, group_by)  # e.g. "2025-01-31" or "2025-01"
 
         results[key] = results.get(key, 0.0) + value
 
+    for day_start, day in _archived_days(archived, start):
+        key = bucket_key(day_start, group_by)
+        results[key] = results.get(key, 0.0) + float(day.get("revenue", 0.0))
+
     # Round values
     results = {k: round(v, 2) for k, v in results.items()}
     
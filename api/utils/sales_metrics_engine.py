@@ -0,0 +1,547 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from .sales_metrics import (
+    ProductCategoryIndex,
+    _archived_days,
+    _archived_totals,
+    _parse_date_safe,
+    bucket_key,
+    category_period_start,
+    get_date_ranges,
+    revenue_period_start,
+)
+
+
+# Window accumulators that `load_aggregates` accepts from an external backend.
+_AGGREGATE_FIELDS = (
+    "count",
+    "revenue",
+    "today_total",
+    "yesterday_total",
+    "week_total",
+    "week_count",
+    "this_month_count",
+    "this_month_revenue",
+    "last_month_count",
+    "last_month_revenue",
+    "last_month_full_count",
+)
+
+
+def _category_percentages(category_totals: Dict[str, float], total_revenue: float) -> Dict[str, float]:
+    """Share of each category in `total_revenue`, in percent (2 decimals)."""
+    if total_revenue == 0:
+        return {cat: 0.0 for cat in category_totals} if category_totals else {}
+
+    return {
+        category: round((value / total_revenue) * 100, 2)
+        for category, value in category_totals.items()
+    }
+
+
+class SalesMetricsAccumulator:
+    """
+    Single-pass equivalent of the dashboard helpers in `sales_metrics.py`.
+
+    Every figure of the sales overview and of the advanced report is accumulated
+    while walking the sales once, instead of one pass per helper. The result
+    methods return exactly what the matching helper returns for the same sales
+    (including each helper's own date windows), so the helpers remain the
+    reference implementation.
+
+    Usage:
+        acc = SalesMetricsAccumulator(period="30d", inventory=inventory)
+        acc.add_all(sales)
+        acc.add_archived(archived)
+        acc.ticket_metrics(), acc.revenue_in_period(), ...
+
+    Sales whose date cannot be parsed are skipped (as the report's
+    normalization step does).
+    """
+
+    def __init__(
+        self,
+        dates: Optional[Dict[str, datetime]] = None,
+        period: Optional[str] = None,
+        inventory: Optional[List[Dict[str, Any]]] = None,
+        active_since: Optional[datetime] = None,
+        parse_date: Callable[[Any], datetime] = _parse_date_safe,
+        now: Optional[datetime] = None,
+    ):
+        self.dates = dates or get_date_ranges()
+        self.period = period
+        self.active_since = active_since
+        self._parse_date = parse_date
+        self._archived: List[Dict[str, Any]] = []
+
+        # Period windows (same starts and errors as the reference helpers)
+        self.category_start = None
+        self.revenue_start = None
+        self.group_by = None
+        if period is not None:
+            now = now or datetime.utcnow()
+            self.category_start = category_period_start(period, now)
+            self.revenue_start, self.group_by = revenue_period_start(period, now)
+
+        # Product lookups for the category distribution
+        self.product_index = ProductCategoryIndex(inventory)
+
+        # Accumulators
+        self.count = 0
+        self.revenue = 0.0
+        self.today_total = 0
+        self.yesterday_total = 0
+        self.week_total = 0
+        self.week_count = 0
+        self.this_month_count = 0
+        self.this_month_revenue = 0.0
+        self.last_month_count = 0              # [last_month_start, last_month_end)
+        self.last_month_revenue = 0.0
+        self.last_month_full_count = 0         # [last_month_start, month_start)
+        self.period_revenue: Dict[str, float] = {}
+        self.category_totals: Dict[str, float] = {}
+        self.category_revenue = 0.0
+        self.active_client_ids: Set[str] = set()
+
+    def add(self, sale: Dict[str, Any]) -> bool:
+        """
+        Fold one sale into every figure.
+
+        Returns:
+            bool: False if the sale was skipped because of an invalid date.
+        """
+        try:
+            date = self._parse_date(sale.get("date"))
+        except Exception:
+            return False
+
+        self._add_dated(date, sale)
+        return True
+
+    def _add_dated(self, date: datetime, sale: Dict[str, Any]) -> None:
+        d = self.dates
+        value = float(sale.get("total", 0))
+
+        self.count += 1
+        self.revenue += value
+
+        if date >= d["today_start"]:
+            self.today_total += value
+        elif d["yesterday_start"] <= date < d["today_start"]:
+            self.yesterday_total += value
+
+        if date >= d["week_start"]:
+            self.week_total += value
+            self.week_count += 1
+
+        if date >= d["month_start"]:
+            self.this_month_count += 1
+            self.this_month_revenue += value
+        else:
+            if d["last_month_start"] <= date < d["last_month_end"]:
+                self.last_month_count += 1
+                self.last_month_revenue += value
+            if d["last_month_start"] <= date:
+                self.last_month_full_count += 1
+
+        if self.active_since is not None and sale.get("clientId") and date >= self.active_since:
+            self.active_client_ids.add(str(sale.get("clientId")))
+
+        if self.period is not None:
+            self._add_to_period(date, value, sale)
+
+    def _add_to_period(self, date: datetime, value: float, sale: Dict[str, Any]) -> None:
+        """Fold a sale into the period figures (revenue evolution, category distribution)."""
+        if date >= self.revenue_start:
+            key = bucket_key(date, self.group_by)
+            self.period_revenue[key] = self.period_revenue.get(key, 0.0) + value
+
+        if date >= self.category_start:
+            for item in sale.get("items") or []:
+                self._add_item(item)
+
+    def add_all(self, sales: Iterable[Dict[str, Any]]) -> "SalesMetricsAccumulator":
+        for sale in sales:
+            self.add(sale)
+        return self
+
+    def add_archived(self, archived: Optional[List[Dict[str, Any]]]) -> "SalesMetricsAccumulator":
+        """
+        Include archived month summaries; they are merged after the live sales,
+        in the same order as the reference helpers.
+        """
+        self._archived.extend(archived or [])
+        return self
+
+    def add_rollup(self, rollup: Dict[str, Any]) -> None:
+        """
+        Fold one 'sales_daily' document (a whole UTC day) into every figure.
+
+        The dashboard windows all start at midnight, so a day is always entirely
+        inside or outside them. The period starts are not: the caller must fold
+        the raw sales of the day containing `revenue_start` / `category_start`
+        instead of its rollup. Item categories come from the per-product revenue
+        (no name fallback).
+        """
+        d = self.dates
+        date = rollup["day"]
+        count = int(rollup.get("count", 0))
+        value = float(rollup.get("revenue", 0.0))
+
+        self.count += count
+        self.revenue += value
+
+        if date >= d["today_start"]:
+            self.today_total += value
+        elif d["yesterday_start"] <= date < d["today_start"]:
+            self.yesterday_total += value
+
+        if date >= d["week_start"]:
+            self.week_total += value
+            self.week_count += count
+
+        if date >= d["month_start"]:
+            self.this_month_count += count
+            self.this_month_revenue += value
+        else:
+            if d["last_month_start"] <= date < d["last_month_end"]:
+                self.last_month_count += count
+                self.last_month_revenue += value
+            if d["last_month_start"] <= date:
+                self.last_month_full_count += count
+
+        if self.period is not None:
+            self._add_rollup_to_period(date, value, rollup)
+
+    def _add_rollup_to_period(self, date: datetime, value: float, rollup: Dict[str, Any]) -> None:
+        if date >= self.revenue_start:
+            key = bucket_key(date, self.group_by)
+            self.period_revenue[key] = self.period_revenue.get(key, 0.0) + value
+
+        if date >= self.category_start:
+            for product_id, item_value in rollup.get("products", {}).items():
+                category = self.product_index.category_for_id(product_id)
+                self.category_revenue += item_value
+                self.category_totals[category] = self.category_totals.get(category, 0.0) + item_value
+
+    @property
+    def period_starts(self) -> List[datetime]:
+        """Starts of the period windows (none without a period)."""
+        return [] if self.period is None else [self.revenue_start, self.category_start]
+
+    def add_rollup_totals(self, totals: Dict[str, Any]) -> None:
+        """
+        Fold the {"count", "revenue"} of days older than every window (they only
+        contribute to the all-time figures).
+        """
+        self.count += int(totals.get("count", 0))
+        self.revenue += float(totals.get("revenue", 0.0))
+
+    def load_aggregates(
+        self,
+        totals: Dict[str, Any],
+        period_revenue: Dict[str, float],
+        category_totals: Dict[str, float],
+    ) -> "SalesMetricsAccumulator":
+        """
+        Load figures computed elsewhere (e.g. by a MongoDB pipeline) instead of
+        adding sales, so the result methods format them exactly as usual.
+        They are added to what was already accumulated: sales added before
+        (e.g. older legacy ones) keep their keys first.
+
+        Args:
+            totals: Values for the window accumulators (count, revenue, today_total, ...).
+            period_revenue: Revenue per period key, in first-seen order.
+            category_totals: Item revenue per category, in first-seen order.
+        """
+        for field in _AGGREGATE_FIELDS:
+            if field in totals:
+                setattr(self, field, getattr(self, field) + totals[field])
+
+        for key, value in period_revenue.items():
+            self.period_revenue[key] = self.period_revenue.get(key, 0.0) + value
+        for category, value in category_totals.items():
+            self.category_totals[category] = self.category_totals.get(category, 0.0) + value
+            self.category_revenue += value
+        return self
+
+    def _add_item(self, item: Dict[str, Any]) -> None:
+        category = self.product_index.item_category(item)
+        value = self._item_value(item)
+        if value is None:
+            return
+
+        self.category_revenue += value
+        self.category_totals[category] = self.category_totals.get(category, 0.0) + value
+
+    @staticmethod
+    def _item_value(item: Dict[str, Any]) -> Optional[float]:
+        """Revenue of a sale item, or None if its price or quantity is invalid."""
+        quantity = item.get("quantity", 0) or 0
+        price = item.get("price", 0.0) or 0.0
+        try:
+            return float(price) * int(quantity)
+        except Exception:
+            return None
+
+    # -----------------------------------------------------------------
+    # Results (same shapes as the helpers in sales_metrics.py)
+    # -----------------------------------------------------------------
+
+    @staticmethod
+    def _rounded_change(current: float, previous: float) -> float:
+        if previous == 0:
+            return 0.0 if current == 0 else 100.0
+        return round(((current - previous) / previous) * 100, 2)
+
+    def daily_metrics(self) -> Dict[str, float]:
+        """calculate_daily_metrics"""
+        today_total = round(self.today_total, 2)
+        return {
+            "today_total": today_total,
+            "comparison": self._rounded_change(today_total, self.yesterday_total)
+        }
+
+    def sales_totals(self) -> Dict[str, float]:
+        """calculate_sales_totals"""
+        return {
+            "total": round(self.revenue + _archived_totals(self._archived)["revenue"], 2),
+            "week": round(self.week_total, 2)
+        }
+
+    def ticket_metrics(self) -> Dict[str, float]:
+        """calculate_ticket_metrics"""
+        archived = _archived_totals(self._archived)
+        sales_count = self.count + archived["count"]
+        avg_ticket = round((self.revenue + archived["revenue"]) / sales_count, 2) if sales_count else 0
+
+        avg_this_month = round(self.this_month_revenue / self.this_month_count, 2) if self.this_month_count else 0
+        avg_last_month = round(self.last_month_revenue / self.last_month_count, 2) if self.last_month_count else 0
+
+        return {
+            "average": avg_ticket,
+            "comparison": self._rounded_change(avg_this_month, avg_last_month)
+        }
+
+    def sales_counts(self) -> Dict[str, int]:
+        """calculate_sales_counts"""
+        return {
+            "totalCount": self.count + _archived_totals(self._archived)["count"],
+            "weekCount": self.week_count
+        }
+
+    def monthly_sales_change(self) -> Dict[str, Any]:
+        """calculate_monthly_sales_change"""
+        current, last = self.this_month_count, self.last_month_full_count
+        if last == 0:
+            percentage_change = 0 if current == 0 else 100
+        else:
+            percentage_change = ((current - last) / last) * 100
+
+        return {
+            "currentMonthCount": current,
+            "lastMonthCount": last,
+            "percentageChange": percentage_change
+        }
+
+    def month_revenue_metrics(self) -> Dict[str, float]:
+        """calculate_month_revenue_metrics"""
+        current_month_total = round(self.this_month_revenue, 2)
+        last_month_total = round(self.last_month_revenue, 2)
+        return {
+            "total": current_month_total,
+            "comparison": self._rounded_change(current_month_total, last_month_total)
+        }
+
+    def revenue_in_period(self) -> Dict[str, float]:
+        """calculate_revenue_in_period (requires `period`)"""
+        self._require_period()
+        results = dict(self.period_revenue)
+
+        for day_start, day in _archived_days(self._archived, self.revenue_start):
+            key = bucket_key(day_start, self.group_by)
+            results[key] = results.get(key, 0.0) + float(day.get("revenue", 0.0))
+
+        return {k: round(v, 2) for k, v in results.items()}
+
+    def category_distribution(self) -> Dict[str, float]:
+        """calculate_category_revenue_distribution_period (requires `period`)"""
+        self._require_period()
+        category_totals = dict(self.category_totals)
+        total_revenue = self.category_revenue
+
+        for _, day in _archived_days(self._archived, self.category_start):
+            for product_id, value in day.get("products", {}).items():
+                category = self.product_index.category_for_id(product_id)
+                total_revenue += value
+                category_totals[category] = category_totals.get(category, 0.0) + value
+
+        return _category_percentages(category_totals, total_revenue)
+
+    def _require_period(self) -> None:
+        if self.period is None:
+            raise ValueError("This figure requires the accumulator to be created with a period")
+
+
+class MultiPeriodSalesMetrics:
+    """
+    `SalesMetricsAccumulator` figures of several report periods in one pass.
+
+    The period-independent figures (all-time, today, week, month windows,
+    active clients) are accumulated once in `shared`; each period only adds
+    its revenue evolution and category distribution. Dates are parsed once
+    per sale, and the product index and archived months are shared.
+
+    Usage:
+        multi = MultiPeriodSalesMetrics(["7d", "1y"], inventory=inventory)
+        multi.add_all(sales)
+        multi.shared.ticket_metrics(), multi.by_period["7d"].category_distribution(), ...
+    """
+
+    def __init__(
+        self,
+        periods: Iterable[str],
+        dates: Optional[Dict[str, datetime]] = None,
+        inventory: Optional[List[Dict[str, Any]]] = None,
+        active_since: Optional[datetime] = None,
+        parse_date: Callable[[Any], datetime] = _parse_date_safe,
+        now: Optional[datetime] = None,
+    ):
+        now = now or datetime.utcnow()
+        self.shared = SalesMetricsAccumulator(
+            dates=dates, inventory=inventory, active_since=active_since, parse_date=parse_date, now=now
+        )
+        self.by_period: Dict[str, SalesMetricsAccumulator] = {}
+        for period in periods:
+            metrics = SalesMetricsAccumulator(dates=self.shared.dates, period=period, now=now)
+            metrics.product_index = self.shared.product_index
+            metrics._archived = self.shared._archived
+            self.by_period[period] = metrics
+
+    @property
+    def dates(self) -> Dict[str, datetime]:
+        return self.shared.dates
+
+    @property
+    def active_since(self) -> Optional[datetime]:
+        return self.shared.active_since
+
+    @property
+    def period_starts(self) -> List[datetime]:
+        return [start for metrics in self.by_period.values() for start in metrics.period_starts]
+
+    def add(self, sale: Dict[str, Any]) -> bool:
+        try:
+            date = self.shared._parse_date(sale.get("date"))
+        except Exception:
+            return False
+
+        self.shared._add_dated(date, sale)
+        value = float(sale.get("total", 0))
+        for metrics in self.by_period.values():
+            metrics._add_to_period(date, value, sale)
+        return True
+
+    def add_all(self, sales: Iterable[Dict[str, Any]]) -> "MultiPeriodSalesMetrics":
+        for sale in sales:
+            self.add(sale)
+        return self
+
+    def add_archived(self, archived: Optional[List[Dict[str, Any]]]) -> "MultiPeriodSalesMetrics":
+        self.shared.add_archived(archived)
+        return self
+
+    def add_rollup(self, rollup: Dict[str, Any]) -> None:
+        """See `SalesMetricsAccumulator.add_rollup`: the caller folds raw sales on every period start day."""
+        self.shared.add_rollup(rollup)
+        value = float(rollup.get("revenue", 0.0))
+        for metrics in self.by_period.values():
+            metrics._add_rollup_to_period(rollup["day"], value, rollup)
+
+    def add_rollup_totals(self, totals: Dict[str, Any]) -> None:
+        self.shared.add_rollup_totals(totals)
+
+
+class SalesRangeMetrics:
+    """
+    Revenue evolution and category distribution of the sales in an arbitrary
+    [start, end) range, bucketed by `granularity` (see sales_metrics.GRANULARITIES).
+
+    Only sales inside the range are folded, so callers feed it the result of an
+    indexed date-range scan and the cost follows the size of the range.
+
+    Usage:
+        metrics = SalesRangeMetrics(start, end, "week", inventory=inventory)
+        metrics.add_all(sales)
+        metrics.revenue_buckets(), metrics.category_distribution()
+    """
+
+    def __init__(
+        self,
+        start: datetime,
+        end: datetime,
+        granularity: str,
+        inventory: Optional[List[Dict[str, Any]]] = None,
+        parse_date: Callable[[Any], datetime] = _parse_date_safe,
+    ):
+        if start >= end:
+            raise ValueError("The range start must be before its end")
+        bucket_key(start, granularity)  # validates the granularity
+
+        self.start = start
+        self.end = end
+        self.granularity = granularity
+        self.product_index = ProductCategoryIndex(inventory)
+        self._parse_date = parse_date
+
+        self.count = 0
+        self.revenue = 0.0
+        self.bucket_revenue: Dict[str, float] = {}
+        self.category_totals: Dict[str, float] = {}
+        self.category_revenue = 0.0
+
+    def add(self, sale: Dict[str, Any]) -> bool:
+        """
+        Fold one sale.
+
+        Returns:
+            bool: False if the sale was skipped (invalid date or outside the range).
+        """
+        try:
+            date = self._parse_date(sale.get("date"))
+        except Exception:
+            return False
+        if not self.start <= date < self.end:
+            return False
+
+        value = float(sale.get("total", 0))
+        self.count += 1
+        self.revenue += value
+
+        key = bucket_key(date, self.granularity)
+        self.bucket_revenue[key] = self.bucket_revenue.get(key, 0.0) + value
+
+        for item in sale.get("items") or []:
+            item_value = SalesMetricsAccumulator._item_value(item)
+            if item_value is None:
+                continue
+            category = self.product_index.item_category(item)
+            self.category_revenue += item_value
+            self.category_totals[category] = self.category_totals.get(category, 0.0) + item_value
+        return True
+
+    def add_all(self, sales: Iterable[Dict[str, Any]]) -> "SalesRangeMetrics":
+        for sale in sales:
+            self.add(sale)
+        return self
+
+    def revenue_buckets(self) -> Dict[str, float]:
+        """Revenue per bucket, in chronological order (empty buckets omitted)."""
+        return {key: round(self.bucket_revenue[key], 2) for key in sorted(self.bucket_revenue)}
+
+    def category_distribution(self) -> Dict[str, float]:
+        return _category_percentages(self.category_totals, self.category_revenue)
+
+    def totals(self) -> Dict[str, Any]:
+        return {"count": self.count, "revenue": round(self.revenue, 2)}